@@ -1,8 +1,47 @@
 import json
 import datetime
+import random
 import re
 from typing import Dict, Any, Optional, List
 from dataclasses import dataclass
+import booking_search
+import metrics
+import orders
+import waitlist
+from tenants import DEFAULT_INFO
+from database import get_all_menu_items, get_booking
+
+# Below this classifier probability the keyword router decides instead
+MIN_INTENT_CONFIDENCE = 0.4
+
+_BOOKING_ID = re.compile(r'BK\d+', re.IGNORECASE)
+_WAITLIST_ID = re.compile(r'\bWL[0-9A-F]{16}\b', re.IGNORECASE)
+_ORDER_ID = re.compile(r'\bORD[0-9A-F]{10}\b', re.IGNORECASE)
+_ORDER_STATUS_LINES = {
+    'received': "has reached the kitchen and is next in line",
+    'preparing': "is being prepared right now",
+    'ready': "is ready",
+    'served': "has been served",
+    'cancelled': "was cancelled",
+}
+_WAITLIST_WORDS = ('waitlist', 'wait list', 'waiting list', 'fully booked', 'if a table frees up', 'cancellation list')
+_ISO_DATE = re.compile(r'\b\d{4}-\d{2}-\d{2}\b')
+_CLOCK_TIME = re.compile(r'\b(\d{1,2})(?::(\d{2}))?\s*(am|pm)?\b')
+_PARTY_SIZE = re.compile(r'\b(?:for|party of|table for)\s+(\d{1,2})\b|\b(\d{1,2})\s*(?:people|guests|persons|pax)\b')
+_HOURS_LABELS = {'monday_thursday': 'Monday - Thursday', 'friday_saturday': 'Friday - Saturday', 'sunday': 'Sunday'}
+_HOURS_NOTES = {'friday_saturday': ' *(Perfect for weekend celebrations!)*', 'sunday': ' *(Lovely for family brunch)*'}
+_WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+_LOOKUP_WORDS = ('lost', 'forgot', "can't find", 'cannot find', 'find my', 'look up', 'lookup', 'search',
+                 "don't have", 'no booking id', 'without the id', 'check my', 'booked under', 'booking under',
+                 'reservation under', 'booked as')
+_BOOKING_NAME = re.compile(r"\b(?:under(?: the name(?: of)?)?|name is|booked as|in the name of)\s+"
+                           r"([a-z][a-z'-]+(?:\s+[a-z][a-z'-]+){0,2})")
+_NAME_STOP_WORDS = {'on', 'for', 'at', 'and', 'the', 'from', 'with', 'today', 'tonight', 'tomorrow', 'please',
+                    'my', 'phone', 'email', 'number'} | set(_WEEKDAYS)
+_EMAIL_ADDRESS = re.compile(r'[\w.+-]+@[\w-]+(?:\.[\w-]+)+')
+_PHONE_NUMBER = re.compile(r'\+?\d[\d\s().-]{5,}\d')
+# Matches scoring below this are not mentioned to the guest
+MIN_LOOKUP_SCORE = 0.6
 
 @dataclass
 class AgentResponse:
@@ -20,8 +59,13 @@ class GastroGuideAgent:
     Core Principles: Empathy first, proactive, memory-aware, action-oriented
     """
     
-    def __init__(self):
-        """Initialize GastroGuide with conversation context"""
+    def __init__(self, restaurant: Optional[Dict] = None):
+        """
+        Initialize GastroGuide with conversation context
+        
+        Args:
+            restaurant: Location details (name, hours, location, phone); defaults to the main restaurant
+        """
         self.context = {
             'guest_name': None,
             'dietary_restrictions': [],
@@ -30,7 +74,8 @@ class GastroGuideAgent:
             'current_order': [],
             'preferences': {}
         }
-        self.restaurant_name = "Mediterranean Delight"
+        self.restaurant = restaurant or DEFAULT_INFO
+        self.restaurant_name = self.restaurant['name']
         
     def process_query(self, user_input: str, context: dict = None) -> AgentResponse:
         """
@@ -60,28 +105,81 @@ class GastroGuideAgent:
             'timestamp': datetime.datetime.now().isoformat()
         })
         
-        # Route to appropriate handler
-        if self._is_greeting(user_input_lower):
+        order_id = _ORDER_ID.search(user_input)
+        if order_id:
+            return self._handle_order_status(order_id.group().upper())
+        
+        # Route to appropriate handler; waitlist requests always go to the booking flow
+        if _WAITLIST_ID.search(user_input) or any(word in user_input_lower for word in _WAITLIST_WORDS):
+            intent = 'booking_inquiry'
+        else:
+            intent = self._classify_intent(user_input)
+        
+        if intent == 'greeting':
             return self._handle_greeting()
         
-        elif 'menu' in user_input_lower or 'food' in user_input_lower or 'dish' in user_input_lower or 'recommend' in user_input_lower:
+        elif intent == 'menu_inquiry':
             return self._handle_menu_inquiry(user_input_lower)
         
-        elif 'booking' in user_input_lower or 'reservation' in user_input_lower or 'table' in user_input_lower:
-            return self._handle_booking_inquiry(user_input_lower)
+        elif intent in ('booking_inquiry', 'booking_retrieval'):
+            return self._handle_booking_inquiry(user_input_lower, retrieval=intent == 'booking_retrieval')
         
-        elif 'hour' in user_input_lower or 'open' in user_input_lower or 'close' in user_input_lower:
+        elif intent == 'booking_deletion':
+            return self._handle_cancellation_request(user_input)
+        
+        elif intent == 'hours_inquiry':
             return self._handle_hours_inquiry()
         
-        elif any(word in user_input_lower for word in ['problem', 'issue', 'complaint', 'wrong', 'late', 'cold', 'bad']):
+        elif intent == 'complaint':
             return self._handle_complaint(user_input_lower)
         
-        elif any(word in user_input_lower for word in ['thank', 'thanks', 'appreciate']):
+        elif intent == 'gratitude':
             return self._handle_gratitude()
         
         else:
             return self._handle_general_query()
     
+    def _classify_intent(self, query: str) -> str:
+        """Classify a single message (see classify_batch)"""
+        return self.classify_batch([query])[0]
+    
+    def classify_batch(self, queries: List[str]) -> List[str]:
+        """
+        Classify many messages in one vectorized call
+        
+        Args:
+            queries: Raw user messages
+            
+        Returns:
+            One intent per message (labels from data/intent_corpus.tsv);
+            low-confidence predictions fall back to the keyword router
+        """
+        # NumPy is only loaded once the agent actually routes a message
+        from intent_classifier import get_classifier
+        
+        labels, confidence = get_classifier().predict(queries)
+        return [
+            label if score >= MIN_INTENT_CONFIDENCE else self._keyword_intent(query.lower())
+            for query, label, score in zip(queries, labels, confidence)
+        ]
+    
+    def _keyword_intent(self, text: str) -> str:
+        """Substring router (the original routing), used as the low-confidence fallback"""
+        if self._is_greeting(text):
+            return 'greeting'
+        elif 'menu' in text or 'food' in text or 'dish' in text or 'recommend' in text:
+            return 'menu_inquiry'
+        elif 'booking' in text or 'reservation' in text or 'table' in text or 'waitlist' in text:
+            return 'booking_retrieval' if _BOOKING_ID.search(text) else 'booking_inquiry'
+        elif 'hour' in text or 'open' in text or 'close' in text:
+            return 'hours_inquiry'
+        elif any(word in text for word in ['problem', 'issue', 'complaint', 'wrong', 'late', 'cold', 'bad']):
+            return 'complaint'
+        elif any(word in text for word in ['thank', 'thanks', 'appreciate']):
+            return 'gratitude'
+        else:
+            return 'general_query'
+    
     def _extract_guest_name(self, text: str):
         """Extract guest name from conversation"""
         patterns = [
@@ -134,6 +232,7 @@ class GastroGuideAgent:
         greetings = ['hi', 'hello', 'hey', 'good morning', 'good afternoon', 'good evening', 'greetings']
         return any(greet in text for greet in greetings)
     
+    @metrics.timed('agent_handler_seconds', handler='greeting')
     def _handle_greeting(self) -> AgentResponse:
         """Warm, personalized greeting"""
         greeting = self._get_time_based_greeting()
@@ -186,10 +285,9 @@ class GastroGuideAgent:
         
         return messages.get(celebration, messages['celebration'])
     
+    @metrics.timed('agent_handler_seconds', handler='menu_inquiry')
     def _handle_menu_inquiry(self, query: str) -> AgentResponse:
         """Handle menu questions with vivid descriptions and upselling"""
-        from database import get_all_menu_items
-        
         menu_items = get_all_menu_items()
         
         # Check for specific dietary needs
@@ -252,7 +350,8 @@ class GastroGuideAgent:
         
         return "our sommelier's wine selection"
     
-    def _handle_booking_inquiry(self, query: str) -> AgentResponse:
+    @metrics.timed('agent_handler_seconds', handler='booking_inquiry')
+    def _handle_booking_inquiry(self, query: str, retrieval: bool = False) -> AgentResponse:
         """Handle reservation requests warmly"""
         # Check for booking ID in query
         booking_id_match = re.search(r'BK\d+', query.upper())
@@ -260,6 +359,15 @@ class GastroGuideAgent:
         if booking_id_match:
             return self._get_booking_details(booking_id_match.group())
         
+        if retrieval or any(word in query for word in _LOOKUP_WORDS):
+            return self._find_booking(query)
+        
+        waitlist_match = _WAITLIST_ID.search(query)
+        if waitlist_match:
+            return self._handle_waitlist_entry(waitlist_match.group().upper(), query)
+        if any(word in query for word in _WAITLIST_WORDS):
+            return self._handle_waitlist_request(query)
+        
         # New reservation request
         name_part = f"{self.context['guest_name']}, " if self.context['guest_name'] else ""
         
@@ -288,10 +396,122 @@ class GastroGuideAgent:
             data=self.context
         )
     
+    def _parse_date(self, query: str) -> Optional[str]:
+        """An ISO date, 'today'/'tonight', 'tomorrow' or the next named weekday in a message"""
+        today = datetime.date.today()
+        iso = _ISO_DATE.search(query)
+        if iso:
+            return iso.group()
+        if 'tomorrow' in query:
+            return (today + datetime.timedelta(days=1)).isoformat()
+        if 'today' in query or 'tonight' in query:
+            return today.isoformat()
+        for offset, name in enumerate(_WEEKDAYS):
+            if name in query:
+                return (today + datetime.timedelta(days=(offset - today.weekday()) % 7 or 7)).isoformat()
+        return None
+    
+    def _parse_waitlist_details(self, query: str) -> Dict:
+        """Pull a date, time window and party size out of a message (missing parts are None)"""
+        day = self._parse_date(query)
+        
+        # Dates and party sizes contain numbers too, so only read clock times elsewhere
+        text = _PARTY_SIZE.sub(' ', _ISO_DATE.sub(' ', query))
+        times = []
+        for hour, minute, meridiem in _CLOCK_TIME.findall(text):
+            hour = int(hour)
+            if not meridiem and not minute:
+                continue
+            if meridiem == 'pm' and hour < 12:
+                hour += 12
+            elif meridiem == 'am' and hour == 12:
+                hour = 0
+            if hour < 24:
+                times.append(f"{hour:02d}:{minute or '00'}")
+        if len(times) == 1:
+            # A single time means "around then": wait for anything up to an hour later
+            end = min(int(times[0][:2]) + 1, 23)
+            times.append(f"{end:02d}:{times[0][3:]}")
+        
+        party = _PARTY_SIZE.search(query)
+        guests = int(party.group(1) or party.group(2)) if party else None
+        return {
+            'date': day,
+            'time_from': times[0] if times else None,
+            'time_to': max(times) if times else None,
+            'guests': guests,
+        }
+    
+    @metrics.timed('agent_handler_seconds', handler='waitlist_request')
+    def _handle_waitlist_request(self, query: str) -> AgentResponse:
+        """Collect what the guest wants to wait for, then hand off to POST /api/waitlist"""
+        details = self._parse_waitlist_details(query)
+        missing = [label for key, label in (('date', '📅 the date'), ('time_from', '🕐 the time (or a time range)'),
+                                            ('guests', '👥 how many guests')) if not details[key]]
+        if missing:
+            message = "I'd be happy to put you on our waitlist! The moment a table frees up, "
+            message += "we'll hold it for you and let you know right away.\n\n"
+            message += "I just need:\n" + "\n".join(missing)
+            return AgentResponse(
+                action="waitlist_request",
+                message=message,
+                data=details
+            )
+        
+        message = f"Lovely! I can add you to the waitlist for {details['guests']} guests on {details['date']}, "
+        message += f"any time between {details['time_from']} and {details['time_to']}.\n\n"
+        message += "If a table opens up we'll email you and hold it for a little while so you can accept. "
+        message += "Shall I add you? Just confirm with your name and email."
+        return AgentResponse(
+            action="waitlist_request",
+            message=message,
+            data=details,
+            needs_confirmation=True
+        )
+    
+    @metrics.timed('agent_handler_seconds', handler='waitlist_entry')
+    def _handle_waitlist_entry(self, entry_code: str, query: str) -> AgentResponse:
+        """Status of a waitlist entry, or accept/decline the table it is being offered"""
+        entry = waitlist.get_entry(entry_code)
+        if not entry:
+            return AgentResponse(
+                action="waitlist_not_found",
+                message=f"I couldn't find waitlist entry {entry_code}. Could you double-check the ID from your email?",
+                data=None
+            )
+        
+        if entry['status'] == 'offered' and 'accept' in query:
+            try:
+                booking = waitlist.accept_offer(entry_code)
+            except ValueError as e:
+                return AgentResponse(action="waitlist_status", message=f"I'm sorry - {e}.", data=entry)
+            message = f"Wonderful news - the table is yours! Your booking ID is **{booking['id']}** "
+            message += f"for {booking['guests']} guests on {booking['date']} at {booking['time']}. "
+            message += "A confirmation email is on its way."
+            return AgentResponse(action="booking_created", message=message, data=booking)
+        
+        if entry['status'] == 'offered' and 'decline' in query:
+            waitlist.decline_offer(entry_code)
+            return AgentResponse(
+                action="waitlist_status",
+                message="No problem at all - I've passed the table on to the next guest. Hope to see you another time!",
+                data=entry
+            )
+        
+        messages = {
+            'waiting': f"You're on the waitlist for {entry['guests']} guests on {entry['date']} "
+                       f"between {entry['time_from']} and {entry['time_to']}. We'll email you as soon as a table frees up!",
+            'offered': f"Good news - a table on {entry['offered_date']} at {entry['offered_time']} is being held for you! "
+                       f"Reply *accept {entry_code}* to take it or *decline {entry_code}* to pass.",
+            'booked': f"This waitlist entry became booking {entry.get('booking_id')} - see you soon!",
+        }
+        message = messages.get(entry['status'], f"This waitlist entry is {entry['status']}. "
+                                                "I'd be happy to add you to the list again if you like.")
+        return AgentResponse(action="waitlist_status", message=message, data=entry)
+    
+    @metrics.timed('agent_handler_seconds', handler='booking_details')
     def _get_booking_details(self, booking_id: str) -> AgentResponse:
         """Retrieve booking with warm, conversational tone"""
-        from database import get_booking
-        
         booking = get_booking(booking_id)
         
         if booking:
@@ -326,8 +546,8 @@ class GastroGuideAgent:
             message += "• It may have been made under a different confirmation number\n\n"
             message += "No worries though! I'm here to help. You could:\n"
             message += "1️⃣ Double-check the booking ID from your confirmation email\n"
-            message += "2️⃣ Let me know your name and date, and I can search that way\n"
-            message += "3️⃣ Call us at +1 (555) 123-4567 and our team will locate it immediately\n\n"
+            message += "2️⃣ Let me know your name, the date and your phone or email, and I can search that way\n"
+            message += f"3️⃣ Call us at {self.restaurant['phone']} and our team will locate it immediately\n\n"
             message += "What works best for you?"
             
             return AgentResponse(
@@ -336,15 +556,121 @@ class GastroGuideAgent:
                 data=None
             )
     
+    @metrics.timed('agent_handler_seconds', handler='booking_lookup')
+    def _find_booking(self, query: str) -> AgentResponse:
+        """
+        Find a booking without its ID, from the guest's name and the date
+        
+        The booking ID is what lets someone manage a reservation, so it is only
+        shared when the guest also gives the phone number or email it was made
+        with; a name and date alone only confirm that a booking exists.
+        """
+        name_match = _BOOKING_NAME.search(query)
+        name = None
+        if name_match:
+            words = []
+            for word in name_match.group(1).split():
+                if word in _NAME_STOP_WORDS:
+                    break
+                words.append(word)
+            name = ' '.join(words) or None
+        name = name or (self.context['guest_name'] or '').lower() or None
+        day = self._parse_date(query)
+        email = _EMAIL_ADDRESS.search(query)
+        phone = _PHONE_NUMBER.search(_ISO_DATE.sub(' ', _EMAIL_ADDRESS.sub(' ', query)))
+        email = email.group() if email else None
+        phone = phone.group() if phone else None
+        
+        if not day or not (name or phone or email):
+            message = "Of course - I can look your reservation up without the booking ID.\n\n"
+            message += "Could you tell me:\n"
+            if not name:
+                message += "👤 The name the booking is under\n"
+            if not day:
+                message += "📅 The date of your reservation\n"
+            message += "📞 And the phone number or email you booked with, so I can share the booking ID\n\n"
+            message += "For example: *\"under the name Maria Garcia on 2025-12-18, phone +1 555 0100\"*"
+            return AgentResponse(action="booking_lookup", message=message, data=None)
+        
+        try:
+            matches = booking_search.search_bookings(name=name, phone=phone, email=email,
+                                                     date_from=day, date_to=day, limit=5)
+        except ValueError:
+            matches = []
+        matches = [booking for booking in matches if booking['score'] >= MIN_LOOKUP_SCORE]
+        
+        digits = booking_search.normalize_phone(phone)
+        verified = [
+            booking for booking in matches
+            if (digits and booking_search.normalize_phone(booking['phone']).endswith(digits[-7:]))
+            or (email and (booking['email'] or '').lower() == email.lower())
+        ]
+        if verified:
+            return self._get_booking_details(verified[0]['id'])
+        
+        shown_name = (name or 'that name').title()
+        if matches and not (phone or email):
+            message = f"Good news - I can see a reservation under {shown_name} on {day}! 🎉\n\n"
+            message += "To keep our guests' bookings private, I can only share the details and booking ID "
+            message += "once you confirm the phone number or email address it was made with. "
+            message += "Could you tell me one of those?"
+            return AgentResponse(action="booking_lookup_verify", message=message, data={'matches': len(matches)})
+        
+        message = f"I'm sorry, I couldn't find a reservation matching {shown_name} on {day}.\n\n"
+        message += "It might be under a different name or date, or booked with other contact details. "
+        message += "Could you double-check those for me? "
+        message += f"You're also welcome to call us at {self.restaurant['phone']} and our team will find it for you."
+        return AgentResponse(action="booking_not_found", message=message, data=None)
+    
+    @metrics.timed('agent_handler_seconds', handler='cancellation_request')
+    def _handle_cancellation_request(self, query: str) -> AgentResponse:
+        """Confirm which booking to cancel before anything is changed"""
+        booking_id_match = _BOOKING_ID.search(query)
+        if not booking_id_match:
+            message = "I'm sorry your plans have changed - I can help with that.\n\n"
+            message += "Could you share the Booking ID from your confirmation email (it looks like *BK123456*)? "
+            message += "I'll pull up the reservation so we can cancel the right one."
+            return AgentResponse(
+                action="cancellation_request",
+                message=message,
+                data=None
+            )
+        
+        booking_id = booking_id_match.group().upper()
+        booking = get_booking(booking_id)
+        if not booking:
+            return self._get_booking_details(booking_id)
+        
+        if booking['status'] == 'cancelled':
+            message = f"Booking #{booking_id} is already cancelled, so there's nothing more to do. "
+            message += "Whenever you're ready, I'd be happy to help you find a new table!"
+            return AgentResponse(
+                action="booking_found",
+                message=message,
+                data=booking
+            )
+        
+        message = f"I've found booking #{booking_id} for {booking['customer']} on {booking['date']} at {booking['time']} "
+        message += f"({booking['guests']} guests).\n\n"
+        message += "Shall I go ahead and cancel it? We'd be sorry to miss you - "
+        message += "if a different date or time would work better, I can help you rebook instead."
+        return AgentResponse(
+            action="cancellation_request",
+            message=message,
+            data=booking,
+            needs_confirmation=True
+        )
+    
+    @metrics.timed('agent_handler_seconds', handler='hours_inquiry')
     def _handle_hours_inquiry(self) -> AgentResponse:
         """Provide hours with inviting tone"""
         message = "I'm so glad you asked! We're open and ready to serve you:\n\n"
         message += "**🕐 Our Hours:**\n"
-        message += "• Monday - Thursday: 11:00 AM - 10:00 PM\n"
-        message += "• Friday - Saturday: 11:00 AM - 11:00 PM *(Perfect for weekend celebrations!)*\n"
-        message += "• Sunday: 12:00 PM - 9:00 PM *(Lovely for family brunch)*\n\n"
-        message += "📍 **Location:** 123 Restaurant Street, Food City\n"
-        message += "📞 **Phone:** +1 (555) 123-4567\n\n"
+        for days, hours in self.restaurant['hours'].items():
+            message += f"• {_HOURS_LABELS.get(days, days.replace('_', ' - ').title())}: {hours}{_HOURS_NOTES.get(days, '')}\n"
+        message += "\n"
+        message += f"📍 **Location:** {self.restaurant['location']}\n"
+        message += f"📞 **Phone:** {self.restaurant['phone']}\n\n"
         message += "We're especially lively during our happy hour (4-6 PM, weekdays) where our bar menu shines!\n\n"
         message += "Would you like to make a reservation, or can I help you with anything else?"
         
@@ -354,6 +680,7 @@ class GastroGuideAgent:
             data=None
         )
     
+    @metrics.timed('agent_handler_seconds', handler='complaint')
     def _handle_complaint(self, query: str) -> AgentResponse:
         """Handle complaints with empathy and solutions"""
         message = "I'm truly sorry to hear you're experiencing an issue. Your satisfaction means everything to us, and I want to make this right immediately.\n\n"
@@ -373,6 +700,24 @@ class GastroGuideAgent:
             data={'escalate': True}
         )
     
+    @metrics.timed('agent_handler_seconds', handler='order_status')
+    def _handle_order_status(self, order_id: str) -> AgentResponse:
+        """Tell the guest where their food order is in the kitchen queue"""
+        order = orders.get_order(order_id)
+        if not order:
+            message = f"I couldn't find order #{order_id}. Could you double-check the number on your confirmation? "
+            message += f"Our team is also happy to help at {self.restaurant['phone']}."
+            return AgentResponse(action="order_not_found", message=message, data=None)
+        
+        self.context['current_order'] = order['items']
+        dishes = ', '.join(f"{item['quantity']} x {item['name']}" for item in order['items'])
+        message = f"Your order #{order_id} ({dishes}) {_ORDER_STATUS_LINES.get(order['status'], order['status'])}. "
+        message += f"Total: ${order['total']:.2f}."
+        if order['status'] in ('received', 'preparing'):
+            message += " I'll make sure it's worth the wait! 🍽️"
+        return AgentResponse(action="order_status", message=message, data=order)
+    
+    @metrics.timed('agent_handler_seconds', handler='gratitude')
     def _handle_gratitude(self) -> AgentResponse:
         """Respond warmly to thanks"""
         responses = [
@@ -381,7 +726,6 @@ class GastroGuideAgent:
             "The pleasure is all mine! That's what I'm here for.",
         ]
         
-        import random
         base_message = random.choice(responses)
         
         message = f"{base_message}\n\n"
@@ -398,6 +742,7 @@ class GastroGuideAgent:
             data=None
         )
     
+    @metrics.timed('agent_handler_seconds', handler='general_query')
     def _handle_general_query(self) -> AgentResponse:
         """Handle unclear queries with helpful guidance"""
         message = "I want to make sure I give you exactly the information you need!\n\n"
@@ -0,0 +1,298 @@
+"""
+Booking analytics for the admin dashboard
+
+Covers per hour, cancellation and no-show rates, party sizes and a
+weekday x hour heatmap over a date range. Bookings (live and archived) are
+loaded once into columnar NumPy arrays sorted by day:
+
+    day     int32  days since 1970-01-01
+    minute  int16  minutes past midnight
+    guests  int16
+    status  int8   STATUS_CODES
+
+A date range is then two binary searches into `day`, and every aggregate is
+an np.bincount over the slice, so a query over millions of bookings costs a
+few milliseconds instead of a SQL GROUP BY per chart. Results are cached per
+date range until the columns are reloaded.
+
+The archive is reloaded only when its file changes (archive.py). Live
+bookings are read from the replica (replica.py) when there is one, so the
+load never holds up booking writes, and reloaded when a new copy lands;
+otherwise from the database when the bookings stamp changes (see
+database.bump_bookings_version). Either way at most every
+ANALYTICS_REFRESH_SECONDS, so a busy service isn't reloading on every
+booking; each response carries the time its data was current (`as_of`).
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+import database
+import replica
+
+ANALYTICS_REFRESH_SECONDS = float(os.getenv('ANALYTICS_REFRESH_SECONDS', '60'))
+DEFAULT_RANGE_DAYS = 90
+# Cached results across date ranges and locations
+RESULT_CACHE_SIZE = 128
+# Parties of this size or more share the last bucket
+MAX_PARTY = 20
+LOAD_CHUNK_ROWS = 65536
+
+STATUS_CODES = {status: code for code, status in enumerate(database.BOOKING_STATUSES)}
+STATUS_OTHER = len(STATUS_CODES)
+WEEKDAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+
+_EPOCH = date(1970, 1, 1)
+# One row per booking with a valid date; day is julianday() - julianday('1970-01-01').
+# SQLite columns take any type, so time and guests are cast (non-numeric -> 0,
+# NULL -> 0) and guests clamped to int16 before NumPy sees them
+_COLUMNS_SQL = f"""
+    SELECT CAST(julianday(date) - 2440587.5 AS INTEGER),
+           IFNULL(CAST(substr(time, 1, 2) AS INTEGER) * 60 + CAST(substr(time, 4, 2) AS INTEGER), 0),
+           MAX(0, MIN(IFNULL(CAST(guests AS INTEGER), 0), 32767)),
+           CASE status {' '.join(f"WHEN '{name}' THEN {code}" for name, code in STATUS_CODES.items())}
+                ELSE {STATUS_OTHER} END
+    FROM bookings
+    WHERE julianday(date) IS NOT NULL
+"""
+
+
+@dataclass
+class BookingColumns:
+    day: np.ndarray
+    minute: np.ndarray
+    guests: np.ndarray
+    status: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.day)
+
+    def between(self, first: int, last: int) -> 'BookingColumns':
+        """Bookings dated first..last (inclusive), as views"""
+        lo, hi = np.searchsorted(self.day, [first, last + 1])
+        return BookingColumns(self.day[lo:hi], self.minute[lo:hi], self.guests[lo:hi], self.status[lo:hi])
+
+
+@dataclass
+class Snapshot:
+    live: BookingColumns
+    archive: BookingColumns
+    live_stamp: object
+    archive_stamp: object
+    loaded_at: float
+    generation: int
+
+
+_snapshots: Dict[str, Snapshot] = {}
+_results: 'OrderedDict[Tuple, Dict]' = OrderedDict()
+_generation = 0
+_lock = threading.Lock()
+
+
+def load_columns(conn: sqlite3.Connection) -> BookingColumns:
+    """Read every booking in conn into BookingColumns, sorted by day"""
+    chunks = []
+    cursor = conn.cursor()
+    cursor.row_factory = None  # plain tuples, whatever the connection uses
+    try:
+        cursor.execute(_COLUMNS_SQL)
+    except sqlite3.OperationalError:
+        cursor = None  # archive created but not yet populated
+    while cursor is not None:
+        rows = cursor.fetchmany(LOAD_CHUNK_ROWS)
+        if not rows:
+            break
+        chunks.append(np.array(rows, dtype=np.int32))
+    table = np.concatenate(chunks) if chunks else np.empty((0, 4), dtype=np.int32)
+
+    order = np.argsort(table[:, 0], kind='stable')
+    table = table[order]
+    return BookingColumns(
+        day=np.ascontiguousarray(table[:, 0]),
+        minute=np.clip(table[:, 1], 0, 24 * 60 - 1).astype(np.int16),
+        guests=table[:, 2].astype(np.int16),
+        status=table[:, 3].astype(np.int8),
+    )
+
+
+def _file_stamp(path: str):
+    """Changes whenever SQLite writes to the database (main file or WAL)"""
+    stamp = []
+    for name in (path, f"{path}-wal"):
+        try:
+            st = os.stat(name)
+            stamp.append((st.st_ino, st.st_size, st.st_mtime_ns))
+        except FileNotFoundError:
+            stamp.append(None)
+    return tuple(stamp)
+
+
+def _load_archive(path: str) -> BookingColumns:
+    # No archive yet: load_columns() finds no bookings table and returns no rows
+    conn = sqlite3.connect(path if os.path.exists(path) else ':memory:')
+    try:
+        return load_columns(conn)
+    finally:
+        conn.close()
+
+
+def snapshot() -> Snapshot:
+    """The current location's bookings as columns, reloading them if stale"""
+    global _generation
+    path = database.current_database_path()
+    archive_path = database.current_archive_path()
+    data_age = replica.age()
+    if data_age is None:
+        live_stamp = database.bookings_stamp()
+    else:
+        live_stamp = ('replica', _file_stamp(replica.replica_path(path)))
+    archive_stamp = _file_stamp(archive_path)
+
+    with _lock:
+        current = _snapshots.get(path)
+        if current is not None and current.archive_stamp == archive_stamp and (
+                current.live_stamp == live_stamp
+                or time.time() - current.loaded_at < ANALYTICS_REFRESH_SECONDS):
+            return current
+
+        # Archiving moves rows out of the live table, so both halves reload together
+        if current is not None and current.archive_stamp == archive_stamp:
+            archive = current.archive
+        else:
+            archive = _load_archive(archive_path)
+        conn, data_age = replica.connect()
+        loaded_at = time.time() - data_age
+        try:
+            live = load_columns(conn)
+        finally:
+            conn.close()
+
+        _generation += 1
+        current = Snapshot(live, archive, live_stamp, archive_stamp, loaded_at, _generation)
+        _snapshots[path] = current
+        return current
+
+
+def data_age() -> float:
+    """Seconds since the current location's loaded bookings were current"""
+    snap = _snapshots.get(database.current_database_path())
+    return max(0.0, time.time() - snap.loaded_at) if snap else 0.0
+
+
+def parse_range(start: Optional[str], end: Optional[str]) -> Tuple[date, date]:
+    """
+    The date range for ?from=&to= (YYYY-MM-DD, inclusive)
+
+    Defaults to the DEFAULT_RANGE_DAYS days ending today. Raises ValueError
+    for malformed or reversed dates.
+    """
+    try:
+        last = date.fromisoformat(end) if end else date.today()
+        first = date.fromisoformat(start) if start else last - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+    except ValueError:
+        raise ValueError('Dates must be YYYY-MM-DD')
+    if first > last:
+        raise ValueError("'from' must not be after 'to'")
+    return first, last
+
+
+def get_analytics(first: date, last: date) -> Dict:
+    """Aggregates for bookings dated first..last (inclusive), cached per range"""
+    snap = snapshot()
+    key = (database.current_database_path(), snap.generation, first, last)
+    with _lock:
+        result = _results.get(key)
+        if result is not None:
+            _results.move_to_end(key)
+            return result
+
+    result = summarize(snap, first, last)
+    with _lock:
+        _results[key] = result
+        while len(_results) > RESULT_CACHE_SIZE:
+            _results.popitem(last=False)
+    return result
+
+
+def _counts(cols: BookingColumns) -> Dict[str, np.ndarray]:
+    """Additive aggregates for one set of columns, so live and archive can be summed"""
+    hour = cols.minute // 60
+    weekday = (cols.day + 3) % 7  # 1970-01-01 was a Thursday; Monday = 0
+    covers = cols.guests * (cols.status == STATUS_CODES['confirmed'])
+    return {
+        'status': np.bincount(cols.status, minlength=STATUS_OTHER + 1),
+        'weekday_status': np.bincount(weekday * (STATUS_OTHER + 1) + cols.status,
+                                      minlength=7 * (STATUS_OTHER + 1)),
+        'heatmap': np.bincount(weekday * 24 + hour, weights=covers, minlength=7 * 24),
+        'party': np.bincount(np.minimum(cols.guests, MAX_PARTY), minlength=MAX_PARTY + 1),
+    }
+
+
+def _rate(count, total) -> float:
+    return round(float(count) / float(total), 4) if total else 0.0
+
+
+def summarize(snap: Snapshot, first: date, last: date) -> Dict:
+    """Compute the analytics payload for first..last from a snapshot"""
+    first_day, last_day = (first - _EPOCH).days, (last - _EPOCH).days
+    parts = [_counts(cols.between(first_day, last_day)) for cols in (snap.archive, snap.live)]
+    totals = {name: sum(part[name] for part in parts) for name in parts[0]}
+
+    status = totals['status']
+    booked = int(status.sum())
+    confirmed, cancelled, no_shows = (int(status[code]) for code in STATUS_CODES.values())
+    heatmap = totals['heatmap'].reshape(7, 24).astype(np.int64)
+    by_weekday = totals['weekday_status'].reshape(7, STATUS_OTHER + 1)
+    days = last_day - first_day + 1
+    covers_by_hour = heatmap.sum(axis=0)
+    # How many of each weekday the range spans, for per-day averages
+    weekday_days = np.bincount((np.arange(first_day, last_day + 1) + 3) % 7, minlength=7).tolist()
+
+    party = totals['party']
+    party_sizes = {str(size): int(party[size]) for size in range(1, MAX_PARTY) if party[size]}
+    if party[MAX_PARTY]:
+        party_sizes[f'{MAX_PARTY}+'] = int(party[MAX_PARTY])
+    parties = int(party[1:].sum())
+    seated = int((party[1:] * np.arange(1, MAX_PARTY + 1)).sum())
+
+    return {
+        'range': {'from': first.isoformat(), 'to': last.isoformat(), 'days': days},
+        'as_of': datetime.fromtimestamp(snap.loaded_at, timezone.utc).isoformat(timespec='seconds'),
+        'bookings': booked,
+        'confirmed': confirmed,
+        'cancelled': cancelled,
+        'no_shows': no_shows,
+        'cancellation_rate': _rate(cancelled, booked),
+        # Of the bookings that were still expected to turn up
+        'no_show_rate': _rate(no_shows, confirmed + no_shows),
+        'covers': int(heatmap.sum()),
+        'covers_by_hour': {
+            f'{hour:02d}:00': {'total': int(covers_by_hour[hour]),
+                               'avg_per_day': round(float(covers_by_hour[hour]) / days, 2)}
+            for hour in range(24) if covers_by_hour[hour]
+        },
+        'party_sizes': party_sizes,
+        'avg_party_size': round(seated / parties, 2) if parties else 0.0,
+        'weekdays': [
+            {
+                'day': name,
+                'bookings': int(by_weekday[i].sum()),
+                'covers': int(heatmap[i].sum()),
+                'avg_covers': round(int(heatmap[i].sum()) / weekday_days[i], 1) if weekday_days[i] else 0.0,
+                'cancellation_rate': _rate(by_weekday[i, STATUS_CODES['cancelled']], by_weekday[i].sum()),
+                'no_show_rate': _rate(by_weekday[i, STATUS_CODES['no-show']],
+                                      by_weekday[i, STATUS_CODES['confirmed']] + by_weekday[i, STATUS_CODES['no-show']]),
+            }
+            for i, name in enumerate(WEEKDAYS)
+        ],
+        # Confirmed covers, rows Monday..Sunday, columns 00:00..23:00
+        'heatmap': {'weekdays': WEEKDAYS, 'hours': list(range(24)), 'covers': heatmap.tolist()},
+    }
@@ -1,72 +1,257 @@
 #!/usr/bin/env python3
 """
 Flask Web Application for Restaurant with AI Agent
+
+The app is built by create_app(). Nothing expensive happens at import time:
+the AI agent, the database schema and the email service are initialized on
+first use inside each worker, so the module is safe to load with
+`gunicorn --preload` and share between forked workers copy-on-write.
 """
 
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Blueprint, Response, current_app, g, request, send_from_directory
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
+import hmac
+import io
 import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+import booking_search
+import bulk
+import database
+import idempotency
+import menu_render
+import metrics
+import orders
+import profiling
+import rate_limit
+import replica
+import tenants
+import waitlist
 from agent import RestaurantAssistantAgent
-from database import init_database, get_booking, create_booking, delete_booking, get_all_menu_items
+from database import (ensure_database, get_booking, create_booking, create_booking_group,
+                      get_booking_group, delete_booking, get_all_menu_items)
+from image_pipeline import get_responsive_images
+from serialization import ConnectionStream, accepts_gzip, json_response, json_rows, stream_json_response
+
+DEFAULT_CONFIG = {
+    'DATABASE_PATH': os.getenv('DATABASE_PATH', database.DATABASE_PATH),
+    # Where archive.py moves old bookings (default: <database>-archive.db)
+    'ARCHIVE_DATABASE_PATH': os.getenv('ARCHIVE_DATABASE_PATH', ''),
+    # Shared secret for admin-only features such as on-demand profiling
+    'ADMIN_TOKEN': os.getenv('ADMIN_TOKEN', ''),
+    'PROFILE_ENABLED': os.getenv('PROFILE_ENABLED', '').lower() in ('1', 'true', 'yes'),
+    'PROFILE_DIR': os.getenv('PROFILE_DIR', 'profiles'),
+    # Profile 1 in N requests in the background (0 disables sampling)
+    'PROFILE_SAMPLE_RATE': int(os.getenv('PROFILE_SAMPLE_RATE', '0')),
+    # Reverse proxies in front of the app; their X-Forwarded-For is trusted
+    'PROXY_COUNT': int(os.getenv('PROXY_COUNT', '0')),
+    'RATE_LIMIT_ENABLED': os.getenv('RATE_LIMIT_ENABLED', '1').lower() in ('1', 'true', 'yes'),
+    'RATE_LIMIT_DB': os.getenv('RATE_LIMIT_DB', 'ratelimit.db'),
+    # Concurrent /api/chat requests across all workers on this host
+    'CHAT_MAX_CONCURRENCY': int(os.getenv('CHAT_MAX_CONCURRENCY', '8')),
+    # Stored responses for retried booking writes (see idempotency.py)
+    'IDEMPOTENCY_DB': os.getenv('IDEMPOTENCY_DB', 'idempotency.db'),
+    # Locations served by this deployment (see tenants.py); missing = one location
+    'TENANTS_FILE': tenants.TENANTS_FILE,
+    # Admin listing, exports and analytics read a periodic copy (see replica.py)
+    'REPLICA_ENABLED': replica.ENABLED,
+    'REPLICA_REFRESH_SECONDS': replica.REFRESH_SECONDS,
+}
+
+# Details of the default location (each location's are in tenants.json)
+RESTAURANT_INFO = tenants.DEFAULT_INFO
+
+bp = Blueprint('restaurant', __name__)
+
+_agent_lock = threading.Lock()
+
+
+def create_app(config: Optional[Dict] = None) -> Flask:
+    """
+    Create and configure the Flask application
+
+    Args:
+        config: Overrides for DEFAULT_CONFIG (e.g. DATABASE_PATH)
+
+    Returns:
+        Configured Flask app; the agent and database are set up lazily
+    """
+    app = Flask(__name__, static_folder='static', static_url_path='')
+    app.config.update(DEFAULT_CONFIG)
+    if config:
+        app.config.update(config)
+
+    CORS(app)  # Enable CORS for all routes
+    registry = tenants.load_tenants(app.config['TENANTS_FILE'], app.config['DATABASE_PATH'])
+    app.extensions['tenants'] = registry
+    app.wsgi_app = tenants.TenantMiddleware(app.wsgi_app, registry)
+    if app.config['PROXY_COUNT']:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_COUNT'])
+    database.configure(registry.default.database_path, app.config['ARCHIVE_DATABASE_PATH'] or None)
+    database.set_timezones({tenant.database_path: tenant.timezone for tenant in registry})
+    replica.configure(app.config['REPLICA_ENABLED'], app.config['REPLICA_REFRESH_SECONDS'])
+    app.register_blueprint(bp)
+    profiling.init_app(app)
+    rate_limit.init_app(app)
+    idempotency.init_app(app)
+    return app
+
+
+def get_agent():
+    """Get this worker's AI agent for the request's location, creating it on first use"""
+    agents = current_app.extensions.setdefault('ai_agents', {})
+    agent = agents.get(g.tenant.slug)
+    if agent is None:
+        with _agent_lock:
+            agent = agents.get(g.tenant.slug)
+            if agent is None:
+                agent = RestaurantAssistantAgent(g.tenant.info)
+                agents[g.tenant.slug] = agent
+    return agent
+
 
-app = Flask(__name__, static_folder='static', static_url_path='')
-CORS(app)  # Enable CORS for all routes
+@bp.before_app_request
+def _select_tenant():
+    """Serve this request from its location's database (routed by TenantMiddleware)"""
+    g.tenant = request.environ.get(tenants.ENVIRON_KEY) or current_app.extensions['tenants'].default
+    g.database_token = database.use_database(g.tenant.database_path)
 
-# Initialize AI Agent
-ai_agent = RestaurantAssistantAgent()
+@bp.teardown_app_request
+def _release_tenant(error=None):
+    if 'database_token' in g:
+        database.reset_database(g.database_token)
 
-# Initialize database on first run
-if not os.path.exists('restaurant.db'):
-    init_database()
+@bp.before_app_request
+def _ensure_database():
+    """Create the database on the first request handled by this worker"""
+    ensure_database()
+
+@bp.before_app_request
+def _start_request_timer():
+    g.request_started = time.perf_counter()
+    metrics.inc('http_requests_in_flight')
+
+@bp.after_app_request
+def _record_request_latency(response):
+    _observe_request(response.status_code)
+    return response
+
+@bp.teardown_app_request
+def _finish_request(error=None):
+    # Unhandled exceptions skip after_request, so record them here
+    if error is not None:
+        _observe_request(500)
+    if 'request_started' in g:
+        metrics.inc('http_requests_in_flight', -1)
+
+def _observe_request(status: int):
+    if 'request_started' not in g or g.get('request_observed'):
+        return
+    g.request_observed = True
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    metrics.observe(
+        'http_request_duration_seconds',
+        time.perf_counter() - g.request_started,
+        (('method', request.method), ('route', route), ('status', str(status)))
+    )
+
+@bp.route('/metrics')
+def prometheus_metrics():
+    """Prometheus metrics for this worker"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 # Serve frontend
-@app.route('/')
+@bp.route('/')
 def index():
     return send_from_directory('static', 'index.html')
 
-@app.route('/<path:path>')
+@bp.route('/menu.html')
+def menu_page():
+    """The menu page with this location's menu rendered in (see menu_render.py)"""
+    try:
+        page = menu_render.render_page(g.tenant.slug, g.tenant.cached_menu(_load_menu))
+    except Exception as e:
+        # The static page loads the menu itself
+        print(f"Warning: Could not prerender the menu page: {e}")
+        return send_from_directory('static', 'menu.html')
+
+    response = Response(mimetype='text/html')
+    response.vary.add('Accept-Encoding')
+    if accepts_gzip():
+        response.set_data(page.gzipped)
+        response.headers['Content-Encoding'] = 'gzip'
+        response.set_etag(page.etag + '-gz')
+    else:
+        response.set_data(page.body)
+        response.set_etag(page.etag)
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+@bp.route('/<path:path>')
 def serve_static(path):
     return send_from_directory('static', path)
 
 # API Routes
 
-@app.route('/api/menu', methods=['GET'])
+@bp.route('/api/menu', methods=['GET'])
 def get_menu():
     """Get all menu items"""
     try:
-        items = get_all_menu_items()
-        return jsonify({
-            'success': True,
-            'menu': items
-        })
+        return json_response(g.tenant.cached_menu(_load_menu))
     except Exception as e:
-        return jsonify({
+        return json_response({
             'success': False,
             'error': str(e)
-        }), 500
+        }, 500)
+
+def _load_menu() -> Dict:
+    items = get_all_menu_items()
+    return {
+        'success': True,
+        'menu': items,
+        'images': get_responsive_images([item['image'] for item in items if item['image']])
+    }
 
-@app.route('/api/bookings/<booking_id>', methods=['GET'])
+@bp.route('/api/bookings/<booking_id>', methods=['GET'])
 def get_booking_details(booking_id):
     """Get booking by ID"""
     try:
         booking = get_booking(booking_id)
         if booking:
-            return jsonify({
+            response = json_response({
                 'success': True,
                 'booking': booking
             })
+            # Clients may keep the booking but must revalidate it each time
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            response.set_etag(f"{booking['id']}-{booking.get('version', 1)}", weak=True)
+            response.last_modified = _parse_timestamp(booking.get('updated_at') or booking.get('created_at'))
+            return response.make_conditional(request)
         else:
-            return jsonify({
+            return json_response({
                 'success': False,
                 'error': 'Booking not found'
-            }), 404
+            }, 404)
     except Exception as e:
-        return jsonify({
+        return json_response({
             'success': False,
             'error': str(e)
-        }), 500
+        }, 500)
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    """SQLite CURRENT_TIMESTAMP text (UTC) to a datetime, or None"""
+    try:
+        return datetime.strptime(value, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+    except (TypeError, ValueError):
+        return None
 
-@app.route('/api/bookings', methods=['POST'])
+@bp.route('/api/bookings', methods=['POST'])
+@idempotency.idempotent
+@rate_limit.rate_limited('booking_write')
 def create_new_booking():
     """Create new booking"""
     try:
@@ -76,69 +261,532 @@ def create_new_booking():
         required_fields = ['customer', 'date', 'time', 'guests']
         for field in required_fields:
             if field not in data:
-                return jsonify({
+                return json_response({
                     'success': False,
                     'error': f'Missing required field: {field}'
-                }), 400
+                }, 400)
         
         booking = create_booking(data)
-        return jsonify({
+        return json_response({
             'success': True,
             'booking': booking,
             'message': 'Booking created successfully'
         })
+    except ValueError as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, 400)
+    except Exception as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, 500)
+
+@bp.route('/api/bookings/group', methods=['POST'])
+@idempotency.idempotent
+@rate_limit.rate_limited('booking_write')
+def create_group_booking():
+    """Create several linked bookings in one transaction, with one confirmation email"""
+    try:
+        data = request.get_json()
+        if not isinstance(data, dict):
+            return json_response({
+                'success': False,
+                'error': 'Expected a JSON object'
+            }, 400)
+        group = create_booking_group(data)
+        return json_response({
+            'success': True,
+            'group': group,
+            'message': f"{len(group['bookings'])} bookings created successfully"
+        })
+    except ValueError as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, 400)
+    except Exception as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, 500)
+
+@bp.route('/api/bookings/group/<group_id>', methods=['GET'])
+def get_group_booking(group_id):
+    """Get all bookings in a group"""
+    try:
+        group = get_booking_group(group_id)
+        if group:
+            return json_response({
+                'success': True,
+                'group': group
+            })
+        return json_response({
+            'success': False,
+            'error': 'Group not found'
+        }, 404)
     except Exception as e:
-        return jsonify({
+        return json_response({
             'success': False,
             'error': str(e)
-        }), 500
+        }, 500)
 
-@app.route('/api/admin/bookings', methods=['GET'])
+@bp.route('/api/admin/bookings', methods=['GET'])
 def get_all_bookings():
-    """Get all bookings for admin dashboard"""
-    try:
-        from database import get_db_connection
-        conn = get_db_connection()
-        bookings = conn.execute(
-            'SELECT * FROM bookings ORDER BY created_at DESC'
-        ).fetchall()
-        conn.close()
-        
-        bookings_list = [dict(booking) for booking in bookings]
-        
-        return jsonify({
+    """Get all bookings for admin dashboard (streamed from the read replica)"""
+    try:
+        conn, data_age = replica.connect()
+        stats = {}
+        with ConnectionStream(conn) as rows:
+            rows.chunks = json_rows(conn, database.table_columns(conn, 'bookings'),
+                                    'FROM bookings ORDER BY created_at DESC', stats=stats)
+    except Exception as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, 500)
+    
+    def generate():
+        yield b'{"success":true,"bookings":['
+        yield from rows
+        yield b'],"count":%d}' % stats['count']
+    
+    return stream_json_response(generate(), headers=replica.age_header(data_age), on_close=rows.close)
+
+def _is_admin() -> bool:
+    """True if the request carries the configured ADMIN_TOKEN"""
+    admin_token = current_app.config.get('ADMIN_TOKEN') or ''
+    token = request.headers.get('X-Admin-Token', '')
+    return bool(admin_token) and hmac.compare_digest(token.encode(), admin_token.encode())
+
+@bp.route('/api/admin/bookings/search', methods=['GET'])
+def search_bookings():
+    """Fuzzy lookup by guest name, phone or email (?q=&date=&from=&to=&limit=)"""
+    if not _is_admin():
+        return json_response({
+            'success': False,
+            'error': 'Admin token required'
+        }, 403)
+    
+    try:
+        bookings = booking_search.search_bookings(**booking_search.search_request(request.args))
+        return json_response({
             'success': True,
-            'bookings': bookings_list,
-            'count': len(bookings_list)
+            'bookings': bookings,
+            'count': len(bookings)
         })
+    except ValueError as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, 400)
     except Exception as e:
-        return jsonify({
+        return json_response({
             'success': False,
             'error': str(e)
-        }), 500
+        }, 500)
 
-@app.route('/api/bookings/<booking_id>', methods=['DELETE'])
+@bp.route('/api/admin/bookings/export', methods=['GET'])
+def export_bookings():
+    """Stream all bookings as CSV or NDJSON (?format=csv|ndjson)"""
+    if not _is_admin():
+        return json_response({
+            'success': False,
+            'error': 'Admin token required'
+        }, 403)
+    
+    fmt = request.args.get('format', 'csv')
+    if fmt not in bulk.FORMATS:
+        return json_response({
+            'success': False,
+            'error': f"Unsupported format '{fmt}', use csv or ndjson"
+        }, 400)
+    try:
+        conn, data_age = replica.connect()
+        chunks = bulk.export_bookings(fmt, conn)
+    except Exception as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, 500)
+    return stream_json_response(chunks, mimetype=bulk.MIMETYPES[fmt], headers=dict(
+        replica.age_header(data_age), **{'Content-Disposition': f'attachment; filename="bookings.{fmt}"'}
+    ), on_close=chunks.close)
+
+@bp.route('/api/admin/bookings/import', methods=['POST'])
+def import_bookings():
+    """Bulk-load bookings from a CSV or NDJSON upload (requires X-Admin-Token)"""
+    if not _is_admin():
+        return json_response({
+            'success': False,
+            'error': 'Admin token required'
+        }, 403)
+    
+    upload = request.files.get('file')
+    fmt = request.args.get('format') or (bulk.format_from_name(upload.filename) if upload else None)
+    if fmt is None:
+        fmt = 'ndjson' if 'ndjson' in (request.mimetype or '') else 'csv'
+    if fmt not in bulk.FORMATS:
+        return json_response({
+            'success': False,
+            'error': f"Unsupported format '{fmt}', use csv or ndjson"
+        }, 400)
+    
+    try:
+        raw = upload.stream if upload else request.stream
+        stats = bulk.import_bookings(io.TextIOWrapper(raw, encoding='utf-8', newline=''), fmt)
+        return json_response(dict(stats, success=True))
+    except Exception as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, 500)
+
+@bp.route('/api/admin/bookings/<booking_id>/no-show', methods=['POST'])
+def mark_booking_no_show(booking_id):
+    """Record that a confirmed booking's party never arrived (requires X-Admin-Token)"""
+    if not _is_admin():
+        return json_response({
+            'success': False,
+            'error': 'Admin token required'
+        }, 403)
+    
+    try:
+        if database.mark_no_show(booking_id):
+            return json_response({
+                'success': True,
+                'message': f'Booking {booking_id} marked as a no-show'
+            })
+        return json_response({
+            'success': False,
+            'error': 'Booking not found or not confirmed'
+        }, 404)
+    except Exception as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, 500)
+
+@bp.route('/api/admin/analytics', methods=['GET'])
+def get_analytics():
+    """Covers, cancellation/no-show rates and demand heatmaps (?from=&to=, YYYY-MM-DD)"""
+    if not _is_admin():
+        return json_response({
+            'success': False,
+            'error': 'Admin token required'
+        }, 403)
+    
+    # Imported here so NumPy isn't loaded at startup
+    import analytics
+    try:
+        first, last = analytics.parse_range(request.args.get('from'), request.args.get('to'))
+    except ValueError as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, 400)
+    
+    try:
+        result = analytics.get_analytics(first, last)
+        response = json_response(dict(result, success=True))
+        response.headers.update(replica.age_header(analytics.data_age()))
+        return response
+    except Exception as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, 500)
+
+@bp.route('/api/bookings/<booking_id>', methods=['DELETE'])
+@idempotency.idempotent
+@rate_limit.rate_limited('booking_write')
 def cancel_booking(booking_id):
     """Cancel booking"""
     try:
         success = delete_booking(booking_id)
         if success:
-            return jsonify({
+            return json_response({
                 'success': True,
                 'message': f'Booking {booking_id} cancelled successfully'
             })
         else:
-            return jsonify({
+            return json_response({
                 'success': False,
                 'error': 'Booking not found'
-            }), 404
+            }, 404)
     except Exception as e:
-        return jsonify({
+        return json_response({
             'success': False,
             'error': str(e)
-        }), 500
+        }, 500)
 
-@app.route('/api/chat', methods=['POST'])
+@bp.route('/api/orders', methods=['POST'])
+@idempotency.idempotent
+@rate_limit.rate_limited('order_write')
+def create_order():
+    """Place a food order; prices are checked against the menu"""
+    try:
+        data = request.get_json()
+        if not isinstance(data, dict):
+            return json_response({
+                'success': False,
+                'error': 'Expected a JSON object'
+            }, 400)
+        order = orders.place_order(data, g.tenant.cached_menu(_load_menu)['menu'])
+        return json_response({
+            'success': True,
+            'order': order,
+            'message': f"Order {order['id']} sent to the kitchen"
+        })
+    except orders.PriceChanged as e:
+        return json_response({
+            'success': False,
+            'error': str(e),
+            'prices': e.prices
+        }, 409)
+    except ValueError as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, 400)
+    except orders.QueueFull as e:
+        response = json_response({
+            'success': False,
+            'error': str(e)
+        }, 503)
+        response.headers['Retry-After'] = '1'
+        return response
+    except Exception as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, 500)
+
+@bp.route('/api/orders/<order_id>', methods=['GET'])
+def get_order_details(order_id):
+    """Get an order and where it is in the kitchen queue"""
+    try:
+        order = orders.get_order(order_id)
+        if order:
+            return json_response({
+                'success': True,
+                'order': order
+            })
+        return json_response({
+            'success': False,
+            'error': 'Order not found'
+        }, 404)
+    except Exception as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, 500)
+
+@bp.route('/api/kitchen/orders', methods=['GET'])
+def get_kitchen_queue():
+    """Open orders, oldest first (?status=received,preparing to narrow it)"""
+    if not _is_admin():
+        return json_response({
+            'success': False,
+            'error': 'Admin token required'
+        }, 403)
+    
+    try:
+        statuses = [s for s in request.args.get('status', '').split(',') if s]
+        queue = orders.kitchen_queue(statuses)
+        return json_response({
+            'success': True,
+            'orders': queue,
+            'count': len(queue)
+        })
+    except ValueError as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, 400)
+    except Exception as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, 500)
+
+@bp.route('/api/kitchen/orders/<order_id>/status', methods=['POST'])
+def update_order_status(order_id):
+    """Move an order along the kitchen queue (requires X-Admin-Token)"""
+    if not _is_admin():
+        return json_response({
+            'success': False,
+            'error': 'Admin token required'
+        }, 403)
+    
+    try:
+        data = request.get_json(silent=True) or {}
+        if not isinstance(data, dict) or data.get('status') not in orders.STATUSES:
+            return json_response({
+                'success': False,
+                'error': f"status must be one of: {', '.join(orders.STATUSES)}"
+            }, 400)
+        order = orders.update_status(order_id, data['status'])
+        if order:
+            return json_response({
+                'success': True,
+                'order': order
+            })
+        return json_response({
+            'success': False,
+            'error': 'Order not found'
+        }, 404)
+    except ValueError as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, 409)
+    except Exception as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, 500)
+
+@bp.route('/api/waitlist', methods=['POST'])
+@rate_limit.rate_limited('booking_write')
+def join_waitlist():
+    """Join the waitlist for a date, time window and party size"""
+    try:
+        data = request.get_json()
+        if not isinstance(data, dict):
+            return json_response({
+                'success': False,
+                'error': 'Expected a JSON object'
+            }, 400)
+        entry = waitlist.join_waitlist(data)
+        return json_response({
+            'success': True,
+            'entry': entry,
+            'message': f"Added to the waitlist as {entry['id']}"
+        })
+    except ValueError as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, 400)
+    except Exception as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, 500)
+
+def _waitlist_entry_id(entry_id: str):
+    parsed = waitlist.parse_id(entry_id)
+    if parsed is None:
+        raise LookupError('Waitlist entry not found')
+    return parsed
+
+@bp.route('/api/waitlist/<entry_id>', methods=['GET'])
+def get_waitlist_entry(entry_id):
+    """Get a waitlist entry, including any table currently held for it"""
+    try:
+        entry = waitlist.get_entry(_waitlist_entry_id(entry_id))
+        if entry:
+            return json_response({
+                'success': True,
+                'entry': entry
+            })
+        return json_response({
+            'success': False,
+            'error': 'Waitlist entry not found'
+        }, 404)
+    except LookupError as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, 404)
+    except Exception as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, 500)
+
+@bp.route('/api/waitlist/<entry_id>', methods=['DELETE'])
+@rate_limit.rate_limited('booking_write')
+def leave_waitlist(entry_id):
+    """Leave the waitlist (a held table passes to the next guest)"""
+    try:
+        if waitlist.leave_waitlist(_waitlist_entry_id(entry_id)):
+            return json_response({
+                'success': True,
+                'message': f'Removed {entry_id} from the waitlist'
+            })
+        return json_response({
+            'success': False,
+            'error': 'No active waitlist entry with that ID'
+        }, 404)
+    except LookupError as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, 404)
+    except Exception as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, 500)
+
+@bp.route('/api/waitlist/<entry_id>/accept', methods=['POST'])
+@rate_limit.rate_limited('booking_write')
+def accept_waitlist_offer(entry_id):
+    """Book the table being held for a waitlist entry"""
+    try:
+        booking = waitlist.accept_offer(_waitlist_entry_id(entry_id))
+        return json_response({
+            'success': True,
+            'booking': booking,
+            'message': 'Booking created successfully'
+        })
+    except LookupError as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, 404)
+    except ValueError as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, 409)
+    except Exception as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, 500)
+
+@bp.route('/api/waitlist/<entry_id>/decline', methods=['POST'])
+@rate_limit.rate_limited('booking_write')
+def decline_waitlist_offer(entry_id):
+    """Pass on a held table; it is offered to the next guest"""
+    try:
+        if waitlist.decline_offer(_waitlist_entry_id(entry_id)):
+            return json_response({
+                'success': True,
+                'message': 'Offer declined'
+            })
+        return json_response({
+            'success': False,
+            'error': 'No table is on hold for that entry'
+        }, 409)
+    except LookupError as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, 404)
+    except Exception as e:
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, 500)
+
+@bp.route('/api/chat', methods=['POST'])
+@rate_limit.rate_limited('chat')
+@rate_limit.chat_concurrency_limited
 def chat_with_agent():
     """Chat with AI Agent"""
     try:
@@ -147,9 +795,9 @@ def chat_with_agent():
         context = data.get('context', [])
         
         # Process query with AI agent
-        response = ai_agent.process_query(user_message, context)
+        response = get_agent().process_query(user_message, context)
         
-        return jsonify({
+        return json_response({
             'success': True,
             'response': {
                 'action': response.action,
@@ -159,7 +807,7 @@ def chat_with_agent():
             }
         })
     except Exception as e:
-        return jsonify({
+        return json_response({
             'success': False,
             'error': str(e),
             'response': {
@@ -168,27 +816,19 @@ def chat_with_agent():
                 'data': None,
                 'needs_confirmation': False
             }
-        }), 500
+        }, 500)
 
-@app.route('/api/info', methods=['GET'])
+@bp.route('/api/info', methods=['GET'])
 def get_info():
-    """Get restaurant information"""
-    info = {
-        'name': 'Mediterranean Delight',
-        'description': 'Authentic Mediterranean cuisine with a modern twist',
-        'hours': {
-            'monday_thursday': '11:00 AM - 10:00 PM',
-            'friday_saturday': '11:00 AM - 11:00 PM',
-            'sunday': '12:00 PM - 9:00 PM'
-        },
-        'location': '123 Restaurant Street, Food City',
-        'phone': '+1 (555) 123-4567',
-        'email': 'info@mediterraneandelight.com'
-    }
-    return jsonify({
-        'success': True,
-        'info': info
-    })
+    """Get restaurant information for the request's location"""
+    response = Response(g.tenant.info_body, mimetype='application/json')
+    response.set_etag(g.tenant.info_etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = 300
+    return response.make_conditional(request)
+
+# Module-level app for `gunicorn app:app`; cheap to build, see create_app()
+app = create_app()
 
 if __name__ == '__main__':
     print("Starting Restaurant Web Application...")
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Booking archival and hot-table compaction
+
+Moves bookings whose date is older than a horizon out of restaurant.db into
+a separate archive database (restaurant-archive.db by default), then hands
+the freed pages back with incremental vacuuming. Rows move in small
+transactions with a pause in between, so booking writes are never blocked
+for more than one batch. get_booking() falls back to the archive, so
+archived IDs still resolve in the API and the chat agent.
+
+Run it periodically (e.g. nightly cron):
+    python archive.py --days 90
+    python archive.py --enable-incremental-vacuum   # one-off, for databases
+                                                    # created before this job
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+from datetime import date, timedelta
+from typing import Dict, Optional
+
+import database
+
+DEFAULT_HORIZON_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', '90'))
+DEFAULT_BATCH_SIZE = 500
+# Pages released per incremental_vacuum step (4 KiB pages -> 4 MiB)
+VACUUM_STEP_PAGES = 1024
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(database.current_database_path(), timeout=30, isolation_level=None)
+    conn.execute('ATTACH DATABASE ? AS archive', (database.current_archive_path(),))
+    return conn
+
+
+def _ensure_archive_schema(conn: sqlite3.Connection):
+    """Create archive.bookings from the live table's definition, adding new columns"""
+    sql = conn.execute("SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = 'bookings'").fetchone()[0]
+    conn.execute(sql.replace('CREATE TABLE bookings', 'CREATE TABLE IF NOT EXISTS archive.bookings', 1))
+    conn.execute('CREATE INDEX IF NOT EXISTS archive.idx_archive_bookings_date ON bookings(date)')
+
+    archived = {row[1] for row in conn.execute('PRAGMA archive.table_info(bookings)')}
+    for _, name, col_type, _, _, _ in conn.execute('PRAGMA main.table_info(bookings)'):
+        if name not in archived:
+            conn.execute(f'ALTER TABLE archive.bookings ADD COLUMN {name} {col_type}')
+
+
+def archive_batch(conn: sqlite3.Connection, cutoff: str, columns: str, batch_size: int) -> int:
+    """Move up to batch_size bookings dated before cutoff; returns rows moved"""
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        ids = [row[0] for row in conn.execute(
+            'SELECT id FROM main.bookings WHERE date < ? ORDER BY date LIMIT ?', (cutoff, batch_size)
+        )]
+        if ids:
+            placeholders = ', '.join('?' * len(ids))
+            conn.execute(
+                f'INSERT OR REPLACE INTO archive.bookings ({columns}) '
+                f'SELECT {columns} FROM main.bookings WHERE id IN ({placeholders})', ids
+            )
+            conn.execute(f'DELETE FROM main.bookings WHERE id IN ({placeholders})', ids)
+        conn.execute('COMMIT')
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+    return len(ids)
+
+
+def _free_pages(conn: sqlite3.Connection) -> int:
+    return conn.execute('PRAGMA main.freelist_count').fetchone()[0]
+
+
+def vacuum_step(conn: sqlite3.Connection, pages: int = VACUUM_STEP_PAGES) -> int:
+    """Release up to `pages` free pages in one transaction; returns pages freed"""
+    # incremental_vacuum frees one page per result row, but the sqlite3 module
+    # stops stepping a statement that declares no columns after its first row,
+    # so each execute frees a single page. Repeat it, measuring the freelist.
+    cursor = conn.cursor()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        before = remaining = _free_pages(conn)
+        while remaining and before - remaining < pages:
+            cursor.execute(f'PRAGMA main.incremental_vacuum({pages})')
+            now = _free_pages(conn)
+            if now >= remaining:
+                break
+            remaining = now
+        cursor.close()  # resets the pragma statement so COMMIT can run
+        conn.execute('COMMIT')
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+    return before - _free_pages(conn)
+
+
+def incremental_vacuum(conn: sqlite3.Connection, pause: float = 0.0) -> int:
+    """Release free pages back to the filesystem in small steps; returns pages freed"""
+    if conn.execute('PRAGMA main.auto_vacuum').fetchone()[0] != 2:
+        return 0
+    freed = 0
+    while True:
+        step = vacuum_step(conn)
+        freed += step
+        if not step or not _free_pages(conn):
+            return freed
+        time.sleep(pause)
+
+
+def enable_incremental_vacuum():
+    """Switch an existing database to auto_vacuum=INCREMENTAL (rewrites the file once)"""
+    conn = sqlite3.connect(database.current_database_path(), isolation_level=None)
+    conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+    conn.execute('VACUUM')
+    conn.close()
+
+
+def run_archive(horizon_days: int = DEFAULT_HORIZON_DAYS, batch_size: int = DEFAULT_BATCH_SIZE,
+                pause: float = 0.05, today: Optional[date] = None, verbose: bool = True) -> Dict:
+    """
+    Archive bookings dated more than horizon_days ago
+
+    Args:
+        horizon_days: Bookings before today minus this many days are moved
+        batch_size: Rows per transaction
+        pause: Seconds to sleep between batches so writers get the lock
+        today: Reference date (default: today)
+
+    Returns:
+        Dict with rows moved, pages freed and elapsed seconds
+    """
+    started = time.perf_counter()
+    database.ensure_database()
+    cutoff = ((today or date.today()) - timedelta(days=horizon_days)).isoformat()
+
+    conn = _connect()
+    _ensure_archive_schema(conn)
+    columns = ', '.join(row[1] for row in conn.execute('PRAGMA main.table_info(bookings)'))
+
+    moved = 0
+    while True:
+        count = archive_batch(conn, cutoff, columns, batch_size)
+        moved += count
+        if count < batch_size:
+            break
+        time.sleep(pause)
+
+    pages = incremental_vacuum(conn, pause)
+    auto_vacuum = conn.execute('PRAGMA main.auto_vacuum').fetchone()[0]
+    conn.close()
+
+    result = {'moved': moved, 'cutoff': cutoff, 'pages_freed': pages,
+              'seconds': round(time.perf_counter() - started, 3)}
+    if verbose:
+        print(f"Archived {moved} bookings dated before {cutoff} to {database.current_archive_path()} "
+              f"in {result['seconds']}s, freed {pages} pages")
+        if moved and auto_vacuum != 2:
+            print("Note: incremental vacuum is off for this database; run "
+                  "`python archive.py --enable-incremental-vacuum` once to reclaim space")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move old bookings to the archive database")
+    parser.add_argument('--days', type=int, default=DEFAULT_HORIZON_DAYS,
+                        help="Archive bookings older than this many days")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--pause', type=float, default=0.05, help="Seconds between batches")
+    parser.add_argument('--enable-incremental-vacuum', action='store_true',
+                        help="Convert the database to incremental vacuum (full VACUUM, run once)")
+    args = parser.parse_args()
+
+    if args.enable_incremental_vacuum:
+        enable_incremental_vacuum()
+        print(f"Enabled incremental vacuum on {database.current_database_path()}")
+        return
+    run_archive(args.days, args.batch_size, args.pause)
+
+
+if __name__ == '__main__':
+    main()
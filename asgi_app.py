@@ -0,0 +1,911 @@
+#!/usr/bin/env python3
+"""
+ASGI variant of the web application
+
+    uvicorn asgi_app:app --host 0.0.0.0 --port 10000 --proxy-headers
+
+Serves the same /api/* routes, payloads and status codes as app.py, but on
+an event loop: a request waiting on SQLite, SMTP or the assistant holds a
+coroutine rather than a worker thread, so thousands of open connections
+cost memory, not concurrency. Blocking work runs on dedicated thread pools
+that are sized independently:
+
+    DB_THREADS              SQLite reads and writes
+    CHAT_MAX_CONCURRENCY    assistant replies (which may call a remote model)
+    EMAIL_THREADS           confirmation emails, sent after the response
+
+so slow email delivery or a slow model never starves booking writes. Each
+pool call runs in a copy of the request's context, so it sees the request's
+location (see tenants.py) exactly as the Flask app's threads do. Queued
+emails are held in memory until sent: if bookings arrive faster than SMTP
+accepts mail for long, raise EMAIL_THREADS.
+
+Configuration comes from the same environment variables as app.py; behind a
+proxy, uvicorn's --proxy-headers sets the client address used by the rate
+limiter (PROXY_COUNT is a Flask-only setting).
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import functools
+import gzip
+import hmac
+import io
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route
+from starlette.staticfiles import StaticFiles
+
+import booking_search
+import bulk
+import database
+import idempotency
+import menu_render
+import metrics
+import orders
+import rate_limit
+import reminders
+import replica
+import tenants
+import waitlist
+from agent import RestaurantAssistantAgent
+from app import DEFAULT_CONFIG, _parse_timestamp
+from email_service import get_email_service
+from image_pipeline import get_responsive_images
+from serialization import GZIP_LEVEL, GZIP_MIN_SIZE, ConnectionStream, dumps, gzip_stream, json_rows
+
+# Threads for SQLite work; writes serialize on the database lock anyway, so
+# more threads mostly help concurrent reads
+DB_THREADS = int(os.getenv('DB_THREADS', '8'))
+# Emails are queued here and sent after the response has gone out
+EMAIL_THREADS = int(os.getenv('EMAIL_THREADS', '4'))
+
+
+def create_asgi_app(config: Optional[Dict] = None):
+    """
+    Create the Starlette application
+
+    Args:
+        config: Overrides for app.DEFAULT_CONFIG (e.g. DATABASE_PATH)
+
+    Returns:
+        ASGI app; thread pools and reminder schedulers start with its lifespan
+    """
+    settings = dict(DEFAULT_CONFIG, **(config or {}))
+    registry = tenants.load_tenants(settings['TENANTS_FILE'], settings['DATABASE_PATH'])
+    database.configure(registry.default.database_path, settings['ARCHIVE_DATABASE_PATH'] or None)
+    database.set_timezones({tenant.database_path: tenant.timezone for tenant in registry})
+    replica.configure(settings['REPLICA_ENABLED'], settings['REPLICA_REFRESH_SECONDS'])
+
+    app = Starlette(routes=ROUTES, lifespan=_lifespan)
+    app.state.config = settings
+    app.state.tenants = registry
+    app.state.rate_limiter = rate_limit.RateLimiter(settings)
+    app.state.idempotency = idempotency.IdempotencyStore(
+        settings['IDEMPOTENCY_DB'], settings.get('IDEMPOTENCY_TTL_SECONDS', idempotency.DEFAULT_TTL_SECONDS))
+    app.state.agents = {}
+    app.state.agents_lock = threading.Lock()
+    app.add_middleware(_RequestContext)
+    app.add_middleware(tenants.TenantASGIMiddleware, registry=registry)
+    return app
+
+
+@contextlib.asynccontextmanager
+async def _lifespan(app):
+    state = app.state
+    state.db_pool = ThreadPoolExecutor(DB_THREADS, thread_name_prefix='db')
+    state.chat_pool = ThreadPoolExecutor(state.config['CHAT_MAX_CONCURRENCY'], thread_name_prefix='chat')
+    state.email_pool = ThreadPoolExecutor(EMAIL_THREADS, thread_name_prefix='email')
+    paths = [tenant.database_path for tenant in state.tenants]
+    loop = asyncio.get_running_loop()
+    # Create every location's schema before the first request instead of on it
+    for path in paths:
+        context = contextvars.copy_context()
+        context.run(database.use_database, path)
+        await loop.run_in_executor(state.db_pool, context.run, database.ensure_database)
+    reminders.start_scheduler(paths)
+    try:
+        yield
+    finally:
+        state.db_pool.shutdown(wait=False, cancel_futures=True)
+        state.chat_pool.shutdown(wait=False, cancel_futures=True)
+        # Queued confirmations are only in memory, so let them go out
+        state.email_pool.shutdown(wait=True)
+
+
+class _RequestContext:
+    """Select the request's location and record request metrics (like app.py's hooks)"""
+
+    def __init__(self, asgi_app):
+        self.asgi_app = asgi_app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.asgi_app(scope, receive, send)
+            return
+
+        tenant = scope.get(tenants.ENVIRON_KEY) or scope['app'].state.tenants.default
+        token = database.use_database(tenant.database_path)
+        started = time.perf_counter()
+        status = 500
+        metrics.inc('http_requests_in_flight')
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.asgi_app(scope, receive, send_with_status)
+        finally:
+            metrics.inc('http_requests_in_flight', -1)
+            route = scope.get('route')
+            metrics.observe(
+                'http_request_duration_seconds', time.perf_counter() - started,
+                (('method', scope['method']), ('route', getattr(route, 'path', 'unmatched')),
+                 ('status', str(status)))
+            )
+            database.reset_database(token)
+
+
+async def _run(pool: ThreadPoolExecutor, func, *args, **kwargs):
+    """Run a blocking call on one of the app's pools, in the current request's context"""
+    call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(pool, call)
+
+
+def _db(request: Request, func, *args, **kwargs):
+    return _run(request.app.state.db_pool, func, *args, **kwargs)
+
+
+def _tenant(request: Request) -> tenants.Tenant:
+    return request.scope.get(tenants.ENVIRON_KEY) or request.app.state.tenants.default
+
+
+def _send_later(request: Request, send, payload):
+    """Queue an email; the response doesn't wait for SMTP"""
+    def deliver():
+        try:
+            send(payload)
+        except Exception as e:
+            print(f"Warning: Could not send confirmation email: {e}")
+    request.app.state.email_pool.submit(deliver)
+
+
+def _accepts_gzip(request: Request) -> bool:
+    return 'gzip' in request.headers.get('accept-encoding', '').lower()
+
+
+def json_response(request: Request, payload, status: int = 200,
+                  headers: Optional[Dict[str, str]] = None) -> Response:
+    """serialization.json_response for Starlette: gzip-compressed when large and accepted"""
+    body = dumps(payload)
+    headers = dict(headers or {}, vary='Accept-Encoding')
+    if len(body) >= GZIP_MIN_SIZE and _accepts_gzip(request):
+        body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+        headers['content-encoding'] = 'gzip'
+    return Response(body, status, headers, media_type='application/json')
+
+
+def _error(request: Request, message: str, status: int) -> Response:
+    return json_response(request, {'success': False, 'error': message}, status)
+
+
+class _ClosingStreamingResponse(StreamingResponse):
+    """StreamingResponse that runs on_close once it is done, sent in full or not"""
+
+    def __init__(self, content, on_close, **kwargs):
+        super().__init__(content, **kwargs)
+        self.on_close = on_close
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.on_close()
+
+
+def _stream(request: Request, chunks, media_type: str = 'application/json',
+            headers: Optional[Dict[str, str]] = None, on_close=None) -> StreamingResponse:
+    """
+    Stream pre-encoded chunks, producing each on the DB pool
+
+    on_close (e.g. a ConnectionStream's close) runs on the DB pool when the
+    response is finished, whether or not the body was sent.
+    """
+    headers = dict(headers or {}, vary='Accept-Encoding')
+    if _accepts_gzip(request):
+        chunks = gzip_stream(chunks)
+        headers['content-encoding'] = 'gzip'
+
+    async def generate():
+        iterator = iter(chunks)
+        while True:
+            chunk = await _db(request, next, iterator, None)
+            if chunk is None:
+                break
+            yield chunk
+
+    if on_close is None:
+        return StreamingResponse(generate(), media_type=media_type, headers=headers)
+    return _ClosingStreamingResponse(generate(), functools.partial(_db, request, on_close),
+                                     media_type=media_type, headers=headers)
+
+
+def _not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """Whether the client's copy is current (weak ETag match, then If-Modified-Since)"""
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match:
+        tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+        return '*' in tags or etag.removeprefix('W/') in tags
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_modified_since and last_modified:
+        try:
+            return parsedate_to_datetime(if_modified_since) >= last_modified
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _conditional(request: Request, response: Response, etag: str,
+                 last_modified: Optional[datetime] = None) -> Response:
+    response.headers['etag'] = etag
+    if last_modified:
+        response.headers['last-modified'] = format_datetime(last_modified, usegmt=True)
+    if request.method in ('GET', 'HEAD') and _not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers={
+            key: value for key, value in response.headers.items()
+            if key in ('etag', 'cache-control', 'vary')
+        })
+    return response
+
+
+def _is_admin(request: Request) -> bool:
+    """True if the request carries the configured ADMIN_TOKEN"""
+    admin_token = request.app.state.config.get('ADMIN_TOKEN') or ''
+    token = request.headers.get('x-admin-token', '')
+    return bool(admin_token) and hmac.compare_digest(token.encode(), admin_token.encode())
+
+
+def _reject(request: Request, status: int, retry_after: float, message: str) -> Response:
+    response = _error(request, message, status)
+    response.headers['retry-after'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def rate_limited(bucket: str):
+    """rate_limit.rate_limited for async views; the bucket update runs on the DB pool"""
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request: Request):
+            limiter = request.app.state.rate_limiter
+            if limiter.enabled:
+                client = request.client.host if request.client else None
+                retry_after = await _db(request, limiter.check, bucket, client,
+                                        request.headers.get('x-session-id'))
+                if retry_after:
+                    return _reject(request, 429, retry_after, 'Too many requests, please slow down.')
+            return await view(request)
+        return wrapper
+    return decorator
+
+
+def idempotent(view):
+    """idempotency.idempotent for async views"""
+    @functools.wraps(view)
+    async def wrapper(request: Request):
+        client_key = request.headers.get(idempotency.HEADER)
+        if client_key is None:
+            return await view(request)
+        if not client_key or len(client_key) > idempotency.MAX_KEY_LENGTH:
+            return _error(request, f'{idempotency.HEADER} must be 1-{idempotency.MAX_KEY_LENGTH} characters', 400)
+
+        store = request.app.state.idempotency
+        key = idempotency.scoped_key(request.method, request.url.path[len(request.scope.get('root_path', '')):],
+                                     client_key)
+        state, stored = await _db(request, store.begin, key, idempotency.fingerprint(await request.body()))
+        if state == idempotency.REPLAY:
+            status, content_type, body = stored
+            return Response(body, status, {idempotency.REPLAY_HEADER: 'true'}, media_type=content_type)
+        if state == idempotency.IN_PROGRESS:
+            response = _error(request, 'A request with this Idempotency-Key is still being processed', 409)
+            response.headers['retry-after'] = '1'
+            return response
+        if state == idempotency.MISMATCH:
+            return _error(request, 'This Idempotency-Key was already used for a different request', 422)
+
+        try:
+            response = await view(request)
+        except Exception:
+            await _db(request, store.abandon, key)
+            raise
+        if idempotency.cacheable(response.status_code):
+            body = response.body
+            if response.headers.get('content-encoding') == 'gzip':
+                body = gzip.decompress(body)
+            content_type = response.media_type or 'application/json'
+            await _db(request, store.complete, key, response.status_code, content_type, body)
+        else:
+            await _db(request, store.abandon, key)
+        return response
+    return wrapper
+
+
+def chat_concurrency_limited(view):
+    """rate_limit.chat_concurrency_limited for async views"""
+    @functools.wraps(view)
+    async def wrapper(request: Request):
+        limiter = request.app.state.rate_limiter
+        if not limiter.enabled:
+            return await view(request)
+
+        handle = limiter.chat_slots.acquire()
+        if handle is None:
+            return _reject(request, 503, 1, 'Our assistant is busy right now, please try again in a moment.')
+        try:
+            return await view(request)
+        finally:
+            limiter.chat_slots.release(handle)
+    return wrapper
+
+
+async def _json_body(request: Request):
+    """The request's JSON body, or None for an empty body (like Flask's get_json)"""
+    body = await request.body()
+    return await request.json() if body else None
+
+
+async def prometheus_metrics(request: Request):
+    """Prometheus metrics for this process"""
+    return Response(metrics.render(), media_type='text/plain; version=0.0.4')
+
+
+# API Routes
+
+async def get_menu(request: Request):
+    """Get all menu items"""
+    try:
+        return json_response(request, await _db(request, _tenant(request).cached_menu, _load_menu))
+    except Exception as e:
+        return _error(request, str(e), 500)
+
+
+def _load_menu() -> Dict:
+    items = database.get_all_menu_items()
+    return {
+        'success': True,
+        'menu': items,
+        'images': get_responsive_images([item['image'] for item in items if item['image']])
+    }
+
+
+async def menu_page(request: Request):
+    """The menu page with this location's menu rendered in (see menu_render.py)"""
+    tenant = _tenant(request)
+    try:
+        payload = await _db(request, tenant.cached_menu, _load_menu)
+        page = menu_render.render_page(tenant.slug, payload)
+    except Exception as e:
+        # The static page loads the menu itself
+        print(f"Warning: Could not prerender the menu page: {e}")
+        return FileResponse(menu_render.TEMPLATE_PATH, media_type='text/html')
+
+    headers = {'vary': 'Accept-Encoding', 'cache-control': 'no-cache'}
+    if _accepts_gzip(request):
+        headers['content-encoding'] = 'gzip'
+        response = Response(page.gzipped, headers=headers, media_type='text/html')
+        return _conditional(request, response, f'"{page.etag}-gz"')
+    return _conditional(request, Response(page.body, headers=headers, media_type='text/html'), f'"{page.etag}"')
+
+
+async def get_booking_details(request: Request):
+    """Get booking by ID"""
+    try:
+        booking = await _db(request, database.get_booking, request.path_params['booking_id'])
+        if booking:
+            response = json_response(request, {
+                'success': True,
+                'booking': booking
+            }, headers={'cache-control': 'private, no-cache'})
+            return _conditional(
+                request, response, f'W/"{booking["id"]}-{booking.get("version", 1)}"',
+                _parse_timestamp(booking.get('updated_at') or booking.get('created_at'))
+            )
+        return _error(request, 'Booking not found', 404)
+    except Exception as e:
+        return _error(request, str(e), 500)
+
+
+@idempotent
+@rate_limited('booking_write')
+async def create_new_booking(request: Request):
+    """Create new booking; the confirmation email is sent after the response"""
+    try:
+        data = await _json_body(request)
+
+        # Validate required fields
+        required_fields = ['customer', 'date', 'time', 'guests']
+        for field in required_fields:
+            if field not in data:
+                return _error(request, f'Missing required field: {field}', 400)
+
+        booking = await _db(request, database.create_booking, data, send_email=False)
+        _send_later(request, get_email_service().send_booking_confirmation, booking)
+        return json_response(request, {
+            'success': True,
+            'booking': booking,
+            'message': 'Booking created successfully'
+        })
+    except ValueError as e:
+        return _error(request, str(e), 400)
+    except Exception as e:
+        return _error(request, str(e), 500)
+
+
+@idempotent
+@rate_limited('booking_write')
+async def create_group_booking(request: Request):
+    """Create several linked bookings in one transaction, with one confirmation email"""
+    try:
+        data = await _json_body(request)
+        if not isinstance(data, dict):
+            return _error(request, 'Expected a JSON object', 400)
+        group = await _db(request, database.create_booking_group, data, send_email=False)
+        _send_later(request, get_email_service().send_group_confirmation, group)
+        return json_response(request, {
+            'success': True,
+            'group': group,
+            'message': f"{len(group['bookings'])} bookings created successfully"
+        })
+    except ValueError as e:
+        return _error(request, str(e), 400)
+    except Exception as e:
+        return _error(request, str(e), 500)
+
+
+async def get_group_booking(request: Request):
+    """Get all bookings in a group"""
+    try:
+        group = await _db(request, database.get_booking_group, request.path_params['group_id'])
+        if group:
+            return json_response(request, {
+                'success': True,
+                'group': group
+            })
+        return _error(request, 'Group not found', 404)
+    except Exception as e:
+        return _error(request, str(e), 500)
+
+
+def _all_bookings_rows(stats: Dict):
+    conn, data_age = replica.connect()
+    with ConnectionStream(conn) as rows:
+        rows.chunks = json_rows(conn, database.table_columns(conn, 'bookings'),
+                                'FROM bookings ORDER BY created_at DESC', stats=stats)
+    return rows, data_age
+
+
+def _export_chunks(fmt: str):
+    conn, data_age = replica.connect()
+    return bulk.export_bookings(fmt, conn), data_age
+
+
+async def get_all_bookings(request: Request):
+    """Get all bookings for admin dashboard (streamed from the read replica)"""
+    try:
+        stats = {}
+        rows, data_age = await _db(request, _all_bookings_rows, stats)
+    except Exception as e:
+        return _error(request, str(e), 500)
+
+    def generate():
+        yield b'{"success":true,"bookings":['
+        yield from rows
+        yield b'],"count":%d}' % stats['count']
+
+    return _stream(request, generate(), headers=replica.age_header(data_age), on_close=rows.close)
+
+
+async def search_bookings(request: Request):
+    """Fuzzy lookup by guest name, phone or email (?q=&date=&from=&to=&limit=)"""
+    if not _is_admin(request):
+        return _error(request, 'Admin token required', 403)
+
+    try:
+        criteria = booking_search.search_request(request.query_params)
+        bookings = await _db(request, booking_search.search_bookings, **criteria)
+        return json_response(request, {
+            'success': True,
+            'bookings': bookings,
+            'count': len(bookings)
+        })
+    except ValueError as e:
+        return _error(request, str(e), 400)
+    except Exception as e:
+        return _error(request, str(e), 500)
+
+
+async def export_bookings(request: Request):
+    """Stream all bookings as CSV or NDJSON (?format=csv|ndjson)"""
+    if not _is_admin(request):
+        return _error(request, 'Admin token required', 403)
+
+    fmt = request.query_params.get('format', 'csv')
+    if fmt not in bulk.FORMATS:
+        return _error(request, f"Unsupported format '{fmt}', use csv or ndjson", 400)
+    try:
+        chunks, data_age = await _db(request, _export_chunks, fmt)
+    except Exception as e:
+        return _error(request, str(e), 500)
+    return _stream(request, chunks, bulk.MIMETYPES[fmt], dict(
+        replica.age_header(data_age), **{'Content-Disposition': f'attachment; filename="bookings.{fmt}"'}
+    ), on_close=chunks.close)
+
+
+async def import_bookings(request: Request):
+    """Bulk-load bookings from a CSV or NDJSON upload (requires X-Admin-Token)"""
+    if not _is_admin(request):
+        return _error(request, 'Admin token required', 403)
+
+    mimetype = request.headers.get('content-type', '').split(';')[0].strip().lower()
+    upload = None
+    if mimetype == 'multipart/form-data':
+        upload = (await request.form()).get('file')
+        upload = upload if hasattr(upload, 'filename') else None
+    fmt = request.query_params.get('format') or (bulk.format_from_name(upload.filename) if upload else None)
+    if fmt is None:
+        fmt = 'ndjson' if 'ndjson' in mimetype else 'csv'
+    if fmt not in bulk.FORMATS:
+        return _error(request, f"Unsupported format '{fmt}', use csv or ndjson", 400)
+
+    try:
+        raw = upload.file if upload else io.BytesIO(await request.body())
+        stats = await _db(request, bulk.import_bookings,
+                          io.TextIOWrapper(raw, encoding='utf-8', newline=''), fmt)
+        return json_response(request, dict(stats, success=True))
+    except Exception as e:
+        return _error(request, str(e), 500)
+
+
+async def mark_booking_no_show(request: Request):
+    """Record that a confirmed booking's party never arrived (requires X-Admin-Token)"""
+    if not _is_admin(request):
+        return _error(request, 'Admin token required', 403)
+
+    booking_id = request.path_params['booking_id']
+    try:
+        if await _db(request, database.mark_no_show, booking_id):
+            return json_response(request, {
+                'success': True,
+                'message': f'Booking {booking_id} marked as a no-show'
+            })
+        return _error(request, 'Booking not found or not confirmed', 404)
+    except Exception as e:
+        return _error(request, str(e), 500)
+
+
+async def get_analytics(request: Request):
+    """Covers, cancellation/no-show rates and demand heatmaps (?from=&to=, YYYY-MM-DD)"""
+    if not _is_admin(request):
+        return _error(request, 'Admin token required', 403)
+
+    # Imported here so NumPy isn't loaded at startup
+    import analytics
+    try:
+        first, last = analytics.parse_range(request.query_params.get('from'), request.query_params.get('to'))
+    except ValueError as e:
+        return _error(request, str(e), 400)
+
+    try:
+        result = await _db(request, analytics.get_analytics, first, last)
+        return json_response(request, dict(result, success=True),
+                             headers=replica.age_header(analytics.data_age()))
+    except Exception as e:
+        return _error(request, str(e), 500)
+
+
+@idempotent
+@rate_limited('booking_write')
+async def cancel_booking(request: Request):
+    """Cancel booking"""
+    booking_id = request.path_params['booking_id']
+    try:
+        if await _db(request, database.delete_booking, booking_id):
+            return json_response(request, {
+                'success': True,
+                'message': f'Booking {booking_id} cancelled successfully'
+            })
+        return _error(request, 'Booking not found', 404)
+    except Exception as e:
+        return _error(request, str(e), 500)
+
+
+@idempotent
+@rate_limited('order_write')
+async def create_order(request: Request):
+    """Place a food order; prices are checked against the menu"""
+    try:
+        data = await _json_body(request)
+        if not isinstance(data, dict):
+            return _error(request, 'Expected a JSON object', 400)
+        payload = await _db(request, _tenant(request).cached_menu, _load_menu)
+        future = orders.submit_order(orders.prepare_order(data, payload['menu']))
+        # The batched commit is awaited here, not on a DB pool thread
+        try:
+            order = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)),
+                                           orders.WRITE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            orders.abandon(future)
+            order = await asyncio.wrap_future(future)
+        return json_response(request, {
+            'success': True,
+            'order': order,
+            'message': f"Order {order['id']} sent to the kitchen"
+        })
+    except orders.PriceChanged as e:
+        return json_response(request, {
+            'success': False,
+            'error': str(e),
+            'prices': e.prices
+        }, 409)
+    except ValueError as e:
+        return _error(request, str(e), 400)
+    except orders.QueueFull as e:
+        return _reject(request, 503, 1, str(e))
+    except Exception as e:
+        return _error(request, str(e), 500)
+
+
+async def get_order_details(request: Request):
+    """Get an order and where it is in the kitchen queue"""
+    try:
+        order = await _db(request, orders.get_order, request.path_params['order_id'])
+        if order:
+            return json_response(request, {
+                'success': True,
+                'order': order
+            })
+        return _error(request, 'Order not found', 404)
+    except Exception as e:
+        return _error(request, str(e), 500)
+
+
+async def get_kitchen_queue(request: Request):
+    """Open orders, oldest first (?status=received,preparing to narrow it)"""
+    if not _is_admin(request):
+        return _error(request, 'Admin token required', 403)
+
+    try:
+        statuses = [s for s in request.query_params.get('status', '').split(',') if s]
+        queue = await _db(request, orders.kitchen_queue, statuses)
+        return json_response(request, {
+            'success': True,
+            'orders': queue,
+            'count': len(queue)
+        })
+    except ValueError as e:
+        return _error(request, str(e), 400)
+    except Exception as e:
+        return _error(request, str(e), 500)
+
+
+async def update_order_status(request: Request):
+    """Move an order along the kitchen queue (requires X-Admin-Token)"""
+    if not _is_admin(request):
+        return _error(request, 'Admin token required', 403)
+
+    try:
+        try:
+            data = await _json_body(request) or {}
+        except ValueError:
+            data = {}
+        if not isinstance(data, dict) or data.get('status') not in orders.STATUSES:
+            return _error(request, f"status must be one of: {', '.join(orders.STATUSES)}", 400)
+        order = await _db(request, orders.update_status, request.path_params['order_id'], data['status'])
+        if order:
+            return json_response(request, {
+                'success': True,
+                'order': order
+            })
+        return _error(request, 'Order not found', 404)
+    except ValueError as e:
+        return _error(request, str(e), 409)
+    except Exception as e:
+        return _error(request, str(e), 500)
+
+
+@rate_limited('booking_write')
+async def join_waitlist(request: Request):
+    """Join the waitlist for a date, time window and party size"""
+    try:
+        data = await _json_body(request)
+        if not isinstance(data, dict):
+            return _error(request, 'Expected a JSON object', 400)
+        entry = await _db(request, waitlist.join_waitlist, data)
+        return json_response(request, {
+            'success': True,
+            'entry': entry,
+            'message': f"Added to the waitlist as {entry['id']}"
+        })
+    except ValueError as e:
+        return _error(request, str(e), 400)
+    except Exception as e:
+        return _error(request, str(e), 500)
+
+
+def _waitlist_entry_id(request: Request):
+    parsed = waitlist.parse_id(request.path_params['entry_id'])
+    if parsed is None:
+        raise LookupError('Waitlist entry not found')
+    return parsed
+
+
+async def get_waitlist_entry(request: Request):
+    """Get a waitlist entry, including any table currently held for it"""
+    try:
+        entry = await _db(request, waitlist.get_entry, _waitlist_entry_id(request))
+        if entry:
+            return json_response(request, {
+                'success': True,
+                'entry': entry
+            })
+        return _error(request, 'Waitlist entry not found', 404)
+    except LookupError as e:
+        return _error(request, str(e), 404)
+    except Exception as e:
+        return _error(request, str(e), 500)
+
+
+@rate_limited('booking_write')
+async def leave_waitlist(request: Request):
+    """Leave the waitlist (a held table passes to the next guest)"""
+    try:
+        if await _db(request, waitlist.leave_waitlist, _waitlist_entry_id(request)):
+            return json_response(request, {
+                'success': True,
+                'message': f"Removed {request.path_params['entry_id']} from the waitlist"
+            })
+        return _error(request, 'No active waitlist entry with that ID', 404)
+    except LookupError as e:
+        return _error(request, str(e), 404)
+    except Exception as e:
+        return _error(request, str(e), 500)
+
+
+@rate_limited('booking_write')
+async def accept_waitlist_offer(request: Request):
+    """Book the table being held for a waitlist entry"""
+    try:
+        booking = await _db(request, waitlist.accept_offer, _waitlist_entry_id(request))
+        return json_response(request, {
+            'success': True,
+            'booking': booking,
+            'message': 'Booking created successfully'
+        })
+    except LookupError as e:
+        return _error(request, str(e), 404)
+    except ValueError as e:
+        return _error(request, str(e), 409)
+    except Exception as e:
+        return _error(request, str(e), 500)
+
+
+@rate_limited('booking_write')
+async def decline_waitlist_offer(request: Request):
+    """Pass on a held table; it is offered to the next guest"""
+    try:
+        if await _db(request, waitlist.decline_offer, _waitlist_entry_id(request)):
+            return json_response(request, {
+                'success': True,
+                'message': 'Offer declined'
+            })
+        return _error(request, 'No table is on hold for that entry', 409)
+    except LookupError as e:
+        return _error(request, str(e), 404)
+    except Exception as e:
+        return _error(request, str(e), 500)
+
+
+def _agent_reply(state, tenant: tenants.Tenant, message: str, context):
+    """Get this process's agent for the location (created on first use) and answer"""
+    agent = state.agents.get(tenant.slug)
+    if agent is None:
+        with state.agents_lock:
+            agent = state.agents.get(tenant.slug)
+            if agent is None:
+                agent = RestaurantAssistantAgent(tenant.info)
+                state.agents[tenant.slug] = agent
+    return agent.process_query(message, context)
+
+
+@rate_limited('chat')
+@chat_concurrency_limited
+async def chat_with_agent(request: Request):
+    """Chat with AI Agent"""
+    try:
+        data = await _json_body(request)
+        user_message = data.get('message', '')
+        context = data.get('context', [])
+
+        # Replies run on their own pool so a slow model can't hold up bookings
+        response = await _run(request.app.state.chat_pool, _agent_reply,
+                              request.app.state, _tenant(request), user_message, context)
+
+        return json_response(request, {
+            'success': True,
+            'response': {
+                'action': response.action,
+                'message': response.message,
+                'data': response.data,
+                'needs_confirmation': response.needs_confirmation
+            }
+        })
+    except Exception as e:
+        return json_response(request, {
+            'success': False,
+            'error': str(e),
+            'response': {
+                'action': 'error',
+                'message': 'Sorry, I encountered an error. Please try again.',
+                'data': None,
+                'needs_confirmation': False
+            }
+        }, 500)
+
+
+async def get_info(request: Request):
+    """Get restaurant information for the request's location"""
+    tenant = _tenant(request)
+    response = Response(tenant.info_body, media_type='application/json',
+                        headers={'cache-control': 'public, max-age=300'})
+    return _conditional(request, response, f'"{tenant.info_etag}"')
+
+
+ROUTES = [
+    Route('/metrics', prometheus_metrics),
+    Route('/api/menu', get_menu, methods=['GET']),
+    Route('/api/bookings', create_new_booking, methods=['POST']),
+    Route('/api/bookings/group', create_group_booking, methods=['POST']),
+    Route('/api/bookings/group/{group_id}', get_group_booking, methods=['GET']),
+    Route('/api/bookings/{booking_id}', get_booking_details, methods=['GET']),
+    Route('/api/bookings/{booking_id}', cancel_booking, methods=['DELETE']),
+    Route('/api/admin/bookings', get_all_bookings, methods=['GET']),
+    Route('/api/admin/bookings/search', search_bookings, methods=['GET']),
+    Route('/api/admin/bookings/export', export_bookings, methods=['GET']),
+    Route('/api/admin/bookings/import', import_bookings, methods=['POST']),
+    Route('/api/admin/bookings/{booking_id}/no-show', mark_booking_no_show, methods=['POST']),
+    Route('/api/admin/analytics', get_analytics, methods=['GET']),
+    Route('/api/orders', create_order, methods=['POST']),
+    Route('/api/orders/{order_id}', get_order_details, methods=['GET']),
+    Route('/api/kitchen/orders', get_kitchen_queue, methods=['GET']),
+    Route('/api/kitchen/orders/{order_id}/status', update_order_status, methods=['POST']),
+    Route('/api/waitlist', join_waitlist, methods=['POST']),
+    Route('/api/waitlist/{entry_id}', get_waitlist_entry, methods=['GET']),
+    Route('/api/waitlist/{entry_id}', leave_waitlist, methods=['DELETE']),
+    Route('/api/waitlist/{entry_id}/accept', accept_waitlist_offer, methods=['POST']),
+    Route('/api/waitlist/{entry_id}/decline', decline_waitlist_offer, methods=['POST']),
+    Route('/api/chat', chat_with_agent, methods=['POST']),
+    Route('/api/info', get_info, methods=['GET']),
+    Route('/menu.html', menu_page, methods=['GET']),
+    # Frontend (index.html for /)
+    Mount('/', StaticFiles(directory='static', html=True)),
+]
+
+# Module-level app for `uvicorn asgi_app:app`
+app = create_asgi_app()
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app, host='0.0.0.0', port=int(os.getenv('PORT', '10000')))
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Menu latency while /api/chat is being abused
+
+Runs well-behaved menu-page clients alone, then alongside a flood of chat
+requests from a single client IP, with admission control on and off:
+
+    python -m benchmarks.bench_abuse --duration 15 --menu-clients 4 --abusers 32
+
+The menu p95/p99 under abuse should stay close to the quiet baseline when
+rate limiting is enabled, and most abusive chat calls should get 429/503.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.datasets import create_database
+from benchmarks.load_test import LoadClient, run_clients, start_server, summarize
+
+MENU_MIX = {'GET /api/menu': 3, 'GET static': 2}
+ABUSE_MIX = {'POST /api/chat': 1}
+
+
+def _abuse(base: str, abusers: int, duration: float, results: multiprocessing.Queue):
+    """Flood chat from a separate process so the menu clients keep their own GIL"""
+    stop_at = time.perf_counter() + duration
+    clients = [LoadClient(base, ['BK001'], ABUSE_MIX, stop_at, seed=1000 + i) for i in range(abusers)]
+    results.put(summarize(clients, run_clients(clients))['routes']['POST /api/chat'])
+
+
+def scenario(db_path: str, args, rate_limited: bool, abusers: int, port: int) -> dict:
+    env = {'RATE_LIMIT_ENABLED': '1' if rate_limited else '0'}
+    with start_server(db_path, 'gunicorn', port, args.workers, env=env) as base:
+        abuse_results = multiprocessing.Queue()
+        abuser = None
+        if abusers:
+            abuser = multiprocessing.Process(target=_abuse, args=(base, abusers, args.duration, abuse_results))
+            abuser.start()
+
+        stop_at = time.perf_counter() + args.duration
+        menu_clients = [LoadClient(base, ['BK001'], MENU_MIX, stop_at, seed=i)
+                        for i in range(args.menu_clients)]
+        result = {'menu': summarize(menu_clients, run_clients(menu_clients))['total']}
+        if abuser:
+            result['chat'] = abuse_results.get()
+            abuser.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Menu latency under chat abuse")
+    parser.add_argument('--duration', type=float, default=15.0)
+    parser.add_argument('--menu-clients', type=int, default=4)
+    parser.add_argument('--abusers', type=int, default=32)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--port', type=int, default=18082)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='bench_abuse_')
+    try:
+        db_path = os.path.join(tmpdir, 'restaurant.db')
+        create_database(db_path)
+        results = {
+            'quiet': scenario(db_path, args, True, 0, args.port),
+            'abuse, no admission control': scenario(db_path, args, False, args.abusers, args.port + 1),
+            'abuse, admission control': scenario(db_path, args, True, args.abusers, args.port + 2),
+        }
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    print(f"{'scenario':<30} {'menu rps':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  chat statuses")
+    for name, result in results.items():
+        menu = result['menu']
+        chat = json.dumps(result['chat']['statuses']) if 'chat' in result else '-'
+        print(f"{name:<30} {menu['throughput_rps']:>9} {menu['p50_ms']:>8} {menu['p95_ms']:>8} "
+              f"{menu['p99_ms']:>8}  {chat}")
+
+
+if __name__ == '__main__':
+    main()
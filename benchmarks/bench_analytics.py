@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Admin analytics latency over a large booking history
+
+Seeds years of bookings (a share of them no-shows, a few with a non-numeric
+party size as old imports left them), archives the old ones as archive.py
+would, checks every booking was loaded, then times /api/admin/analytics'
+work for a few date ranges: loading the columns, an uncached NumPy summary,
+a cached lookup and, for comparison, the same aggregates as SQL GROUP BY
+queries:
+
+    python -m benchmarks.bench_analytics --bookings 1000000 --years 3
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import date, timedelta
+
+import analytics
+import archive
+import database
+from benchmarks.datasets import create_database
+
+# The GROUP BYs the dashboard would otherwise run per chart, over live and archived bookings
+SQL_QUERIES = [
+    "SELECT status, COUNT(*) FROM {bookings} WHERE date BETWEEN ? AND ? GROUP BY status",
+    "SELECT strftime('%w', date), substr(time, 1, 2), SUM(guests) FROM {bookings} "
+    "WHERE date BETWEEN ? AND ? AND status = 'confirmed' GROUP BY 1, 2",
+    "SELECT strftime('%w', date), status, COUNT(*) FROM {bookings} WHERE date BETWEEN ? AND ? GROUP BY 1, 2",
+    "SELECT MIN(guests, 20), COUNT(*) FROM {bookings} WHERE date BETWEEN ? AND ? GROUP BY 1",
+]
+
+
+def _best_ms(func, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def sql_summary(conn, first, last):
+    for sql in SQL_QUERIES:
+        for bookings in ('main.bookings', 'archive.bookings'):
+            conn.execute(sql.format(bookings=bookings), (first.isoformat(), last.isoformat())).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark booking analytics")
+    parser.add_argument('--bookings', type=int, default=1000000)
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--no-show-share', type=float, default=0.05)
+    parser.add_argument('--horizon', type=int, default=90, help="Archive bookings older than N days")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='bench_analytics_')
+    try:
+        db_path = os.path.join(tmpdir, 'restaurant.db')
+        days = args.years * 365
+        seeding = time.perf_counter()
+        create_database(db_path, args.bookings, start=date.today() - timedelta(days=days - 30), days=days)
+        conn = sqlite3.connect(db_path)
+        with conn:
+            conn.execute("UPDATE bookings SET status = 'no-show' "
+                         "WHERE status = 'confirmed' AND abs(random()) % 1000 < ?",
+                         (int(args.no_show_share * 1000),))
+            conn.execute("UPDATE bookings SET guests = 'lots' WHERE rowid % 10007 = 0")
+        conn.close()
+        database.configure(db_path)
+        moved = archive.run_archive(args.horizon, batch_size=20000, pause=0, verbose=False)['moved']
+        print(f"{args.bookings} bookings over {args.years} years, {moved} archived "
+              f"(seeded in {time.perf_counter() - seeding:.0f}s)\n")
+
+        started = time.perf_counter()
+        snap = analytics.snapshot()
+        load_ms = (time.perf_counter() - started) * 1000
+        print(f"load columns: {load_ms:.0f} ms for {len(snap.live) + len(snap.archive)} bookings "
+              f"({len(snap.live)} live, {len(snap.archive)} archived)\n")
+
+        conn = sqlite3.connect(db_path)
+        conn.execute('ATTACH DATABASE ? AS archive', (database.current_archive_path(),))
+        stored = sum(conn.execute(f'SELECT COUNT(*) FROM {bookings}').fetchone()[0]
+                     for bookings in ('main.bookings', 'archive.bookings'))
+        assert len(snap.live) + len(snap.archive) == stored, "analytics dropped bookings"
+        today = date.today()
+        ranges = {
+            'last 30 days': (today - timedelta(days=29), today),
+            'last 365 days': (today - timedelta(days=364), today),
+            'all time': (today - timedelta(days=days), today + timedelta(days=30)),
+        }
+        print(f"{'range':<16} {'bookings':>9} {'numpy ms':>9} {'cached ms':>10} {'SQL ms':>9}")
+        for name, (first, last) in ranges.items():
+            result = analytics.summarize(snap, first, last)
+            numpy_ms = _best_ms(lambda: analytics.summarize(snap, first, last), args.repeat)
+            analytics.get_analytics(first, last)
+            cached_ms = _best_ms(lambda: analytics.get_analytics(first, last), args.repeat)
+            sql_ms = _best_ms(lambda: sql_summary(conn, first, last), min(args.repeat, 2))
+            print(f"{name:<16} {result['bookings']:>9} {numpy_ms:>9.2f} {cached_ms:>10.3f} {sql_ms:>9.0f}")
+        conn.close()
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Hot-table latency before and after archiving a large booking history
+
+Seeds several years of bookings (the last few weeks in the future), times
+the queries the app runs against the hot table, archives everything older
+than the horizon and times them again:
+
+    python -m benchmarks.bench_archive --bookings 300000 --years 3
+"""
+
+import argparse
+import itertools
+import os
+import random
+import shutil
+import tempfile
+import time
+from datetime import date, timedelta
+
+import archive
+import database
+from benchmarks.datasets import create_database
+from serialization import json_rows
+
+
+def _best_ms(func, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+_insert_ids = itertools.count()
+
+
+def measure(ids, upcoming_day, repeat):
+    """Latency of the hot-path queries, in milliseconds"""
+    rng = random.Random(7)
+
+    def admin_listing():
+        conn = database.get_db_connection()
+        for _ in json_rows(conn, database.table_columns(conn, 'bookings'),
+                           'FROM bookings ORDER BY created_at DESC'):
+            pass
+        conn.close()
+
+    def day_sheet():
+        conn = database.get_db_connection()
+        conn.execute("SELECT * FROM bookings WHERE date = ? AND status = 'confirmed'",
+                     (upcoming_day,)).fetchall()
+        conn.close()
+
+    def lookups():
+        for booking_id in rng.sample(ids, 200):
+            database._clear_booking_cache()
+            database.get_booking(booking_id)
+
+    def insert():
+        conn = database.get_db_connection()
+        with conn:
+            conn.execute("INSERT INTO bookings (id, customer, date, time, guests) VALUES (?, 'Bench', ?, '19:00', 2)",
+                         (f"BENCH{next(_insert_ids)}", upcoming_day))
+        conn.close()
+
+    return {
+        'admin listing (all rows)': _best_ms(admin_listing, repeat),
+        'bookings for one upcoming day': _best_ms(day_sheet, repeat),
+        '200 uncached get_booking': _best_ms(lookups, repeat),
+        'insert booking': _best_ms(insert, repeat * 5),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark booking archival")
+    parser.add_argument('--bookings', type=int, default=300000)
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--horizon', type=int, default=90, help="Archive bookings older than N days")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='bench_archive_')
+    try:
+        db_path = os.path.join(tmpdir, 'restaurant.db')
+        days = args.years * 365
+        ids = create_database(db_path, args.bookings, start=date.today() - timedelta(days=days - 30), days=days)
+        database.configure(db_path)
+        upcoming_day = (date.today() + timedelta(days=7)).isoformat()
+        archived_ids = [b for b in ids[:5000] if database.get_booking(b)['date'] < (date.today() - timedelta(days=args.horizon)).isoformat()]
+
+        before = measure(ids, upcoming_day, args.repeat)
+        size_before = os.path.getsize(db_path)
+        result = archive.run_archive(args.horizon, pause=0, verbose=False)
+        after = measure(ids, upcoming_day, args.repeat)
+        size_after = os.path.getsize(db_path)
+
+        def archived_lookup():
+            for booking_id in archived_ids[:200]:
+                database._clear_booking_cache()
+                assert database.get_booking(booking_id)
+
+        print(f"{args.bookings} bookings over {args.years} years; archived {result['moved']} "
+              f"older than {args.horizon} days in {result['seconds']}s\n")
+        print(f"{'query':<34} {'before ms':>10} {'after ms':>10}")
+        for name in before:
+            print(f"{name:<34} {before[name]:>10.2f} {after[name]:>10.2f}")
+        print(f"{'200 get_booking of archived IDs':<34} {'':>10} {_best_ms(archived_lookup, args.repeat):>10.2f}")
+        print(f"\nrestaurant.db {size_before / 1e6:.1f} MB -> {size_after / 1e6:.1f} MB "
+              f"(archive {os.path.getsize(database.ARCHIVE_PATH) / 1e6:.1f} MB)")
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
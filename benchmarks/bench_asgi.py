@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Flask vs ASGI: behaviour parity and connection capacity
+
+Parity: runs one scripted session touching every /api route against app.py
+(Flask test client) and asgi_app.py (Starlette test client), each on its own
+fresh database, and compares status codes, JSON bodies (generated IDs and
+timestamps normalized) and caching headers step by step.
+
+Capacity: starts each app as a single server process -- gunicorn with the
+repo's gthread config vs uvicorn -- with email delivery slowed down to
+--email-latency seconds to stand in for SMTP, then drives a booking-heavy
+mix from growing numbers of concurrent keep-alive clients:
+
+    python -m benchmarks.bench_asgi --parity-only
+    python -m benchmarks.bench_asgi --concurrency 16 64 256 --duration 10 --email-latency 0.2
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import email_service
+from benchmarks.datasets import create_database
+from benchmarks.load_test import run_load, start_server
+
+# Booking-write bucket size for the parity session; its last writes run past it
+WRITE_BURST = 19
+
+CAPACITY_MIX = {'POST /api/bookings': 2, 'GET /api/bookings/<id>': 1, 'GET /api/menu': 1}
+
+# API headers whose values must match; Last-Modified is only checked for presence
+COMPARED_HEADERS = ('content-type', 'etag', 'cache-control', 'retry-after', 'content-disposition',
+                    'idempotent-replayed', 'x-data-age')
+# Keys whose values legitimately differ between runs
+VOLATILE_KEYS = {'created_at', 'updated_at', 'joined_at', 'offer_expires', 'seconds', 'as_of'}
+_GENERATED_ID = re.compile(r'\b(BK\d+|GRP[0-9A-F]{8}|WL[0-9A-F]{16}|ORD[0-9A-F]{10})\b')
+
+
+def _slow_email():
+    latency = float(os.getenv('BENCH_EMAIL_LATENCY', '0'))
+
+    def deliver(self, to_email, subject, html_content, text_content, label):
+        time.sleep(latency)
+        return True
+    email_service.EmailService._deliver = deliver
+
+
+def slow_email_flask():
+    """Server factory: app.py with every email taking BENCH_EMAIL_LATENCY seconds"""
+    _slow_email()
+    from app import app
+    return app
+
+
+def slow_email_asgi():
+    """Server factory: asgi_app.py with every email taking BENCH_EMAIL_LATENCY seconds"""
+    _slow_email()
+    from asgi_app import app
+    return app
+
+
+def normalize(value, ids):
+    """Replace generated IDs (consistently, by first appearance), timestamps and timings"""
+    if isinstance(value, dict):
+        return {key: '<volatile>' if key in VOLATILE_KEYS and item else normalize(item, ids)
+                for key, item in value.items()}
+    if isinstance(value, list):
+        return [normalize(item, ids) for item in value]
+    if isinstance(value, str):
+        return _GENERATED_ID.sub(lambda m: ids.setdefault(m.group(), f'<id{len(ids)}>'), value)
+    return value
+
+
+def flask_caller(client):
+    def call(method, path, body=None, headers=None, data=None, files=None):
+        if files:
+            data = {name: (io.BytesIO(content), filename) for name, (filename, content, _) in files.items()}
+        response = client.open(path, method=method, json=body, data=data, headers=headers)
+        return response.status_code, dict(response.headers), response.get_data()
+    return call
+
+
+def asgi_caller(client):
+    def call(method, path, body=None, headers=None, data=None, files=None):
+        response = client.request(method, path, json=body, content=data, files=files, headers=headers)
+        return response.status_code, dict(response.headers), response.content
+    return call
+
+
+def session(call):
+    """The scripted session; returns one comparable record per step"""
+    ids = {}
+    records = []
+    day = (date.today() + timedelta(days=7)).isoformat()
+
+    def step(label, method, path, body=None, headers=None, data=None, files=None, summary=None):
+        headers = dict(headers or {}, **{'Accept-Encoding': 'identity'})
+        status, response_headers, raw = call(method, path, body, headers, data, files)
+        response_headers = {key.lower(): value for key, value in response_headers.items()}
+        payload = None
+        if response_headers.get('content-type', '').startswith('application/json') and raw:
+            payload = json.loads(raw)
+        if summary:
+            shown = summary(payload if payload is not None else raw)
+        elif payload is not None and status == 500:
+            shown = dict(payload, error='<error>')  # exception text differs between frameworks
+        else:
+            shown = payload
+        # Static files (and their 404 pages) come from each framework's own handler
+        if path.startswith('/api/'):
+            compared = COMPARED_HEADERS
+        else:
+            compared = ('content-type',) if status == 200 else ()
+        records.append((label, status, {
+            key: normalize(response_headers[key].split(';')[0], ids)
+            for key in compared if key in response_headers
+        }, path.startswith('/api/') and 'last-modified' in response_headers, normalize(shown, ids)))
+        return status, response_headers, payload
+
+    _, headers, _ = step('info', 'GET', '/api/info')
+    step('info not modified', 'GET', '/api/info', headers={'If-None-Match': headers['etag']})
+    _, _, menu = step('menu', 'GET', '/api/menu')
+    _, headers, _ = step('menu page', 'GET', '/menu.html', summary=lambda raw: hashlib.sha1(raw).hexdigest())
+    step('menu page not modified', 'GET', '/menu.html', headers={'If-None-Match': headers['etag']})
+
+    guest = {'customer': 'Parity Guest', 'email': 'parity@example.com', 'phone': '+1 555 0100'}
+    _, _, created = step('create booking', 'POST', '/api/bookings',
+                         dict(guest, date=day, time='19:00', guests=2))
+    booking = created['booking']['id']
+    step('create booking missing field', 'POST', '/api/bookings', {'customer': 'Nobody'})
+    step('create booking bad guests', 'POST', '/api/bookings', dict(guest, date=day, time='19:00', guests='lots'))
+    _, headers, _ = step('get booking', 'GET', f'/api/bookings/{booking}')
+    step('get booking etag', 'GET', f'/api/bookings/{booking}', headers={'If-None-Match': headers['etag']})
+    step('get booking since', 'GET', f'/api/bookings/{booking}',
+         headers={'If-Modified-Since': headers['last-modified']})
+    step('get unknown booking', 'GET', '/api/bookings/BK0')
+
+    _, _, group = step('create group', 'POST', '/api/bookings/group', dict(guest, name='Birthday', bookings=[
+        {'date': day, 'time': '18:00', 'guests': 4}, {'date': day, 'time': '20:00', 'guests': 6}]))
+    step('create empty group', 'POST', '/api/bookings/group', dict(guest, bookings=[]))
+    step('create group bad guests', 'POST', '/api/bookings/group', dict(guest, bookings=[
+        {'date': day, 'time': '18:00', 'guests': 4}, {'date': day, 'time': '20:00', 'guests': 2.5}]))
+    step('create group from a list', 'POST', '/api/bookings/group', [guest])
+    step('get group', 'GET', f"/api/bookings/group/{group['group']['group_id']}")
+    step('get unknown group', 'GET', '/api/bookings/group/GRP00000000')
+
+    step('admin list', 'GET', '/api/admin/bookings', summary=lambda p: (p['success'], p['count']))
+    step('search without token', 'GET', '/api/admin/bookings/search?phone=555-0100')
+    step('search by name', 'GET', f'/api/admin/bookings/search?q=Parity%20Gest&date={day}',
+         headers={'X-Admin-Token': 'parity'},
+         summary=lambda p: (p['success'], p['count'], [b['customer'] for b in p['bookings']]))
+    step('search by phone', 'GET', '/api/admin/bookings/search?phone=555-0100&limit=2',
+         headers={'X-Admin-Token': 'parity'}, summary=lambda p: (p['success'], p['count']))
+    step('search without criteria', 'GET', '/api/admin/bookings/search?date=2000-01-01',
+         headers={'X-Admin-Token': 'parity'})
+    step('export without token', 'GET', '/api/admin/bookings/export')
+    step('export ndjson', 'GET', '/api/admin/bookings/export?format=ndjson', headers={'X-Admin-Token': 'parity'},
+         summary=lambda raw: len(raw.splitlines()))
+    step('export csv', 'GET', '/api/admin/bookings/export', headers={'X-Admin-Token': 'parity'},
+         summary=lambda raw: len(raw.splitlines()))
+    step('export bad format', 'GET', '/api/admin/bookings/export?format=xml', headers={'X-Admin-Token': 'parity'})
+    rows = b'\n'.join(json.dumps({'id': f'BK90000{i}', 'customer': 'Imported', 'date': day, 'time': '12:00',
+                                  'guests': 2}).encode() for i in range(3))
+    step('import without token', 'POST', '/api/admin/bookings/import?format=ndjson', data=rows)
+    step('import ndjson', 'POST', '/api/admin/bookings/import', data=rows,
+         headers={'X-Admin-Token': 'parity', 'Content-Type': 'application/x-ndjson'})
+    csv_rows = f'id,customer,date,time,guests\nBK900010,Imported,{day},13:00,3\n'.encode()
+    step('import csv upload', 'POST', '/api/admin/bookings/import', headers={'X-Admin-Token': 'parity'},
+         files={'file': ('bookings.csv', csv_rows, 'text/csv')})
+
+    seated = group['group']['bookings'][0]['id']
+    step('no-show without token', 'POST', f'/api/admin/bookings/{seated}/no-show')
+    step('mark no-show', 'POST', f'/api/admin/bookings/{seated}/no-show', headers={'X-Admin-Token': 'parity'})
+    step('mark no-show twice', 'POST', f'/api/admin/bookings/{seated}/no-show', headers={'X-Admin-Token': 'parity'})
+    step('analytics without token', 'GET', f'/api/admin/analytics?from={day}&to={day}')
+    step('analytics', 'GET', f'/api/admin/analytics?from={day}&to={day}', headers={'X-Admin-Token': 'parity'})
+    step('analytics default range', 'GET', '/api/admin/analytics', headers={'X-Admin-Token': 'parity'},
+         summary=lambda p: (p['success'], p['range']['days']))
+    step('analytics reversed range', 'GET', f'/api/admin/analytics?from={day}&to=2000-01-01',
+         headers={'X-Admin-Token': 'parity'})
+
+    dish = menu['menu'][0]
+    _, _, placed = step('place order', 'POST', '/api/orders', {
+        'booking_id': booking, 'customer': guest['customer'],
+        'items': [{'id': dish['id'], 'quantity': 2, 'price': dish['price']}, {'id': menu['menu'][1]['id']}]})
+    order = placed['order']['id']
+    step('order with stale price', 'POST', '/api/orders', {'items': [{'id': dish['id'], 'price': 0.5}]})
+    step('order unknown item', 'POST', '/api/orders', {'items': [{'id': 999999}]})
+    step('order empty', 'POST', '/api/orders', {'items': []})
+    step('get order', 'GET', f'/api/orders/{order}')
+    step('kitchen queue without token', 'GET', '/api/kitchen/orders')
+    step('kitchen queue', 'GET', '/api/kitchen/orders', headers={'X-Admin-Token': 'parity'},
+         summary=lambda p: (p['success'], p['count']))
+    step('kitchen bad status filter', 'GET', '/api/kitchen/orders?status=eaten', headers={'X-Admin-Token': 'parity'})
+    step('order status without token', 'POST', f'/api/kitchen/orders/{order}/status', {'status': 'preparing'})
+    step('order status', 'POST', f'/api/kitchen/orders/{order}/status', {'status': 'preparing'},
+         headers={'X-Admin-Token': 'parity'})
+    step('order status skipped', 'POST', f'/api/kitchen/orders/{order}/status', {'status': 'served'},
+         headers={'X-Admin-Token': 'parity'})
+    step('chat order status', 'POST', '/api/chat', {'message': f'Where is my order {order}?'})
+
+    _, _, joined = step('join waitlist', 'POST', '/api/waitlist', dict(guest, date=day, time_from='19:00', guests=2))
+    entry = joined['entry']['id']
+    step('join waitlist invalid', 'POST', '/api/waitlist', dict(guest, date=day, guests=2, time_from='21:00',
+                                                                  time_to='20:00'))
+    step('get waitlist entry', 'GET', f'/api/waitlist/{entry}')
+    step('chat waitlist status', 'POST', '/api/chat', {'message': f'Any news on waitlist {entry}?'})
+    step('get bad waitlist id', 'GET', '/api/waitlist/nope')
+    step('get guessed waitlist id', 'GET', '/api/waitlist/WL1')
+    step('accept without offer', 'POST', f'/api/waitlist/{entry}/accept')
+    step('decline without offer', 'POST', f'/api/waitlist/{entry}/decline')
+    step('cancel booking', 'DELETE', f'/api/bookings/{booking}')
+    step('waitlist offered', 'GET', f'/api/waitlist/{entry}')
+    step('accept offer', 'POST', f'/api/waitlist/{entry}/accept')
+    step('cancel unknown booking', 'DELETE', '/api/bookings/BK0')
+    _, _, joined = step('join waitlist again', 'POST', '/api/waitlist', dict(guest, date=day, time_from='18:00',
+                                                                             guests=3))
+    step('leave waitlist', 'DELETE', f"/api/waitlist/{joined['entry']['id']}")
+    step('leave waitlist twice', 'DELETE', f"/api/waitlist/{joined['entry']['id']}")
+
+    step('chat hours', 'POST', '/api/chat', {'message': 'What are your opening hours?'})
+    step('chat booking lookup', 'POST', '/api/chat', {'message': f'Can you check booking {booking}?'})
+    step('chat bad body', 'POST', '/api/chat', data=b'not json', headers={'Content-Type': 'application/json'})
+
+    step('metrics', 'GET', '/metrics', summary=lambda raw: bool(raw))
+    step('index', 'GET', '/', summary=len)
+    step('stylesheet', 'GET', '/styles.css', summary=len)
+    step('missing asset', 'GET', '/missing.css', summary=lambda raw: None)
+
+    retried = dict(guest, date=day, time='20:30', guests=4)
+    key = {'Idempotency-Key': 'parity-create'}
+    _, _, created = step('create with key', 'POST', '/api/bookings', retried, headers=key)
+    step('create replayed', 'POST', '/api/bookings', retried, headers=key)
+    step('key reused for another body', 'POST', '/api/bookings', dict(retried, guests=5), headers=key)
+    step('key too long', 'POST', '/api/bookings', retried, headers={'Idempotency-Key': 'k' * 300})
+    key = {'Idempotency-Key': 'parity-cancel'}
+    step('cancel with key', 'DELETE', f"/api/bookings/{created['booking']['id']}", headers=key)
+    step('cancel replayed', 'DELETE', f"/api/bookings/{created['booking']['id']}", headers=key)
+    step('bookings after replays', 'GET', '/api/admin/bookings', summary=lambda p: p['count'])
+
+    # Past WRITE_BURST booking writes in all, the rest are rejected
+    statuses = []
+    for _ in range(5):
+        status, headers, _ = call('POST', '/api/bookings', dict(guest, date=day, time='21:00', guests=1),
+                                  {'Accept-Encoding': 'identity'}, None, None)
+        retry_after = headers.get('retry-after') or headers.get('Retry-After')
+        statuses.append((status, bool(retry_after)))  # seconds depend on timing
+    records.append(('rate limited writes', statuses))
+    return records
+
+
+
+def parity(tmpdir: str) -> int:
+    """Run the session against both apps; returns the number of differing steps"""
+    from app import create_app
+    from asgi_app import create_asgi_app
+    from starlette.testclient import TestClient
+
+    def config(name):
+        db_path = os.path.join(tmpdir, f'{name}.db')
+        create_database(db_path)
+        return {'DATABASE_PATH': db_path, 'RATE_LIMIT_DB': os.path.join(tmpdir, f'{name}.ratelimit'),
+                'RATE_LIMIT_ENABLED': True, 'RATE_LIMITS': {'booking_write': (WRITE_BURST, 0.0001)},
+                'IDEMPOTENCY_DB': os.path.join(tmpdir, f'{name}.idempotency'),
+                'TENANTS_FILE': os.path.join(tmpdir, 'no-tenants.json'), 'ADMIN_TOKEN': 'parity',
+                # Admin reads straight from the database, so both sessions see their own writes at once
+                'REPLICA_ENABLED': False}
+
+    flask_config, asgi_config = config('flask'), config('asgi')
+    with contextlib.redirect_stdout(io.StringIO()):
+        expected = session(flask_caller(create_app(flask_config).test_client()))
+        with TestClient(create_asgi_app(asgi_config)) as client:
+            actual = session(asgi_caller(client))
+
+    mismatches = 0
+    for want, got in zip(expected, actual):
+        if want != got:
+            mismatches += 1
+            print(f"MISMATCH {want[0]}\n  flask: {want[1:]}\n  asgi:  {got[1:]}")
+    print(f"parity: {len(expected) - mismatches}/{len(expected)} steps identical")
+    return mismatches
+
+
+def capacity(tmpdir: str, args):
+    db_path = os.path.join(tmpdir, 'capacity.db')
+    booking_ids = create_database(db_path, 2000)
+    env = {'BENCH_EMAIL_LATENCY': str(args.email_latency), 'REMINDERS_ENABLED': '0'}
+    servers = [('gunicorn', 'benchmarks.bench_asgi:slow_email_flask()'),
+               ('uvicorn', 'benchmarks.bench_asgi:slow_email_asgi()')]
+
+    print(f"\none server process each, email latency {args.email_latency * 1000:.0f} ms, "
+          f"{args.duration:g}s per level, mix {CAPACITY_MIX}\n")
+    print(f"{'server':<9} {'clients':>7} {'rps':>8} {'p50 ms':>8} {'p99 ms':>9} "
+          f"{'POST p99 ms':>12} {'GET p99 ms':>11} {'errors':>7}")
+    for server, app in servers:
+        with start_server(db_path, server, args.port, 1, env=env, app=app) as base:
+            for concurrency in args.concurrency:
+                result = run_load(base, booking_ids, args.duration, concurrency, CAPACITY_MIX)
+                total, routes = result['total'], result['routes']
+                print(f"{server:<9} {concurrency:>7} {total['throughput_rps']:>8} {total['p50_ms']:>8} "
+                      f"{total['p99_ms']:>9} {routes['POST /api/bookings']['p99_ms']:>12} "
+                      f"{routes['GET /api/menu']['p99_ms']:>11} {total['error_rate']:>7.2%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the Flask and ASGI apps")
+    parser.add_argument('--parity-only', action='store_true')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[16, 64, 256])
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--email-latency', type=float, default=0.2, help="Seconds per email send")
+    parser.add_argument('--port', type=int, default=18083)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='bench_asgi_')
+    try:
+        mismatches = parity(tmpdir)
+        if not args.parity_only:
+            capacity(tmpdir, args)
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
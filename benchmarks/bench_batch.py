@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Batch chat replay throughput and memory
+
+Generates a synthetic NDJSON chat log (many sessions, interleaved turns),
+replays it through `main.py --batch` with different worker counts, and
+checks that every session's answers come back in input order:
+
+    python -m benchmarks.bench_batch --queries 200000 --workers 0 1 2 4
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MESSAGES = [
+    "hi there",
+    "show me the menu",
+    "do you have vegetarian options?",
+    "book a table for 2 tomorrow at 7pm",
+    "what time do you open on sunday",
+    "check booking BK12345678",
+    "I need to cancel BK12345678",
+    "thanks so much!",
+    "the food was cold last time",
+]
+
+
+def write_log(path, queries, sessions):
+    rng = random.Random(7)
+    with open(path, 'w') as f:
+        for i in range(queries):
+            f.write(json.dumps({'session_id': f's{rng.randrange(sessions)}', 'id': i,
+                                'message': rng.choice(MESSAGES)}) + '\n')
+
+
+def replay(log_path, out_path, workers, db_path):
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, 'main.py', '--batch', log_path, '--workers', str(workers), '--output', out_path],
+        cwd=REPO_ROOT, stderr=subprocess.DEVNULL, env=dict(os.environ, DATABASE_PATH=db_path),
+    )
+    # wait4 reports this run's peak RSS (the largest single process, not a sum)
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    elapsed = time.perf_counter() - started
+    if process.returncode:
+        raise RuntimeError(f'main.py --batch exited with {process.returncode}')
+    return elapsed, usage.ru_maxrss / 1024
+
+
+def check_order(out_path):
+    """Count results and session order violations without loading the file"""
+    last_seq, count, violations = {}, 0, 0
+    with open(out_path) as f:
+        for line in f:
+            result = json.loads(line)
+            count += 1
+            session = result.get('session_id')
+            if last_seq.get(session, 0) > result['seq']:
+                violations += 1
+            last_seq[session] = result['seq']
+    return count, violations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark main.py --batch")
+    parser.add_argument('--queries', type=int, default=200000)
+    parser.add_argument('--sessions', type=int, default=5000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[0, 1, 2, 4])
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='bench_batch_')
+    try:
+        log_path = os.path.join(tmpdir, 'chats.ndjson')
+        write_log(log_path, args.queries, args.sessions)
+        print(f"{args.queries} queries across {args.sessions} sessions "
+              f"({os.path.getsize(log_path) / 1e6:.1f} MB), {os.cpu_count()} CPUs\n")
+        print(f"{'workers':>7} {'seconds':>8} {'queries/s':>10} {'peak RSS':>9}  order")
+        for workers in args.workers:
+            out_path = os.path.join(tmpdir, f'out-{workers}.ndjson')
+            elapsed, peak_mb = replay(log_path, out_path, workers, os.path.join(tmpdir, 'bench.db'))
+            count, violations = check_order(out_path)
+            rss = f"{peak_mb:.0f} MB"
+            status = 'ok' if count == args.queries and not violations else f'{violations} out of order, {count} results'
+            print(f"{workers:>7} {elapsed:>8.2f} {count / elapsed:>10.0f} {rss:>9}  {status}")
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Booking lookup latency with and without the read-through cache
+
+    python -m benchmarks.bench_booking_cache --bookings 10000 --lookups 20000
+"""
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from benchmarks.datasets import create_database
+
+
+def timed_lookups(func, ids, lookups):
+    started = time.perf_counter()
+    for _ in range(lookups):
+        func(random.choice(ids))
+    return (time.perf_counter() - started) / lookups * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cached booking lookups")
+    parser.add_argument('--bookings', type=int, default=10000)
+    parser.add_argument('--lookups', type=int, default=20000)
+    parser.add_argument('--hot', type=int, default=200, help="Distinct bookings looked up")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='bench_booking_cache_')
+    try:
+        db_path = os.path.join(tmpdir, 'restaurant.db')
+        ids = create_database(db_path, args.bookings)
+        hot = random.Random(1).sample(ids, args.hot)
+        os.environ['RATE_LIMIT_DB'] = os.path.join(tmpdir, 'ratelimit.db')
+
+        import database
+        from app import create_app
+        app = create_app({'DATABASE_PATH': db_path, 'RATE_LIMIT_ENABLED': False})
+        client = app.test_client()
+        client.get('/api/info')
+
+        def uncached(booking_id):
+            database._clear_booking_cache()
+            database.get_booking(booking_id)
+
+        results = [
+            ('get_booking, cache cleared', timed_lookups(uncached, hot, args.lookups)),
+            ('get_booking, cached', timed_lookups(database.get_booking, hot, args.lookups)),
+        ]
+
+        etags = {b: client.get(f'/api/bookings/{b}').headers['ETag'] for b in hot}
+        results.append(('GET /api/bookings/<id> 200',
+                        timed_lookups(lambda b: client.get(f'/api/bookings/{b}'), hot, args.lookups // 4)))
+        results.append(('GET /api/bookings/<id> 304',
+                        timed_lookups(lambda b: client.get(f'/api/bookings/{b}',
+                                                           headers={'If-None-Match': etags[b]}),
+                                      hot, args.lookups // 4)))
+
+        print(f"{args.bookings} bookings, {args.hot} hot IDs\n")
+        for name, micros in results:
+            print(f"{name:<32} {micros:>8.1f} us/lookup")
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Fuzzy booking lookup latency on a large bookings table
+
+Seeds bookings with varied guest names (the trigram index is filled by its
+triggers as they go in), then times booking_search.search_bookings() for
+the lookups guests and staff make, next to the LIKE scan it replaces:
+
+    python -m benchmarks.bench_booking_search --bookings 1000000
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+
+import booking_search
+import database
+from benchmarks.datasets import BOOKING_COLUMNS, FIRST_NAMES, create_database, make_bookings
+
+# Surnames are built from these, so names repeat about as often as real ones do
+SYLLABLES = ['al', 'bar', 'ben', 'cor', 'dan', 'el', 'fer', 'gor', 'han', 'is', 'kov', 'lan', 'mar', 'nor',
+             'os', 'per', 'ram', 'ros', 'sal', 'ten', 'tor', 'vel', 'wick', 'zan']
+
+
+def seed(db_path: str, count: int):
+    create_database(db_path)
+    rng = random.Random(11)
+    rows = []
+    for row in make_bookings(count):
+        first = rng.choice(FIRST_NAMES)
+        last = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+        rows.append((row[0], f'{first} {last}', f'{first.lower()}.{last.lower()}{rng.randrange(100)}@example.com')
+                    + row[3:])
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.executemany(f"INSERT INTO bookings ({', '.join(BOOKING_COLUMNS)}) "
+                         f"VALUES ({', '.join('?' * len(BOOKING_COLUMNS))})", rows)
+    conn.close()
+
+
+def _median_ms(func, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - started) * 1000)
+    return sorted(times)[len(times) // 2]
+
+
+def _typo(name: str, rng: random.Random) -> str:
+    """Swap one letter of the surname for another"""
+    first, last = name.split(' ', 1)
+    i = rng.randrange(1, len(last))
+    return f"{first} {last[:i]}{rng.choice('aeiouy')}{last[i + 1:]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark fuzzy booking search")
+    parser.add_argument('--bookings', type=int, default=1000000)
+    parser.add_argument('--lookups', type=int, default=20)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='bench_booking_search_')
+    try:
+        db_path = os.path.join(tmpdir, 'restaurant.db')
+        started = time.perf_counter()
+        seed(db_path, args.bookings)
+        seeded = time.perf_counter() - started
+        database.configure(db_path)
+
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = sqlite3.Row
+        rng = random.Random(3)
+        sample = [dict(conn.execute('SELECT * FROM bookings WHERE rowid = ?', (rowid,)).fetchone())
+                  for rowid in rng.sample(range(3, args.bookings + 3), args.lookups)]
+        pages = conn.execute('PRAGMA page_count').fetchone()[0] * conn.execute('PRAGMA page_size').fetchone()[0]
+        index_bytes = conn.execute(
+            "SELECT SUM(pgsize) FROM dbstat WHERE name LIKE 'bookings_search%'"
+        ).fetchone()[0] if conn.execute("SELECT 1 FROM pragma_module_list WHERE name = 'dbstat'").fetchone() else 0
+        print(f"{args.bookings} bookings seeded in {seeded:.0f}s; database {pages / 1e6:.0f} MB"
+              + (f", search index {index_bytes / 1e6:.0f} MB" if index_bytes else '') + '\n')
+
+        def run(make_kwargs):
+            found = 0
+            for booking in sample:
+                results = booking_search.search_bookings(**make_kwargs(booking), limit=5)
+                found += any(result['id'] == booking['id'] for result in results)
+            return found
+
+        lookups = {
+            'exact name': lambda b: {'name': b['customer']},
+            'misspelt name': lambda b: {'name': _typo(b['customer'], random.Random(b['id']))},
+            'misspelt name + date': lambda b: {'name': _typo(b['customer'], random.Random(b['id'])),
+                                               'date_from': b['date'], 'date_to': b['date']},
+            'name + phone': lambda b: {'name': b['customer'], 'phone': b['phone']},
+            'last 7 phone digits': lambda b: {'phone': b['phone'][-7:]},
+            'email': lambda b: {'email': b['email']},
+        }
+        print(f"{'lookup':<22} {'median ms':>10} {'found in top 5':>15}")
+        for name, make_kwargs in lookups.items():
+            found = run(make_kwargs)
+            per_lookup = _median_ms(lambda: run(make_kwargs), 3) / len(sample)
+            print(f"{name:<22} {per_lookup:>10.2f} {found:>9}/{len(sample)}")
+
+        def like_scan():
+            booking = sample[0]
+            conn.execute('SELECT * FROM bookings WHERE lower(customer) LIKE ? LIMIT 500',
+                         (f"%{booking['customer'].lower()}%",)).fetchall()
+            conn.execute("SELECT * FROM bookings WHERE phone LIKE ?", (f"%{booking['phone'][-7:]}",)).fetchall()
+        print(f"\nLIKE scan (name, then phone suffix): {_median_ms(like_scan, 3):.0f} ms")
+
+        def insert():
+            with conn:
+                conn.execute("INSERT INTO bookings (id, customer, email, phone, date, time, guests) "
+                             "VALUES (?, 'Bench Guest', 'bench@example.com', '+1 555 0100', '2030-01-01', '19:00', 2)",
+                             (f"BENCH{rng.randrange(10 ** 9)}",))
+        print(f"insert one booking (index maintained by trigger): {_median_ms(insert, 50):.2f} ms")
+        conn.close()
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
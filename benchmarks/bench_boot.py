@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Worker boot time and memory benchmark
+
+Starts gunicorn, waits for the first successful response, warms every
+worker up with menu/chat traffic, then reads each worker's memory from
+/proc (Linux only). Run from the repository root:
+
+    python -m benchmarks.bench_boot
+    python -m benchmarks.bench_boot --config none --app app:app   # plain gunicorn
+"""
+
+import argparse
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from typing import Dict, List
+
+
+def _get(url: str, timeout: float = 5.0) -> int:
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        response.read()
+        return response.status
+
+
+def _post_json(url: str, payload: Dict, timeout: float = 5.0) -> int:
+    request = urllib.request.Request(
+        url, data=json.dumps(payload).encode(), headers={'Content-Type': 'application/json'}
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        response.read()
+        return response.status
+
+
+def worker_pids(master_pid: int) -> List[int]:
+    """Child processes of the gunicorn master"""
+    with open(f"/proc/{master_pid}/task/{master_pid}/children") as f:
+        return [int(pid) for pid in f.read().split()]
+
+
+def memory_kib(pid: int) -> Dict[str, int]:
+    """RSS, PSS and private (USS) memory of a process in KiB"""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0].rstrip(':') in ('Rss', 'Pss', 'Private_Clean', 'Private_Dirty'):
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return {
+        'rss': fields['Rss'],
+        'pss': fields['Pss'],
+        'uss': fields['Private_Clean'] + fields['Private_Dirty'],
+    }
+
+
+def run(app: str, config: str, workers: int, port: int, warmup: int) -> Dict:
+    """Boot gunicorn once and collect timings and memory"""
+    tmpdir = tempfile.mkdtemp(prefix='bench_boot_')
+    db_path = os.path.join(tmpdir, 'restaurant.db')
+    if os.path.exists('restaurant.db'):
+        shutil.copy('restaurant.db', db_path)
+
+    cmd = [sys.executable, '-m', 'gunicorn', '--workers', str(workers),
+           '--bind', f'127.0.0.1:{port}', '--log-level', 'warning',
+           '--access-logfile', '/dev/null']
+    if config != 'none':
+        cmd += ['-c', config]
+    cmd.append(app)
+
+    env = dict(os.environ, DATABASE_PATH=db_path)
+    base = f'http://127.0.0.1:{port}'
+    started = time.perf_counter()
+    proc = subprocess.Popen(cmd, env=env)
+    try:
+        while True:
+            try:
+                _get(f'{base}/api/info', timeout=1.0)
+                break
+            except OSError:
+                if proc.poll() is not None:
+                    raise RuntimeError("gunicorn exited during startup")
+                if time.perf_counter() - started > 60:
+                    raise RuntimeError("gunicorn did not answer within 60s")
+                time.sleep(0.02)
+        boot_seconds = time.perf_counter() - started
+
+        # Spread warm-up traffic so every worker initializes lazily created state
+        first_requests = []
+        for i in range(warmup):
+            t0 = time.perf_counter()
+            _get(f'{base}/api/menu')
+            _post_json(f'{base}/api/chat', {'message': 'What do you recommend?'})
+            if i < workers:
+                first_requests.append(time.perf_counter() - t0)
+
+        memory = [memory_kib(pid) for pid in worker_pids(proc.pid)]
+        master = memory_kib(proc.pid)
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=30)
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    def avg(key):
+        return round(sum(m[key] for m in memory) / len(memory)) if memory else 0
+
+    return {
+        'app': app,
+        'config': config,
+        'workers': len(memory),
+        'boot_seconds': round(boot_seconds, 3),
+        'first_request_ms': [round(t * 1000, 1) for t in first_requests],
+        'master_kib': master,
+        'worker_avg_kib': {'rss': avg('rss'), 'pss': avg('pss'), 'uss': avg('uss')},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure gunicorn worker boot time and memory")
+    parser.add_argument('--app', default='app:app')
+    parser.add_argument('--config', default='gunicorn.conf.py', help="Config file, or 'none'")
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--port', type=int, default=18080)
+    parser.add_argument('--warmup', type=int, default=40)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    results = [run(args.app, args.config, args.workers, args.port, args.warmup) for _ in range(args.runs)]
+    best = min(results, key=lambda r: r['boot_seconds'])
+    print(json.dumps(best, indent=2))
+
+
+if __name__ == '__main__':
+    main()
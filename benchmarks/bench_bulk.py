@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Bulk import/export throughput
+
+Writes a synthetic CSV and NDJSON file, imports each into a fresh database,
+re-imports to exercise deduplication, then streams the table back out:
+
+    python -m benchmarks.bench_bulk --rows 1000000
+"""
+
+import argparse
+import csv
+import json
+import os
+import resource
+import shutil
+import tempfile
+import time
+
+import bulk
+import database
+from benchmarks.datasets import BOOKING_COLUMNS, create_database, make_bookings
+
+
+def _max_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def write_files(tmpdir, rows):
+    csv_path = os.path.join(tmpdir, 'bookings.csv')
+    with open(csv_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(BOOKING_COLUMNS)
+        writer.writerows(rows)
+    ndjson_path = os.path.join(tmpdir, 'bookings.ndjson')
+    with open(ndjson_path, 'w') as f:
+        for row in rows:
+            f.write(json.dumps(dict(zip(BOOKING_COLUMNS, row))) + '\n')
+    return {'csv': csv_path, 'ndjson': ndjson_path}
+
+
+def timed_import(path, fmt):
+    with open(path, newline='', encoding='utf-8') as f:
+        return bulk.import_bookings(f, fmt)
+
+
+def timed_export(fmt):
+    started = time.perf_counter()
+    size = sum(len(chunk) for chunk in bulk.export_bookings(fmt))
+    return time.perf_counter() - started, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bulk booking import/export")
+    parser.add_argument('--rows', type=int, default=1000000)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='bench_bulk_')
+    try:
+        rows = make_bookings(args.rows)
+        files = write_files(tmpdir, rows)
+        del rows
+        print(f"{args.rows} rows, CSV {os.path.getsize(files['csv']) / 1e6:.0f} MB, "
+              f"NDJSON {os.path.getsize(files['ndjson']) / 1e6:.0f} MB\n")
+
+        for fmt, path in files.items():
+            db_path = os.path.join(tmpdir, f'{fmt}.db')
+            create_database(db_path)
+            database.configure(db_path)
+            first = timed_import(path, fmt)
+            again = timed_import(path, fmt)
+            print(f"import {fmt:<7} {first['seconds']:>7.1f}s {args.rows / first['seconds']:>9.0f} rows/s "
+                  f"(inserted {first['inserted']}, invalid {first['invalid']})")
+            print(f"re-import {fmt:<4} {again['seconds']:>7.1f}s  "
+                  f"(inserted {again['inserted']}, duplicates {again['duplicates']})")
+
+        rss_before = _max_rss_mb()
+        for fmt in bulk.FORMATS:
+            elapsed, size = timed_export(fmt)
+            print(f"export {fmt:<7} {elapsed:>7.1f}s {args.rows / elapsed:>9.0f} rows/s "
+                  f"{size / 1e6 / elapsed:>6.0f} MB/s")
+        print(f"\npeak RSS growth during export: {_max_rss_mb() - rss_before:.1f} MB")
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
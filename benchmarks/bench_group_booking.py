@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Group booking vs. one POST /api/bookings per reservation
+
+Creates the same set of event reservations both ways against a local
+gunicorn and reports HTTP round trips, total latency and emails sent:
+
+    python -m benchmarks.bench_group_booking --sizes 5 10 25 --repeat 20
+"""
+
+import argparse
+import http.client
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+from benchmarks.datasets import create_database
+from benchmarks.load_test import start_server
+
+
+def _post(conn, path, payload):
+    conn.request('POST', path, body=json.dumps(payload), headers={'Content-Type': 'application/json'})
+    response = conn.getresponse()
+    body = response.read()
+    if response.status != 200:
+        raise RuntimeError(f"{path} -> {response.status}: {body[:200]!r}")
+    return json.loads(body)
+
+
+def make_event(size):
+    return {
+        'customer': 'Bench Event', 'email': 'events@example.com', 'name': 'Benchmark Gala',
+        'bookings': [{'date': '2030-06-01', 'time': ('18:00', '20:30')[i % 2],
+                      'guests': 8, 'table_pref': f'Hall-{i}'} for i in range(size)],
+    }
+
+
+def one_by_one(conn, event):
+    started = time.perf_counter()
+    for booking in event['bookings']:
+        _post(conn, '/api/bookings', dict(booking, customer=event['customer'], email=event['email']))
+    return time.perf_counter() - started, len(event['bookings'])
+
+
+def grouped(conn, event):
+    started = time.perf_counter()
+    _post(conn, '/api/bookings/group', event)
+    return time.perf_counter() - started, 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark group bookings against individual POSTs")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5, 10, 25])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--port', type=int, default=18083)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='bench_group_')
+    try:
+        db_path = os.path.join(tmpdir, 'restaurant.db')
+        create_database(db_path, 5000)
+        with start_server(db_path, port=args.port, workers=1) as base:
+            conn = http.client.HTTPConnection(base, timeout=30)
+            print(f"{'bookings':>8} {'path':<12} {'round trips':>11} {'emails':>6} {'median ms':>10} {'p95 ms':>8}")
+            for size in args.sizes:
+                event = make_event(size)
+                for name, func, emails in (('one-by-one', one_by_one, size), ('group', grouped, 1)):
+                    func(conn, event)  # warm-up
+                    samples = sorted(func(conn, event)[0] * 1000 for _ in range(args.repeat))
+                    trips = func(conn, event)[1]
+                    p95 = samples[max(0, round(0.95 * len(samples)) - 1)]
+                    print(f"{size:>8} {name:<12} {trips:>11} {emails:>6} "
+                          f"{statistics.median(samples):>10.1f} {p95:>8.1f}")
+            conn.close()
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Duplicate bookings from client retries, with and without Idempotency-Key
+
+Simulates the booking form on a flaky network: every booking is sent, and
+with probability --retry-rate the client never sees the answer and sends it
+again (up to --max-retries times). Without a key each retry is a new booking
+and a new confirmation email; with a key the retries are replays. Also
+reports the latency of a fresh create against a replay:
+
+    python -m benchmarks.bench_idempotency --bookings 300 --retry-rate 0.3
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+import uuid
+
+import app as restaurant_app
+import database
+from email_service import EmailService
+
+
+def _client(tmpdir, name):
+    app = restaurant_app.create_app({
+        'DATABASE_PATH': os.path.join(tmpdir, f'{name}.db'),
+        'IDEMPOTENCY_DB': os.path.join(tmpdir, f'{name}.idempotency'),
+        'RATE_LIMIT_ENABLED': False,
+        'RATE_LIMIT_DB': os.path.join(tmpdir, f'{name}.ratelimit'),
+        'TENANTS_FILE': os.path.join(tmpdir, 'no-tenants.json'),
+    })
+    with contextlib.redirect_stdout(io.StringIO()):
+        database.ensure_database()
+    return app.test_client()
+
+
+def run(tmpdir, name, args, use_keys):
+    client = _client(tmpdir, name)
+    rng = random.Random(args.seed)
+    emails = []
+    original = EmailService._deliver
+    EmailService._deliver = lambda self, *a, **k: emails.append(a[0]) or True
+    create_ms, replay_ms = [], []
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            with database.get_db_connection() as conn:
+                before = conn.execute('SELECT COUNT(*) FROM bookings').fetchone()[0]
+            for i in range(args.bookings):
+                booking = {'customer': f'Guest {i}', 'email': f'guest{i}@example.com',
+                           'date': '2031-01-01', 'time': '19:00', 'guests': 2}
+                headers = {'Idempotency-Key': str(uuid.uuid4())} if use_keys else {}
+                attempts = 1
+                while attempts <= args.max_retries and rng.random() < args.retry_rate:
+                    attempts += 1
+                for attempt in range(attempts):
+                    started = time.perf_counter()
+                    response = client.post('/api/bookings', json=booking, headers=headers)
+                    elapsed = (time.perf_counter() - started) * 1000
+                    assert response.status_code == 200, response.get_data(as_text=True)
+                    (replay_ms if response.headers.get('Idempotent-Replayed') else create_ms).append(elapsed)
+            with database.get_db_connection() as conn:
+                rows = conn.execute('SELECT COUNT(*) FROM bookings').fetchone()[0] - before
+    finally:
+        EmailService._deliver = original
+    return rows, len(emails), len(create_ms) + len(replay_ms), create_ms, replay_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark duplicate work from booking retries")
+    parser.add_argument('--bookings', type=int, default=300)
+    parser.add_argument('--retry-rate', type=float, default=0.3)
+    parser.add_argument('--max-retries', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='bench_idempotency_')
+    try:
+        print(f"{args.bookings} bookings, retry rate {args.retry_rate:g}, up to {args.max_retries} retries\n")
+        print(f"{'mode':<10} {'requests':>9} {'rows':>6} {'emails':>7} {'create p50':>11} {'replay p50':>11}")
+        for name, use_keys in (('no key', False), ('with key', True)):
+            rows, emails, requests, create_ms, replay_ms = run(tmpdir, name.replace(' ', '-'), args, use_keys)
+            create = f"{statistics.median(create_ms):.2f}ms" if create_ms else '-'
+            replay = f"{statistics.median(replay_ms):.2f}ms" if replay_ms else '-'
+            print(f"{name:<10} {requests:>9} {rows:>6} {emails:>7} {create:>11} {replay:>11}")
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
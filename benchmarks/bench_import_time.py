@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Cold-start import benchmark
+
+Breaks down `python -X importtime -c "import app"` into the slowest modules
+and checks it against the startup budget used by deploy.py:
+
+    python -m benchmarks.bench_import_time
+    python -m benchmarks.bench_import_time --module agent --top 15
+"""
+
+import argparse
+import sys
+
+from deploy import AgentDeployer, STARTUP_BUDGET_MS, measure_import_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold import time")
+    parser.add_argument('--module', default='app')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    total_ms, entries = measure_import_time(args.module, runs=args.runs)
+    print(f"import {args.module}: {total_ms:.1f} ms (best of {args.runs}, budget {STARTUP_BUDGET_MS:.0f} ms)\n")
+
+    print(f"{'self ms':>9} {'cumul ms':>9}  module")
+    for entry in sorted(entries, key=lambda e: e['self_ms'], reverse=True)[:args.top]:
+        print(f"{entry['self_ms']:9.1f} {entry['cumulative_ms']:9.1f}  {entry['name']}")
+    print()
+
+    sys.exit(0 if AgentDeployer.check_startup_budget(args.module) else 1)
+
+
+if __name__ == '__main__':
+    main()
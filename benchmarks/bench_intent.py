@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Intent routing accuracy and throughput
+
+Compares the hashed n-gram classifier against the original keyword router
+on the bundled corpus with k-fold cross-validation (the classifier never
+sees the messages it is scored on), prints confusion matrices, and times
+batch vs. per-message classification:
+
+    python -m benchmarks.bench_intent --folds 5 --messages 10000
+"""
+
+import argparse
+import time
+from collections import Counter
+from typing import Dict, List
+
+import numpy as np
+
+from agent import MIN_INTENT_CONFIDENCE, GastroGuideAgent
+from intent_classifier import IntentClassifier, load_corpus
+
+
+def confusion_matrix(labels: List[str], actual: List[str], predicted: List[str]) -> str:
+    counts = Counter(zip(actual, predicted))
+    short = [label[:8] for label in labels]
+    lines = [f"{'actual / predicted':<18}" + ''.join(f'{s:>9}' for s in short)]
+    for label in labels:
+        lines.append(f'{label:<18}' + ''.join(f'{counts[(label, p)]:>9}' for p in labels))
+    return '\n'.join(lines)
+
+
+def cross_validate(texts, labels, folds: int, agent: GastroGuideAgent) -> Dict[str, List[str]]:
+    """Out-of-fold predictions for the classifier, the hybrid router and the keyword router"""
+    predictions = {'classifier': [None] * len(texts), 'classifier + fallback': [None] * len(texts)}
+    classes = sorted(set(labels))
+    for fold in range(folds):
+        train = [i for i in range(len(texts)) if i % folds != fold]
+        test = [i for i in range(len(texts)) if i % folds == fold]
+        model = IntentClassifier(classes).fit([texts[i] for i in train], [labels[i] for i in train])
+        predicted, confidence = model.predict([texts[i] for i in test])
+        for i, label, score in zip(test, predicted, confidence):
+            predictions['classifier'][i] = label
+            predictions['classifier + fallback'][i] = (
+                label if score >= MIN_INTENT_CONFIDENCE else agent._keyword_intent(texts[i].lower())
+            )
+    predictions['keyword router'] = [agent._keyword_intent(text.lower()) for text in texts]
+    return predictions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark intent classification")
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--messages', type=int, default=10000)
+    args = parser.parse_args()
+
+    texts, labels = load_corpus()
+    classes = sorted(set(labels))
+    agent = GastroGuideAgent()
+
+    print(f"{len(texts)} labeled messages, {len(classes)} intents, {args.folds}-fold cross-validation\n")
+    predictions = cross_validate(texts, labels, args.folds, agent)
+    for name, predicted in predictions.items():
+        accuracy = np.mean([p == a for p, a in zip(predicted, labels)])
+        print(f"{name:<24} accuracy {accuracy:6.1%}")
+    for name in ('classifier + fallback', 'keyword router'):
+        print(f"\nConfusion matrix: {name}")
+        print(confusion_matrix(classes, labels, predictions[name]))
+
+    # Throughput on a batch of corpus messages (model trained on everything)
+    rng = np.random.default_rng(0)
+    batch = [texts[i] for i in rng.integers(0, len(texts), args.messages)]
+    agent.classify_batch(batch[:10])  # load the model outside the timings
+
+    timings = {}
+    started = time.perf_counter()
+    agent.classify_batch(batch)
+    timings['classify_batch (one call)'] = time.perf_counter() - started
+    sample = batch[:1000]
+    started = time.perf_counter()
+    for message in sample:
+        agent._classify_intent(message)
+    timings['_classify_intent per message'] = (time.perf_counter() - started) * len(batch) / len(sample)
+    started = time.perf_counter()
+    for message in batch:
+        agent._keyword_intent(message.lower())
+    timings['keyword router'] = time.perf_counter() - started
+
+    print(f"\nThroughput, {args.messages} messages:")
+    for name, elapsed in timings.items():
+        print(f"{name:<30} {elapsed * 1000:>8.1f} ms {args.messages / elapsed:>10.0f} msg/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Menu page paint timings on a throttled mobile profile
+
+Loads the prerendered /menu.html and the client-rendered page it replaced
+(static/menu.html served as-is, which fetches /api/menu after load) in
+headless Chromium with network and CPU throttling, and reports first
+contentful paint, when the first menu card was painted, largest
+contentful paint and cumulative layout shift. Every run uses a cold cache.
+
+Needs Playwright (pip install playwright) and a Chromium build; pass
+--chrome to use one that Playwright didn't download:
+
+    python -m benchmarks.bench_menu_paint --runs 5
+    python -m benchmarks.bench_menu_paint --chrome /path/to/chrome-headless-shell
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import statistics
+import tempfile
+import threading
+
+from flask import send_from_directory
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+import app as restaurant_app
+
+# Lighthouse's mobile profile ("Slow 4G" on a mid-range phone)
+PROFILES = {
+    'slow-4g': {'latency_ms': 150, 'down_kbps': 1638, 'up_kbps': 750, 'cpu_slowdown': 4},
+    'fast-3g': {'latency_ms': 563, 'down_kbps': 1474, 'up_kbps': 675, 'cpu_slowdown': 4},
+    'none': {'latency_ms': 0, 'down_kbps': 0, 'up_kbps': 0, 'cpu_slowdown': 1},
+}
+
+PAGES = {
+    'client-rendered': '/menu-client.html',
+    'prerendered': '/menu.html',
+}
+
+# Collects paint timings from the page as it loads
+OBSERVER_SCRIPT = """
+window.__paint = { cls: 0 };
+new PerformanceObserver(list => {
+    for (const entry of list.getEntries()) {
+        if (entry.name === 'first-contentful-paint') window.__paint.fcp = entry.startTime;
+    }
+}).observe({ type: 'paint', buffered: true });
+new PerformanceObserver(list => {
+    const entries = list.getEntries();
+    window.__paint.lcp = entries[entries.length - 1].startTime;
+}).observe({ type: 'largest-contentful-paint', buffered: true });
+new PerformanceObserver(list => {
+    for (const entry of list.getEntries()) {
+        if (!entry.hadRecentInput) window.__paint.cls += entry.value;
+    }
+}).observe({ type: 'layout-shift', buffered: true });
+(function waitForMenu() {
+    if (document.querySelector('.menu-item')) {
+        requestAnimationFrame(() => { window.__paint.menu = performance.now(); });
+    } else {
+        requestAnimationFrame(waitForMenu);
+    }
+})();
+"""
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def start_server(tmpdir):
+    app = restaurant_app.create_app({
+        'DATABASE_PATH': os.path.join(tmpdir, 'restaurant.db'),
+        'IDEMPOTENCY_DB': os.path.join(tmpdir, 'idempotency.db'),
+        'RATE_LIMIT_ENABLED': False,
+        'RATE_LIMIT_DB': os.path.join(tmpdir, 'ratelimit.db'),
+        'TENANTS_FILE': os.path.join(tmpdir, 'no-tenants.json'),
+    })
+    # The page as it was before prerendering: the static file, menu fetched by JS
+    app.add_url_rule('/menu-client.html', 'menu_client',
+                     lambda: send_from_directory(os.path.abspath('static'), 'menu.html'))
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=_QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def measure(browser, url, profile):
+    context = browser.new_context(viewport={'width': 412, 'height': 823}, device_scale_factor=2.6,
+                                  is_mobile=True, has_touch=True)
+    try:
+        page = context.new_page()
+        cdp = context.new_cdp_session(page)
+        cdp.send('Network.enable')
+        if profile['latency_ms']:
+            cdp.send('Network.emulateNetworkConditions', {
+                'offline': False,
+                'latency': profile['latency_ms'],
+                'downloadThroughput': profile['down_kbps'] * 1024 / 8,
+                'uploadThroughput': profile['up_kbps'] * 1024 / 8,
+            })
+        cdp.send('Emulation.setCPUThrottlingRate', {'rate': profile['cpu_slowdown']})
+        page.add_init_script(OBSERVER_SCRIPT)
+        page.goto(url, wait_until='load', timeout=120000)
+        page.wait_for_function('window.__paint && window.__paint.menu !== undefined', timeout=120000)
+        page.wait_for_timeout(1000)  # let LCP and layout shifts settle
+        return page.evaluate('window.__paint')
+    finally:
+        context.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark menu page paint timings")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='slow-4g')
+    parser.add_argument('--chrome', help="Chromium executable (default: Playwright's own)")
+    args = parser.parse_args()
+
+    try:
+        from playwright.sync_api import sync_playwright
+    except ImportError:
+        parser.error('needs Playwright: pip install playwright')
+
+    profile = PROFILES[args.profile]
+    tmpdir = tempfile.mkdtemp(prefix='bench_menu_paint_')
+    server = None
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            server = start_server(tmpdir)
+        base = f'http://127.0.0.1:{server.server_port}'
+        print(f"{args.profile}: {profile['latency_ms']}ms RTT, {profile['down_kbps']} kbps down, "
+              f"{profile['cpu_slowdown']}x CPU slowdown; median of {args.runs} cold loads\n")
+        print(f"{'page':<16} {'FCP':>8} {'menu':>8} {'LCP':>8} {'CLS':>6}")
+        with sync_playwright() as playwright:
+            browser = playwright.chromium.launch(executable_path=args.chrome)
+            try:
+                for name, path in PAGES.items():
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        runs = [measure(browser, base + path, profile) for _ in range(args.runs)]
+                    median = lambda key: statistics.median(run.get(key) or 0 for run in runs)
+                    print(f"{name:<16} {median('fcp'):>6.0f}ms {median('menu'):>6.0f}ms "
+                          f"{median('lcp'):>6.0f}ms {median('cls'):>6.3f}")
+            finally:
+                browser.close()
+    finally:
+        if server is not None:
+            server.shutdown()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
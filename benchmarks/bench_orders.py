@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Order submission throughput: batched writer vs a commit per order
+
+Simulates a dinner rush: N clients each place orders back to back for a few
+seconds, through orders.place_order() (the write-behind queue, one
+transaction per batch) and, for comparison, committing each order in its
+own transaction from the client's thread as a plain handler would. Reports
+sustained orders/sec, p50/p99 latency (submit to committed) and the mean
+batch size:
+
+    python -m benchmarks.bench_orders --clients 1 8 32 128 --seconds 5
+"""
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+import database
+import metrics
+import orders
+from benchmarks.datasets import create_database
+
+
+def _random_order(menu, rng):
+    return {
+        'customer': 'Bench Guest',
+        'items': [{'id': item['id'], 'quantity': rng.randint(1, 3), 'price': item['price']}
+                  for item in rng.sample(menu, rng.randint(1, 4))],
+    }
+
+
+def place_per_order(data, menu):
+    """The unbatched baseline: validate, then commit on this thread"""
+    order = orders.prepare_order(data, menu)
+    conn = database.get_db_connection()
+    try:
+        orders.write_orders(conn, [order])
+    finally:
+        conn.close()
+    return order
+
+
+def run(place, menu, clients: int, seconds: float):
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client(seed):
+        rng = random.Random(seed)
+        mine = []
+        while time.perf_counter() < deadline:
+            data = _random_order(menu, rng)
+            started = time.perf_counter()
+            try:
+                place(data, menu)
+            except Exception as e:
+                errors.append(e)
+                continue
+            mine.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(mine)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0.0
+
+    return len(latencies) / elapsed, pct(0.5), pct(0.99), len(errors)
+
+
+def _batches():
+    counters = metrics.collect()[1]
+    return counters.get(('orders_written_total', ()), 0), counters.get(('order_batches_total', ()), 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark order submission")
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 8, 32, 128])
+    parser.add_argument('--seconds', type=float, default=5)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='bench_orders_')
+    try:
+        db_path = os.path.join(tmpdir, 'restaurant.db')
+        create_database(db_path)
+        database.configure(db_path)
+        database.ensure_database()
+        menu = database.get_all_menu_items()
+
+        print(f"{'clients':>7} {'mode':<10} {'orders/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'batch':>6} {'errors':>6}")
+        for clients in args.clients:
+            for mode, place in (('per-order', place_per_order), ('batched', orders.place_order)):
+                written, batches = _batches()
+                rate, p50, p99, errors = run(place, menu, clients, args.seconds)
+                written, batches = (now - before for now, before in zip(_batches(), (written, batches)))
+                batch = f"{written / batches:.1f}" if batches else '1'
+                print(f"{clients:>7} {mode:<10} {rate:>9.0f} {p50:>8.2f} {p99:>8.2f} {batch:>6} {errors:>6}")
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
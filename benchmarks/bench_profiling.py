@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Cost of folding a cProfile profile into collapsed stacks
+
+Profiles a cold start (importing the app, creating it, first chat and menu
+requests) and an admin-triggered profiled chat request on the warm app,
+then times profiling.collapse_pstats() on each. Exits non-zero if either
+takes longer than --max-seconds, since the warm one runs inside the
+request it profiled:
+
+    python -m benchmarks.bench_profiling --max-seconds 1
+"""
+
+import argparse
+import cProfile
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import profiling
+
+CHAT = {'message': 'Book a table for 4 tomorrow at 7pm', 'context': {}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark collapsing request profiles")
+    parser.add_argument('--max-seconds', type=float, default=1.0)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='bench_profiling_')
+    try:
+        config = {'DATABASE_PATH': os.path.join(tmpdir, 'restaurant.db'), 'PROFILE_ENABLED': True,
+                  'PROFILE_DIR': os.path.join(tmpdir, 'profiles'), 'ADMIN_TOKEN': 'bench-token'}
+
+        cold = cProfile.Profile()
+        cold.enable()
+        import app as app_module
+        client = app_module.create_app(config).test_client()
+        client.post('/api/chat', json=CHAT)
+        client.get('/api/menu')
+        cold.disable()
+
+        started = time.perf_counter()
+        stacks = profiling.collapse_pstats(cold)
+        cold_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        response = client.post('/api/chat', json=CHAT, headers={'X-Profile': 'cprofile', 'X-Admin-Token': 'bench-token'})
+        request_seconds = time.perf_counter() - started
+        with open(os.path.join(config['PROFILE_DIR'], f"{response.headers['X-Profile-Id']}.collapsed")) as f:
+            warm_stacks = sum(1 for _ in f)
+
+        print(f"{'profile':<22} {'stacks':>7} {'seconds':>8}")
+        print(f"{'cold start collapse':<22} {len(stacks):>7} {cold_seconds:>8.3f}")
+        print(f"{'profiled chat request':<22} {warm_stacks:>7} {request_seconds:>8.3f}")
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    slowest = max(cold_seconds, request_seconds)
+    if slowest > args.max_seconds:
+        print(f"FAIL: {slowest:.3f}s exceeds --max-seconds {args.max_seconds}")
+    sys.exit(1 if slowest > args.max_seconds else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Reminder claim/send throughput
+
+Seeds a database with a busy evening of bookings (and their reminders, all
+due now) and drains the queue with several processes in parallel. Email
+delivery is replaced by a no-op so only queue overhead is measured; every
+reminder must be handled exactly once.
+
+    python -m benchmarks.bench_reminders --reminders 30000 --processes 4
+"""
+
+import argparse
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+import database
+import email_service
+import reminders
+from benchmarks.datasets import create_database
+
+
+def _drain(db_path):
+    database.configure(db_path)
+    email_service.EmailService.send_booking_reminder = lambda self, booking: True
+    return reminders.send_due()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark reminder claiming")
+    parser.add_argument('--reminders', type=int, default=30000)
+    parser.add_argument('--bookings', type=int, default=300000,
+                        help="Total bookings in the table (only --reminders have reminders)")
+    parser.add_argument('--processes', type=int, default=4)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='bench_reminders_')
+    try:
+        db_path = os.path.join(tmpdir, 'bench.db')
+        create_database(db_path, args.bookings)
+        database.configure(db_path)
+        database.ensure_database()
+
+        conn = sqlite3.connect(db_path)
+        ids = [row[0] for row in conn.execute(
+            "SELECT id FROM bookings WHERE status = 'confirmed' AND email IS NOT NULL LIMIT ?", (args.reminders,)
+        )]
+        now = time.time()
+        conn.executemany('INSERT INTO reminders (booking_id, send_at) VALUES (?, ?)',
+                         [(booking_id, now - i * 0.01) for i, booking_id in enumerate(ids)])
+        conn.commit()
+        plan = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT booking_id FROM reminders WHERE status = 'pending' "
+            "AND send_at <= ? ORDER BY send_at LIMIT 200", (now,)
+        ).fetchall()
+        print(f"{len(ids)} due reminders, {args.bookings} bookings")
+        print(f"claim query plan: {plan[0][-1]}\n")
+
+        started = time.perf_counter()
+        with multiprocessing.Pool(args.processes) as pool:
+            results = pool.map(_drain, [db_path] * args.processes)
+        elapsed = time.perf_counter() - started
+
+        handled = sum(sum(result.values()) for result in results)
+        left = conn.execute('SELECT COUNT(*) FROM reminders').fetchone()[0]
+        conn.close()
+        print(f"{args.processes} processes: {handled} handled in {elapsed:.2f}s "
+              f"({handled / elapsed:.0f}/s), per process {[sum(r.values()) for r in results]}")
+        status = 'ok' if handled == len(ids) and left == 0 else 'MISMATCH'
+        print(f"exactly once: {status} ({left} left in queue)")
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Booking write latency while heavy reports run, with and without the replica
+
+A writer books a table every --write-interval seconds (database.create_booking)
+while report threads stream the full NDJSON export to a slow client and
+total covers per day, over and over, as an admin dashboard would. Run three
+ways: no reports, reports on the live database, and reports on the
+read-only replica (refreshed every --refresh seconds during the run, so
+the cost of copying is included):
+
+    python -m benchmarks.bench_replica --bookings 200000 --seconds 15
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import bulk
+import database
+import replica
+from benchmarks.datasets import create_database
+
+REPORT_SQL = "SELECT date, SUM(guests) FROM bookings WHERE status = 'confirmed' GROUP BY date"
+
+
+def run_report(chunk_delay: float):
+    conn, _ = replica.connect()
+    for _ in bulk.export_bookings('ndjson', conn):
+        time.sleep(chunk_delay)  # the client reads slowly
+    conn, _ = replica.connect()
+    try:
+        conn.execute(REPORT_SQL).fetchall()
+    finally:
+        conn.close()
+
+
+def run(seconds: float, interval: float, reports: int, chunk_delay: float):
+    stop = threading.Event()
+    latencies, errors, reports_done = [], [], [0]
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                database.create_booking({'customer': 'Bench Guest', 'date': '2030-01-01', 'time': '19:00',
+                                         'guests': 2 + i % 4}, send_email=False)
+                latencies.append(time.perf_counter() - started)
+            except Exception as e:
+                errors.append(e)
+            i += 1
+            stop.wait(interval)
+
+    def reporter():
+        while not stop.is_set():
+            try:
+                run_report(chunk_delay)
+                reports_done[0] += 1
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reporter) for _ in range(reports)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0.0
+
+    return len(latencies), pct(0.5), pct(0.99), latencies[-1] * 1000 if latencies else 0.0, len(errors), reports_done[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark booking writes during reports, with and without the replica")
+    parser.add_argument('--bookings', type=int, default=200000)
+    parser.add_argument('--seconds', type=float, default=15)
+    parser.add_argument('--write-interval', type=float, default=0.02, help="Seconds between bookings")
+    parser.add_argument('--reports', type=int, default=2, help="Concurrent report threads")
+    parser.add_argument('--chunk-delay', type=float, default=0.002, help="Client delay per export chunk")
+    parser.add_argument('--refresh', type=float, default=5, help="Replica refresh interval (seconds)")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='bench_replica_')
+    try:
+        db_path = os.path.join(tmpdir, 'restaurant.db')
+        seeding = time.perf_counter()
+        create_database(db_path, args.bookings)
+        database.configure(db_path)
+        database.ensure_database()
+        size = os.path.getsize(db_path) / 1e6
+        print(f"{args.bookings} bookings ({size:.0f} MB) seeded in {time.perf_counter() - seeding:.0f}s; "
+              f"a booking every {args.write_interval * 1000:.0f} ms, {args.reports} report threads\n")
+
+        print(f"{'scenario':<20} {'writes':>7} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'errors':>7} {'reports':>8}")
+        scenarios = [('no reports', False, 0), ('reports on database', False, args.reports),
+                     ('reports on replica', True, args.reports)]
+        for name, use_replica, reports in scenarios:
+            replica.configure(use_replica, args.refresh)
+            if use_replica:
+                # Build the first copy before timing, as a running service would have one
+                while replica.age() is None:
+                    time.sleep(0.1)
+            writes, p50, p99, worst, errors, done = run(args.seconds, args.write_interval, reports, args.chunk_delay)
+            print(f"{name:<20} {writes:>7} {p50:>8.2f} {p99:>8.2f} {worst:>8.0f} {errors:>7} {done:>8}")
+
+        started = time.perf_counter()
+        stats = replica.refresh()
+        print(f"\nreplica refresh (idle): {stats['pages']} pages in {(time.perf_counter() - started) * 1000:.0f} ms")
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
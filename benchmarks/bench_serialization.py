@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Serialization throughput for the admin bookings listing
+
+Compares the old path (sqlite3.Row -> dict -> stdlib json) with orjson and
+with rows streamed straight from SQLite's json_object(), with and without
+gzip:
+
+    python -m benchmarks.bench_serialization --bookings 100000
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+
+import serialization
+from benchmarks.datasets import create_database
+from serialization import dumps, json_rows, gzip_stream
+
+QUERY = 'FROM bookings ORDER BY created_at DESC'
+
+
+def _connect(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def dict_stdlib(db_path):
+    conn = _connect(db_path)
+    rows = [dict(r) for r in conn.execute(f'SELECT * {QUERY}').fetchall()]
+    conn.close()
+    return [json.dumps({'success': True, 'bookings': rows, 'count': len(rows)}).encode()]
+
+
+def dict_fast(db_path):
+    conn = _connect(db_path)
+    rows = [dict(r) for r in conn.execute(f'SELECT * {QUERY}').fetchall()]
+    conn.close()
+    return [dumps({'success': True, 'bookings': rows, 'count': len(rows)})]
+
+
+def streamed(db_path):
+    conn = _connect(db_path)
+    columns = [row[1] for row in conn.execute('PRAGMA table_info(bookings)')]
+    yield b'{"success":true,"bookings":['
+    yield from json_rows(conn, columns, QUERY)
+    conn.close()
+    yield b']}'
+
+
+def streamed_gzip(db_path):
+    return gzip_stream(streamed(db_path))
+
+
+METHODS = {
+    'dict + stdlib json (old)': dict_stdlib,
+    f"dict + {'orjson' if serialization.orjson else 'stdlib (no orjson)'}": dict_fast,
+    'streamed json_object': streamed,
+    'streamed json_object + gzip': streamed_gzip,
+}
+
+
+def measure(method, db_path, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = sum(len(chunk) for chunk in method(db_path))
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    for _ in method(db_path):
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, size, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark booking list serialization")
+    parser.add_argument('--bookings', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='bench_serialization_')
+    try:
+        db_path = os.path.join(tmpdir, 'restaurant.db')
+        create_database(db_path, args.bookings)
+        print(f"{args.bookings} bookings, SQLite json_object: {serialization.SQLITE_JSON}\n")
+        print(f"{'method':<32} {'time ms':>9} {'rows/s':>10} {'MB out':>8} {'peak MB':>8}")
+        for name, method in METHODS.items():
+            elapsed, size, peak = measure(method, db_path, args.repeat)
+            print(f"{name:<32} {elapsed * 1000:>9.1f} {args.bookings / elapsed:>10.0f} "
+                  f"{size / 1e6:>8.2f} {peak / 1e6:>8.1f}")
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Booking write throughput vs number of locations
+
+Runs a fixed pool of writer processes, each creating bookings through
+database.create_booking() against a location picked round-robin. With one
+location every writer contends for the same SQLite write lock; with one
+database file per location the lock is split between them:
+
+    python -m benchmarks.bench_tenants --writers 8 --seconds 5 --locations 1 2 4 8
+"""
+
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+import database
+
+
+def _writer(args):
+    db_path, seconds, start_at = args
+    database.configure(db_path)
+    database.ensure_database()
+    time.sleep(max(0.0, start_at - time.time()))
+    done = errors = 0
+    deadline = start_at + seconds
+    # create_booking prints a note when there is no email to send
+    with contextlib.redirect_stdout(io.StringIO()):
+        while time.time() < deadline:
+            try:
+                database.create_booking({'customer': 'Bench', 'date': '2031-01-01', 'time': '19:00', 'guests': 2})
+                done += 1
+            except sqlite3.OperationalError:
+                errors += 1  # "database is locked" after the busy timeout
+    return done, errors
+
+
+def run(tmpdir, locations, writers, seconds):
+    paths = [os.path.join(tmpdir, f'location-{locations}-{i}.db') for i in range(locations)]
+    for path in paths:
+        database.configure(path)
+        database.ensure_database()
+    start_at = time.time() + 1.0
+    with multiprocessing.Pool(writers) as pool:
+        results = pool.map(_writer, [(paths[i % locations], seconds, start_at) for i in range(writers)])
+    return sum(r[0] for r in results), sum(r[1] for r in results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark write throughput across locations")
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--locations', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='bench_tenants_')
+    try:
+        print(f"{args.writers} writer processes, {args.seconds:g}s per run, {os.cpu_count()} CPUs\n")
+        print(f"{'locations':>9} {'bookings/s':>11} {'speedup':>8} {'lock errors':>12}")
+        baseline = None
+        for locations in args.locations:
+            done, errors = run(tmpdir, locations, args.writers, args.seconds)
+            rate = done / args.seconds
+            baseline = baseline or rate
+            print(f"{locations:>9} {rate:>11.0f} {rate / baseline:>7.2f}x {errors:>12}")
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
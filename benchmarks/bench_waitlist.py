@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Waitlist matching cost
+
+Fills the waitlist with parties spread over the next month, then cancels
+bookings and times how long it takes to pick the party to offer each freed
+table: through the in-memory index, and through the equivalent SQL query
+(which must sort the candidates in every slot on each cancellation).
+
+    python -m benchmarks.bench_waitlist --entries 100000 --cancellations 2000
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+
+import database
+import waitlist
+from benchmarks.datasets import TIMES
+
+_SQL_BEST = '''
+    SELECT id FROM waitlist
+    WHERE status = 'waiting' AND date = ? AND time_from <= ? AND time_to >= ? AND guests <= ?
+    ORDER BY guests DESC, joined_at LIMIT 1
+'''
+
+
+def seed(db_path, entries, days):
+    rng = random.Random(3)
+    today = date.today()
+    rows = []
+    for i in range(entries):
+        start = rng.randrange(len(TIMES) - 2)
+        rows.append((f'Guest {i}', f'guest{i}@example.com', (today + timedelta(days=rng.randrange(1, days))).isoformat(),
+                     TIMES[start], TIMES[start + rng.randrange(3)], rng.choice((1, 2, 2, 2, 3, 4, 4, 5, 6, 8)),
+                     time.time() - rng.random() * 86400 * 14))
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.executemany('INSERT INTO waitlist (customer, email, date, time_from, time_to, guests, joined_at) '
+                         'VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_bench_waitlist_slot ON waitlist(date, status)')
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark waitlist matching")
+    parser.add_argument('--entries', type=int, default=100000)
+    parser.add_argument('--cancellations', type=int, default=2000)
+    parser.add_argument('--days', type=int, default=30)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='bench_waitlist_')
+    try:
+        db_path = os.path.join(tmpdir, 'bench.db')
+        database.configure(db_path)
+        database.ensure_database()
+        seed(db_path, args.entries, args.days)
+
+        conn = sqlite3.connect(db_path)
+        started = time.perf_counter()
+        index = waitlist.get_index(conn)
+        print(f"{len(index)} waiting parties over {args.days} days; "
+              f"index built in {(time.perf_counter() - started) * 1000:.0f} ms\n")
+
+        rng = random.Random(5)
+        today = date.today()
+        freed = [((today + timedelta(days=rng.randrange(1, args.days))).isoformat(), rng.choice(TIMES),
+                  rng.choice((2, 4, 6))) for _ in range(args.cancellations)]
+
+        timings = {'index': [], 'sql': []}
+        agree = 0
+        for day, slot, seats in freed:
+            started = time.perf_counter()
+            best = index.best(day, slot, seats)
+            timings['index'].append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            row = conn.execute(_SQL_BEST, (day, slot, slot, seats)).fetchone()
+            timings['sql'].append(time.perf_counter() - started)
+
+            agree += best == (row[0] if row else None)
+            # Offer it, as the cancel path would, so later lookups see a shrinking list
+            if best is not None:
+                index.discard(best)
+                conn.execute("UPDATE waitlist SET status = 'offered' WHERE id = ?", (best,))
+        conn.close()
+
+        for name, values in timings.items():
+            values.sort()
+            print(f"{name:<6} p50 {statistics.median(values) * 1e6:>8.1f} µs   "
+                  f"p99 {values[int(len(values) * 0.99)] * 1e6:>8.1f} µs")
+        print(f"\nsame party chosen: {agree}/{len(freed)}")
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Synthetic datasets for benchmarks
+
+Seeds a database with realistic-looking bookings so benchmarks can run at
+any size without touching restaurant.db.
+"""
+
+import random
+import sqlite3
+from datetime import date, timedelta
+from typing import List, Tuple
+
+FIRST_NAMES = ['Ajeet', 'Shiv', 'Maria', 'John', 'Aisha', 'Chen', 'Lucas', 'Sofia', 'Omar', 'Priya',
+               'Elena', 'David', 'Fatima', 'Noah', 'Yuki', 'Carlos', 'Amara', 'Liam', 'Zara', 'Ivan']
+LAST_NAMES = ['Gupta', 'Bhukta', 'Garcia', 'Smith', 'Khan', 'Wei', 'Martin', 'Rossi', 'Haddad', 'Patel',
+              'Petrova', 'Cohen', 'Ali', 'Brown', 'Tanaka', 'Lopez', 'Okafor', 'Murphy', 'Malik', 'Ivanov']
+TABLES = ['Any', 'Window-1', 'Window-5', 'Booth-3', 'Booth-7', 'Patio-2', 'Bar-1']
+TIMES = [f"{hour:02d}:{minute:02d}" for hour in range(11, 23) for minute in (0, 30)]
+
+BOOKING_COLUMNS = ('id', 'customer', 'email', 'phone', 'date', 'time', 'guests', 'table_pref', 'status', 'created_at')
+
+
+def make_bookings(count: int, seed: int = 42, start: date = None, days: int = 365) -> List[Tuple]:
+    """
+    Generate booking rows spread over a date range
+
+    Args:
+        count: Number of bookings
+        seed: Random seed, so runs are reproducible
+        start: First booking date (default: `days` ago)
+        days: Length of the date range
+
+    Returns:
+        Tuples in BOOKING_COLUMNS order
+    """
+    rng = random.Random(seed)
+    start = start or date.today() - timedelta(days=days)
+    rows = []
+    for i in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        day = start + timedelta(days=rng.randrange(days))
+        rows.append((
+            f"SYN{i:08d}",
+            f"{first} {last}",
+            f"{first.lower()}.{last.lower()}{i}@example.com",
+            f"+1 555 {rng.randrange(1000000, 9999999)}",
+            day.isoformat(),
+            rng.choice(TIMES),
+            rng.choice((2, 2, 2, 3, 4, 4, 5, 6, 8, 12)),
+            rng.choice(TABLES),
+            'cancelled' if rng.random() < 0.12 else 'confirmed',
+            f"{(day - timedelta(days=rng.randrange(1, 30))).isoformat()} {rng.randrange(24):02d}:{rng.randrange(60):02d}:00",
+        ))
+    return rows
+
+
+def seed_bookings(db_path: str, count: int, seed: int = 42, **kwargs) -> List[str]:
+    """Insert `count` synthetic bookings into an initialized database; returns their IDs"""
+    rows = make_bookings(count, seed, **kwargs)
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.executemany(
+            f"INSERT OR REPLACE INTO bookings ({', '.join(BOOKING_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(BOOKING_COLUMNS))})",
+            rows
+        )
+    conn.close()
+    return [row[0] for row in rows]
+
+
+def create_database(db_path: str, bookings: int = 0, seed: int = 42, **kwargs) -> List[str]:
+    """Create a fresh database with the app's schema and sample data plus synthetic bookings"""
+    import database
+
+    previous = database.DATABASE_PATH
+    database.configure(db_path)
+    try:
+        database.init_database()
+    finally:
+        database.configure(previous)
+    return seed_bookings(db_path, bookings, seed, **kwargs) if bookings else []
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+HTTP load test for every API route and the static assets
+
+Starts the app on a local port against a fresh synthetic database, drives a
+weighted traffic mix from concurrent keep-alive clients, and reports
+throughput, p50/p95/p99 latency and error rate per route. Results are saved
+as JSON and compared against a stored baseline:
+
+    python -m benchmarks.load_test --bookings 5000 --duration 30 --concurrency 16
+    python -m benchmarks.load_test --save-baseline          # record a new baseline
+    python -m benchmarks.load_test --server flask           # Werkzeug dev server
+    python -m benchmarks.load_test --server uvicorn         # ASGI variant (asgi_app.py)
+
+Exit status is 1 when a route regresses past --tolerance.
+"""
+
+import argparse
+import contextlib
+import http.client
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Optional
+
+from benchmarks.datasets import create_database
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline_load.json')
+
+STATIC_ASSETS = ['/menu.html', '/styles.css', '/app.js', '/cart.js', '/chatbot.js', '/images/paella.jpg']
+CHAT_MESSAGES = [
+    'Hi there!', 'What do you recommend?', 'What are your opening hours?',
+    'I would like to book a table for 4', 'Can you check booking BK001?',
+    'Thanks so much!', 'Do you have vegan dishes?', 'The food was cold',
+]
+
+# Route name -> relative weight; roughly what a dinner-time evening looks like
+TRAFFIC_MIX = {
+    'GET /api/menu': 25,
+    'GET static': 20,
+    'POST /api/chat': 20,
+    'GET /api/bookings/<id>': 15,
+    'POST /api/bookings': 8,
+    'GET /api/info': 5,
+    'GET /api/admin/bookings': 3,
+    'DELETE /api/bookings/<id>': 4,
+}
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+@contextlib.contextmanager
+def start_server(db_path: str, server: str = 'gunicorn', port: int = 18081,
+                 workers: int = 2, env: Dict[str, str] = None, app: str = None) -> Iterator[str]:
+    """
+    Run the app in a subprocess until the block exits; yields its base URL
+
+    `app` defaults to app:app, or asgi_app:app for uvicorn; with gunicorn
+    and uvicorn a trailing "()" names a factory to call.
+    """
+    app = app or ('asgi_app:app' if server == 'uvicorn' else 'app:app')
+    if server == 'gunicorn':
+        cmd = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--workers', str(workers),
+               '--bind', f'127.0.0.1:{port}', '--log-level', 'warning', '--access-logfile', '/dev/null', app]
+    elif server == 'uvicorn':
+        cmd = [sys.executable, '-m', 'uvicorn', '--host', '127.0.0.1', '--port', str(port),
+               '--workers', str(workers), '--log-level', 'warning', '--no-access-log']
+        cmd += ['--factory', app[:-2]] if app.endswith('()') else [app]
+    else:
+        module, name = app.split(':')
+        cmd = [sys.executable, '-c',
+               f"from {module} import {name}; {name}.run(host='127.0.0.1', port={port}, threaded=True)"]
+
+    # Rate limiting is off unless a benchmark opts in: all load comes from one IP
+    proc_env = dict(os.environ, DATABASE_PATH=db_path, RATE_LIMIT_DB=f'{db_path}.ratelimit',
+                    RATE_LIMIT_ENABLED='0')
+    proc_env.update(env or {})
+    proc = subprocess.Popen(cmd, env=proc_env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f'127.0.0.1:{port}'
+    try:
+        deadline = time.time() + 60
+        while True:
+            try:
+                conn = http.client.HTTPConnection(base, timeout=1)
+                conn.request('GET', '/api/info')
+                conn.getresponse().read()
+                conn.close()
+                break
+            except OSError:
+                if proc.poll() is not None or time.time() > deadline:
+                    raise RuntimeError(f"Server failed to start: {' '.join(cmd)}")
+                time.sleep(0.05)
+        yield base
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+class LoadClient(threading.Thread):
+    """One simulated client issuing requests over a keep-alive connection"""
+
+    def __init__(self, base: str, booking_ids: List[str], mix: Dict[str, int],
+                 stop_at: float, seed: int, headers: Dict[str, str] = None):
+        super().__init__(daemon=True)
+        self.base = base
+        self.booking_ids = booking_ids
+        self.routes = list(mix)
+        self.weights = list(mix.values())
+        self.stop_at = stop_at
+        self.rng = random.Random(seed)
+        self.headers = headers or {}
+        self.samples: Dict[str, List[float]] = {route: [] for route in mix}
+        self.errors: Dict[str, int] = {route: 0 for route in mix}
+        self.failures: Dict[str, int] = {route: 0 for route in mix}
+        self.statuses: Dict[str, Counter] = {route: Counter() for route in mix}
+        self.created: List[str] = []
+        self.conn: Optional[http.client.HTTPConnection] = None
+
+    def _request(self, method: str, path: str, body: Dict = None):
+        """Send one request, reconnecting once if the server closed the connection"""
+        payload = json.dumps(body).encode() if body is not None else None
+        headers = dict(self.headers)
+        if payload is not None:
+            headers['Content-Type'] = 'application/json'
+
+        for attempt in range(2):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.base, timeout=30)
+            try:
+                self.conn.request(method, path, body=payload, headers=headers)
+                response = self.conn.getresponse()
+                data = response.read()
+                return response.status, data
+            except (http.client.HTTPException, OSError):
+                self.conn.close()
+                self.conn = None
+                if attempt:
+                    raise
+
+    def _build_request(self, route: str):
+        """Turn a route name into (method, path, body)"""
+        if route == 'GET static':
+            return 'GET', self.rng.choice(STATIC_ASSETS), None
+        if route == 'GET /api/bookings/<id>':
+            return 'GET', f'/api/bookings/{self.rng.choice(self.booking_ids)}', None
+        if route == 'DELETE /api/bookings/<id>':
+            booking_id = self.created.pop() if self.created else self.rng.choice(self.booking_ids)
+            return 'DELETE', f'/api/bookings/{booking_id}', None
+        if route == 'POST /api/bookings':
+            day = date.today() + timedelta(days=self.rng.randrange(1, 60))
+            return 'POST', '/api/bookings', {
+                'customer': 'Load Test', 'email': 'load@example.com', 'phone': '+1 555 0100',
+                'date': day.isoformat(), 'time': '19:30', 'guests': self.rng.randint(1, 8)
+            }
+        if route == 'POST /api/chat':
+            return 'POST', '/api/chat', {'message': self.rng.choice(CHAT_MESSAGES), 'context': []}
+        method, path = route.split(' ', 1)
+        return method, path, None
+
+    def run(self):
+        while time.perf_counter() < self.stop_at:
+            route = self.rng.choices(self.routes, self.weights)[0]
+            method, path, body = self._build_request(route)
+            started = time.perf_counter()
+            try:
+                status, data = self._request(method, path, body)
+            except (http.client.HTTPException, OSError):
+                self.errors[route] += 1
+                self.failures[route] += 1
+                continue
+            self.samples[route].append(time.perf_counter() - started)
+            self.statuses[route][status] += 1
+
+            if status >= 400:
+                self.errors[route] += 1
+            elif route == 'POST /api/bookings':
+                self.created.append(json.loads(data)['booking']['id'])
+        if self.conn:
+            self.conn.close()
+
+
+def run_clients(clients: List['LoadClient']) -> float:
+    """Run clients to completion; returns elapsed seconds"""
+    started = time.perf_counter()
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    return time.perf_counter() - started
+
+
+def summarize(clients: List['LoadClient'], elapsed: float) -> Dict:
+    """Per-route and total throughput, latency percentiles and error rate"""
+    routes = {}
+    total_requests = total_errors = 0
+    for route in dict.fromkeys(r for c in clients for r in c.samples):
+        latencies = sorted(t for c in clients for t in c.samples.get(route, ()))
+        errors = sum(c.errors.get(route, 0) for c in clients)
+        # Latencies cover every response, including 4xx/5xx; add connection failures
+        requests = len(latencies) + sum(c.failures.get(route, 0) for c in clients)
+        statuses = Counter()
+        for c in clients:
+            statuses.update(c.statuses.get(route, {}))
+        total_requests += requests
+        total_errors += errors
+        routes[route] = {
+            'requests': requests,
+            'throughput_rps': round(requests / elapsed, 1),
+            'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+            'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+            'error_rate': round(errors / requests, 4) if requests else 0.0,
+            'statuses': {str(code): count for code, count in sorted(statuses.items())},
+        }
+
+    all_latencies = sorted(t for c in clients for samples in c.samples.values() for t in samples)
+    return {
+        'duration_s': round(elapsed, 2),
+        'concurrency': len(clients),
+        'total': {
+            'requests': total_requests,
+            'throughput_rps': round(total_requests / elapsed, 1),
+            'p50_ms': round(percentile(all_latencies, 50) * 1000, 2),
+            'p95_ms': round(percentile(all_latencies, 95) * 1000, 2),
+            'p99_ms': round(percentile(all_latencies, 99) * 1000, 2),
+            'error_rate': round(total_errors / total_requests, 4) if total_requests else 0.0,
+        },
+        'routes': routes,
+    }
+
+
+def run_load(base: str, booking_ids: List[str], duration: float, concurrency: int,
+             mix: Dict[str, int] = None, seed: int = 1, headers: Dict[str, str] = None) -> Dict:
+    """Drive the server for `duration` seconds and summarize per-route stats"""
+    mix = mix or TRAFFIC_MIX
+    stop_at = time.perf_counter() + duration
+    clients = [LoadClient(base, booking_ids, mix, stop_at, seed + i, headers) for i in range(concurrency)]
+    return summarize(clients, run_clients(clients))
+
+
+def compare_to_baseline(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """List regressions: slower p95, lower throughput or more errors than the baseline"""
+    regressions = []
+    current = dict(results['routes'], total=results['total'])
+    previous = dict(baseline['routes'], total=baseline['total'])
+    for route, stats in current.items():
+        before = previous.get(route)
+        if not before or not before['requests']:
+            continue
+        if stats['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{route}: p95 {before['p95_ms']} -> {stats['p95_ms']} ms")
+        if stats['throughput_rps'] < before['throughput_rps'] * (1 - tolerance):
+            regressions.append(f"{route}: throughput {before['throughput_rps']} -> {stats['throughput_rps']} rps")
+        if stats['error_rate'] > before['error_rate'] + 0.01:
+            regressions.append(f"{route}: error rate {before['error_rate']} -> {stats['error_rate']}")
+    return regressions
+
+
+def print_report(results: Dict):
+    print(f"{'route':<28} {'req':>7} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    rows = dict(results['routes'], TOTAL=results['total'])
+    for route, s in rows.items():
+        print(f"{route:<28} {s['requests']:>7} {s['throughput_rps']:>8} {s['p50_ms']:>8} "
+              f"{s['p95_ms']:>8} {s['p99_ms']:>8} {s['error_rate']:>7.2%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the restaurant API")
+    parser.add_argument('--bookings', type=int, default=5000, help="Synthetic bookings to seed")
+    parser.add_argument('--duration', type=float, default=20.0)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--server', choices=['gunicorn', 'flask', 'uvicorn'], default='gunicorn')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--port', type=int, default=18081)
+    parser.add_argument('--output', help="Results file (default: benchmarks/results/load-<time>.json)")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='load_test_')
+    try:
+        db_path = os.path.join(tmpdir, 'restaurant.db')
+        booking_ids = create_database(db_path, args.bookings) or ['BK001', 'BK002']
+        with start_server(db_path, args.server, args.port, args.workers) as base:
+            results = run_load(base, booking_ids, args.duration, args.concurrency)
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    results['config'] = {k: getattr(args, k) for k in ('bookings', 'concurrency', 'server', 'workers')}
+    print_report(results)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = args.output or os.path.join(RESULTS_DIR, f"load-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved to {output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare_to_baseline(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nNo regressions against baseline")
+    else:
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to record one")
+
+
+if __name__ == '__main__':
+    main()
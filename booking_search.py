@@ -0,0 +1,264 @@
+"""
+Fuzzy booking lookup by guest name, phone, email and date
+
+For guests who have lost their booking ID (the chat agent) and for staff
+(/api/admin/bookings/search). bookings_search is an FTS5 trigram index over
+customer, email and phone digits, kept in step with bookings by triggers
+(see database._create_search_index).
+
+Candidates are gathered cheaply, then scored in Python:
+
+- With a narrow date filter, the bookings on those dates (idx_bookings_date)
+  are the candidates. That tolerates any typo.
+- Otherwise the index is queried. Each name word, the phone digits and the
+  email must appear as substrings. If that finds too few, each name word
+  only needs one of its halves (a single typo leaves one intact), or any
+  trigram for words under six letters, so misspelt names still turn up.
+
+Each candidate is scored 0..1 against what was asked for: trigram
+similarity of names, and exact or partial phone and email matches. The
+best-scoring candidates are returned, so a lookup reads a few hundred
+rows at most whatever the size of the table.
+"""
+
+import re
+from typing import Dict, List, Optional
+
+import database
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+# Rows scored per search, at most
+MAX_CANDIDATES = 500
+# Candidates below this score are not returned
+MIN_SCORE = 0.3
+# Phone numbers shorter than this are too ambiguous to search for
+MIN_PHONE_DIGITS = 4
+# Trailing digits matched in the index (a local number without its country code)
+PHONE_MATCH_DIGITS = 7
+
+_EMAIL = re.compile(r'[\w.+-]+@[\w-]+(?:\.[\w-]+)+')
+_PHONE = re.compile(r'\+?\d[\d\s().-]{2,}\d')
+_WORD = re.compile(r"[^\W\d_]+(?:['-][^\W\d_]+)*")
+_DATE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+
+def normalize_phone(phone: Optional[str]) -> str:
+    return re.sub(r'\D', '', phone or '')
+
+
+def parse_query(text: str) -> Dict[str, Optional[str]]:
+    """Split free text ('maria garcia 555 0100') into name, phone and email"""
+    email = _EMAIL.search(text)
+    rest = _EMAIL.sub(' ', text)
+    phone = _PHONE.search(rest)
+    rest = _PHONE.sub(' ', rest)
+    name = ' '.join(_WORD.findall(rest))
+    return {
+        'name': name or None,
+        'phone': phone.group() if phone else None,
+        'email': email.group() if email else None,
+    }
+
+
+def search_request(args) -> Dict:
+    """
+    search_bookings() keyword arguments from query parameters
+
+    q is free text (see parse_query); name, phone and email override its
+    parts. date is shorthand for from=date&to=date.
+    """
+    criteria = parse_query(args.get('q') or '')
+    for key in ('name', 'phone', 'email'):
+        if args.get(key):
+            criteria[key] = args.get(key)
+    day = args.get('date')
+    try:
+        limit = int(args.get('limit') or DEFAULT_LIMIT)
+    except ValueError:
+        raise ValueError('limit must be a number')
+    return dict(criteria, date_from=args.get('from') or day, date_to=args.get('to') or day, limit=limit)
+
+
+def search_bookings(name: Optional[str] = None, phone: Optional[str] = None, email: Optional[str] = None,
+                    date_from: Optional[str] = None, date_to: Optional[str] = None,
+                    limit: int = DEFAULT_LIMIT) -> List[Dict]:
+    """
+    Bookings that best match a guest's details, best first
+
+    Args:
+        name: Guest name, or part of it; misspellings are tolerated
+        phone: Phone number in any format (matched on digits)
+        email: Email address, or part of it
+        date_from, date_to: Only bookings dated within (YYYY-MM-DD, inclusive)
+        limit: Most results to return (capped at MAX_LIMIT)
+
+    Returns:
+        Booking dicts with an added 'score' (0..1)
+
+    Raises:
+        ValueError: If no name, phone or email is given, or a date is malformed
+    """
+    words = [word.lower() for word in _WORD.findall(name or '')]
+    digits = normalize_phone(phone)
+    email = (email or '').strip().lower()
+    if len(digits) < MIN_PHONE_DIGITS:
+        digits = ''
+    if not (words or digits or email):
+        raise ValueError('Search needs a name, phone number or email')
+    for value in (date_from, date_to):
+        if value and not _DATE.match(value):
+            raise ValueError('Dates must be YYYY-MM-DD')
+    limit = max(1, min(int(limit), MAX_LIMIT))
+
+    conn = database.get_db_connection()
+    try:
+        rows = _candidates(conn, words, digits, email, date_from, date_to, limit)
+    finally:
+        conn.close()
+
+    query_grams = _name_grams(' '.join(words))
+    results = []
+    for row in rows:
+        score = _score(row, query_grams, digits, email)
+        if score >= MIN_SCORE:
+            results.append(dict(row, score=round(score, 3)))
+    results.sort(key=lambda booking: (-booking['score'], booking['date'], booking['time']))
+    return results[:limit]
+
+
+def _date_filter(date_from: Optional[str], date_to: Optional[str]):
+    clauses, params = [], []
+    if date_from:
+        clauses.append('b.date >= ?')
+        params.append(date_from)
+    if date_to:
+        clauses.append('b.date <= ?')
+        params.append(date_to)
+    return ''.join(f' AND {clause}' for clause in clauses), params
+
+
+def _has_index(conn) -> bool:
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'bookings_search'"
+    ).fetchone() is not None
+
+
+def _phrase(text: str) -> str:
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _candidates(conn, words, digits, email, date_from, date_to, limit):
+    dates, date_params = _date_filter(date_from, date_to)
+
+    # A day or a few: every booking on those dates is few enough to score
+    if date_from and date_to:
+        rows = conn.execute(
+            f'SELECT b.* FROM bookings b WHERE 1 = 1{dates} LIMIT ?', date_params + [MAX_CANDIDATES + 1]
+        ).fetchall()
+        if len(rows) <= MAX_CANDIDATES:
+            return rows
+
+    if not _has_index(conn):
+        return _scan(conn, words, digits, email, dates, date_params)
+
+    sql = (f'SELECT b.* FROM bookings_search s JOIN bookings b ON b.rowid = s.rowid '
+           f'WHERE bookings_search MATCH ?{dates} LIMIT ?')
+    found = {}
+
+    def match(query):
+        for row in conn.execute(sql, [query] + date_params + [MAX_CANDIDATES]):
+            found.setdefault(row['id'], row)
+
+    # Phone and email are selective, so they're looked up on their own. Only
+    # the distinctive part is matched (scoring checks the rest): the last
+    # digits, whatever the country code, and the email's local part, as
+    # every address shares the trigrams of a few common domains
+    contact = []
+    if digits:
+        contact.append(f'phone : {_phrase(digits[-PHONE_MATCH_DIGITS:])}')
+    local_part = email.split('@')[0]
+    if len(local_part) >= 3:
+        contact.append(f'email : {_phrase(local_part)}')
+    elif len(email) >= 3:
+        contact.append(f'email : {_phrase(email)}')
+    if contact:
+        match(' OR '.join(contact))
+
+    # Trigram phrases need three characters; shorter words only count in scoring
+    long_words = [word for word in words if len(word) >= 3]
+    if long_words:
+        before = len(found)
+        match(' AND '.join(f'{{customer email}} : {_phrase(word)}' for word in long_words))
+        if len(found) - before < limit:
+            # Too few exact hits. One typo leaves at least one half of a word
+            # intact, so each word matches on either half (short words on any trigram)
+            match(' AND '.join(
+                '(' + ' OR '.join(f'{{customer email}} : {_phrase(part)}' for part in _fragments(word)) + ')'
+                for word in long_words
+            ))
+    elif not contact:
+        return _scan(conn, words, digits, email, dates, date_params)
+    return list(found.values())
+
+
+def _fragments(word: str) -> List[str]:
+    if len(word) >= 6:
+        middle = len(word) // 2
+        return [word[:middle], word[middle:]]
+    return sorted(_trigrams(word, pad=False))
+
+
+def _scan(conn, words, digits, email, dates, date_params):
+    """Substring match without the index (SQLite built without FTS5 trigram)"""
+    clauses, params = [], []
+    if words:
+        clauses.append('(' + ' AND '.join('lower(b.customer) LIKE ?' for _ in words) + ')')
+        params.extend(f'%{word}%' for word in words)
+    if digits:
+        clauses.append(f"{database.phone_digits_sql('b.phone')} LIKE ?")
+        params.append(f'%{digits}%')
+    if email:
+        clauses.append('lower(b.email) LIKE ?')
+        params.append(f'%{email}%')
+    return conn.execute(
+        f"SELECT b.* FROM bookings b WHERE ({' OR '.join(clauses)}){dates} LIMIT ?",
+        params + date_params + [MAX_CANDIDATES]
+    ).fetchall()
+
+
+def _trigrams(text: str, pad: bool = True) -> set:
+    text = f'  {text} ' if pad else text
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _name_grams(name: str) -> set:
+    """Padded trigrams of each word, so word order doesn't matter"""
+    return set().union(*(_trigrams(word) for word in name.lower().split()))
+
+
+def _name_score(query_grams: set, customer: str) -> float:
+    """Dice similarity of name trigrams"""
+    customer_grams = _name_grams(customer)
+    if not customer_grams:
+        return 0.0
+    shared = len(query_grams & customer_grams)
+    # A first name alone should still match a full name well
+    return max(2 * shared / (len(query_grams) + len(customer_grams)), shared / len(query_grams) * 0.9)
+
+
+def _score(booking: Dict, query_grams: set, digits: str, email: str) -> float:
+    """How well a booking matches, 0..1, averaged over the details given"""
+    scores = []
+    if query_grams:
+        scores.append(_name_score(query_grams, booking['customer'] or ''))
+    if digits:
+        booked = normalize_phone(booking['phone'])
+        if booked and (booked.endswith(digits) or digits.endswith(booked)):
+            scores.append(1.0)
+        else:
+            scores.append(0.7 if booked and digits in booked else 0.0)
+    if email:
+        booked = (booking['email'] or '').lower()
+        scores.append(1.0 if booked == email else 0.7 if email in booked else 0.0)
+    return sum(scores) / len(scores)
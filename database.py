@@ -1,21 +1,209 @@
 import sqlite3
 import os
+import random
+import re
+import threading
+import time
+import uuid
+import weakref
+from collections import OrderedDict
+from contextvars import ContextVar
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Callable, Iterable, List, Dict, Optional, Tuple
+from zoneinfo import ZoneInfo
+import metrics
+from email_service import get_email_service
 
-DATABASE_PATH = 'restaurant.db'
+DATABASE_PATH = os.getenv('DATABASE_PATH', 'restaurant.db')
 
-def get_db_connection():
-    """Get database connection"""
-    conn = sqlite3.connect(DATABASE_PATH)
+def default_archive_path(database_path: str) -> str:
+    """Archive file kept next to the database, e.g. restaurant-archive.db"""
+    root, ext = os.path.splitext(database_path)
+    return f"{root}-archive{ext or '.db'}"
+
+# Old bookings moved out of the hot table by archive.py (still readable by get_booking)
+ARCHIVE_PATH = os.getenv('ARCHIVE_DATABASE_PATH') or default_archive_path(DATABASE_PATH)
+
+# Every status a booking can have (mark_no_show sets 'no-show')
+BOOKING_STATUSES = ('confirmed', 'cancelled', 'no-show')
+
+# Database files this process has made sure have a schema (see ensure_database)
+_ready_paths = set()
+_db_lock = threading.Lock()
+
+# Set per request to serve one location's database (see use_database);
+# everything else uses DATABASE_PATH
+_current_path: ContextVar[Optional[str]] = ContextVar('database_path', default=None)
+
+def configure(database_path: str, archive_path: Optional[str] = None):
+    """Point this module at a database file (used by the app factory)"""
+    global DATABASE_PATH, ARCHIVE_PATH
+    DATABASE_PATH = database_path
+    ARCHIVE_PATH = archive_path or default_archive_path(database_path)
+    _ready_paths.clear()
+    _table_columns.clear()
+    _clear_booking_cache()
+    _connection_cache.clear()
+
+def current_database_path() -> str:
+    """The database file the current request (or thread) works on"""
+    return _current_path.get() or DATABASE_PATH
+
+def use_database(database_path: Optional[str]):
+    """
+    Route this context's queries to another database file (one per location)
+    
+    Returns:
+        Token for reset_database()
+    """
+    return _current_path.set(database_path)
+
+def reset_database(token):
+    _current_path.reset(token)
+
+def current_archive_path() -> str:
+    path = current_database_path()
+    return ARCHIVE_PATH if path == DATABASE_PATH else default_archive_path(path)
+
+_TABLE_PATTERN = re.compile(
+    r'\b(?:FROM|INTO|UPDATE|(?:TABLE|INDEX)(?:\s+IF\s+NOT\s+EXISTS)?)\s+(\w+)', re.IGNORECASE
+)
+_query_labels: Dict[str, tuple] = {}
+
+def _query_label(sql: str) -> tuple:
+    """Metric label for a statement, e.g. 'SELECT bookings' (cached per SQL string)"""
+    label = _query_labels.get(sql)
+    if label is None:
+        words = sql.split(None, 1)
+        table = _TABLE_PATTERN.search(sql)
+        name = f"{words[0].upper() if words else '?'} {table.group(1) if table else ''}".strip()
+        label = (('query', name),)
+        if len(_query_labels) < 1000:
+            _query_labels[sql] = label
+    return label
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor that records statement execution time in db_query_seconds"""
+    
+    def execute(self, sql, parameters=()):
+        with metrics.timer('db_query_seconds', _query_label(sql)):
+            return super().execute(sql, parameters)
+    
+    def executemany(self, sql, seq_of_parameters):
+        with metrics.timer('db_query_seconds', _query_label(sql)):
+            return super().executemany(sql, seq_of_parameters)
+
+class TimedConnection(sqlite3.Connection):
+    """Connection whose cursors (including conn.execute) are timed"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cursors = weakref.WeakSet()
+    
+    def cursor(self, factory=TimedCursor):
+        cursor = super().cursor(factory)
+        self._cursors.add(cursor)
+        return cursor
+    
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+    
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+    
+    def close(self):
+        """Hand pooled connections back to the connection cache instead of closing them"""
+        if getattr(self, 'pool_path', None) is None:
+            super().close()
+        else:
+            # A cursor that outlives close() would otherwise reset statements
+            # (and hold read locks) while the next owner uses the connection
+            for cursor in list(self._cursors):
+                cursor.close()
+            path, self.pool_path = self.pool_path, None
+            _connection_cache.put(path, self)
+
+class ConnectionCache:
+    """
+    Idle connections kept open for reuse, shared by every database file
+    
+    Opening a connection costs a file open and a schema parse on its first
+    query; with one database per location that adds up. The cache holds
+    at most `size` idle connections in total and closes the least recently
+    used one when full, so rarely used locations don't pin file handles.
+    A connection is only ever used by one thread at a time: it is taken out
+    of the cache by get_db_connection() and put back by close().
+    """
+    
+    def __init__(self, size: int):
+        self.size = size
+        self._idle: 'OrderedDict[int, Tuple[str, sqlite3.Connection]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+    
+    def get(self, path: str) -> Optional[sqlite3.Connection]:
+        with self._lock:
+            if self._pid != os.getpid():
+                # Inherited across a fork: never share the parent's handles
+                self._idle.clear()
+                self._pid = os.getpid()
+            for key in reversed(self._idle):
+                if self._idle[key][0] == path:
+                    return self._idle.pop(key)[1]
+        return None
+    
+    def put(self, path: str, conn: sqlite3.Connection):
+        if conn.in_transaction:
+            conn.rollback()
+        evicted = []
+        with self._lock:
+            if self._pid == os.getpid() and self.size > 0:
+                self._idle[id(conn)] = (path, conn)
+                while len(self._idle) > self.size:
+                    evicted.append(self._idle.popitem(last=False)[1][1])
+            else:
+                evicted.append(conn)
+        for old in evicted:
+            sqlite3.Connection.close(old)
+    
+    def clear(self):
+        with self._lock:
+            idle, self._idle = list(self._idle.values()), OrderedDict()
+        if self._pid == os.getpid():
+            for _, conn in idle:
+                sqlite3.Connection.close(conn)
+
+_connection_cache = ConnectionCache(int(os.getenv('DB_CONNECTION_CACHE_SIZE', '16')))
+
+def get_db_connection(pooled: bool = True):
+    """
+    Get a connection to the current database
+    
+    Args:
+        pooled: Reuse an idle connection and return it to the cache on
+            close(); pass False for connections whose PRAGMAs are changed
+    """
+    path = current_database_path()
+    conn = _connection_cache.get(path) if pooled else None
+    if conn is None:
+        conn = sqlite3.connect(path, factory=TimedConnection, check_same_thread=not pooled)
     conn.row_factory = sqlite3.Row
+    if pooled:
+        conn.pool_path = path
     return conn
 
-def init_database():
-    """Initialize database with tables and sample data"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
+_table_columns: Dict[str, List[str]] = {}
+
+def table_columns(conn, table: str) -> List[str]:
+    """Column names of a table, in schema order (cached per process)"""
+    columns = _table_columns.get(table)
+    if columns is None:
+        columns = [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
+        _table_columns[table] = columns
+    return columns
+
+def create_schema(cursor):
+    """Create all tables and indexes (safe to run on an existing database)"""
     # Create bookings table
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS bookings (
@@ -28,9 +216,101 @@ def init_database():
             guests INTEGER NOT NULL,
             table_pref TEXT,
             status TEXT DEFAULT 'confirmed',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            version INTEGER NOT NULL DEFAULT 1,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            group_id TEXT
+        )
+    ''')
+    
+    # Databases created before row versioning get the columns added in place
+    columns = [row[1] for row in cursor.execute('PRAGMA table_info(bookings)')]
+    if 'version' not in columns:
+        cursor.execute('ALTER TABLE bookings ADD COLUMN version INTEGER NOT NULL DEFAULT 1')
+    if 'updated_at' not in columns:
+        # ALTER TABLE only allows constant defaults, so backfill from created_at
+        cursor.execute('ALTER TABLE bookings ADD COLUMN updated_at TIMESTAMP')
+        cursor.execute('UPDATE bookings SET updated_at = created_at WHERE updated_at IS NULL')
+    if 'group_id' not in columns:
+        cursor.execute('ALTER TABLE bookings ADD COLUMN group_id TEXT')
+    
+    # Upcoming-bookings lookups, the admin listing and archive.py's age scan
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_bookings_date ON bookings(date)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_bookings_created_at ON bookings(created_at)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_bookings_group_id ON bookings(group_id) WHERE group_id IS NOT NULL')
+    _create_search_index(cursor)
+
+    # Reminder emails still to send (see reminders.py); rows are deleted once
+    # handled, so the due-queue index only ever holds upcoming reminders
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS reminders (
+            booking_id TEXT PRIMARY KEY,
+            send_at REAL NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            claimed_by TEXT,
+            claimed_at REAL,
+            attempts INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_reminders_due ON reminders(status, send_at)')
+    
+    # Parties waiting for a table to free up (see waitlist.py)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS waitlist (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            customer TEXT NOT NULL,
+            email TEXT,
+            phone TEXT,
+            date TEXT NOT NULL,
+            time_from TEXT NOT NULL,
+            time_to TEXT NOT NULL,
+            guests INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'waiting',
+            joined_at REAL NOT NULL,
+            offered_date TEXT,
+            offered_time TEXT,
+            offered_seats INTEGER,
+            offered_table TEXT,
+            offered_from TEXT,
+            offer_expires REAL,
+            booking_id TEXT,
+            code TEXT
+        )
+    ''')
+    if 'code' not in [row[1] for row in cursor.execute('PRAGMA table_info(waitlist)')]:
+        # Entries were once addressed by their rowid; give existing ones a code
+        cursor.execute('ALTER TABLE waitlist ADD COLUMN code TEXT')
+        cursor.execute("UPDATE waitlist SET code = 'WL' || hex(randomblob(8)) WHERE code IS NULL")
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_waitlist_status ON waitlist(status, offer_expires)')
+    cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_waitlist_code ON waitlist(code)')
+    
+    # Food orders from the cart (see orders.py); prices are copied from the
+    # menu when the order is placed, so later menu changes don't alter it
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS orders (
+            id TEXT PRIMARY KEY,
+            booking_id TEXT,
+            customer TEXT,
+            notes TEXT,
+            status TEXT NOT NULL DEFAULT 'received',
+            subtotal REAL NOT NULL,
+            discount REAL NOT NULL DEFAULT 0,
+            total REAL NOT NULL,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS order_items (
+            order_id TEXT NOT NULL,
+            menu_item_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            unit_price REAL NOT NULL,
+            quantity INTEGER NOT NULL
         )
     ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_order_items_order ON order_items(order_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_orders_status ON orders(status, created_at)')
     
     # Create menu items table
     cursor.execute('''
@@ -44,6 +324,93 @@ def init_database():
             available BOOLEAN DEFAULT 1
         )
     ''')
+
+# Phone numbers are indexed as digits only, so '+1 (555) 010-0100' matches '5550100100'
+def phone_digits_sql(column: str) -> str:
+    for char in ' -()+.':
+        column = f"replace({column}, '{char}', '')"
+    return column
+
+def _create_search_index(cursor):
+    """
+    Trigram index over guest name, email and phone (see booking_search.py)
+
+    Kept in step with bookings by triggers, so every writer (including
+    bulk.py and archive.py) maintains it. The index keeps its own copy of
+    the text and rows are removed by rowid, so an entry can always be
+    deleted whatever was written. (INSERT OR REPLACE doesn't fire the delete
+    trigger; the replaced row's entry is left behind and dropped by the
+    join in searches.) Databases created before the index are backfilled
+    once.
+    """
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'bookings_search'"
+    ).fetchone()
+    if exists:
+        return
+    try:
+        cursor.execute("CREATE VIRTUAL TABLE bookings_search USING fts5(customer, email, phone, tokenize='trigram')")
+    except sqlite3.OperationalError as e:
+        # SQLite older than 3.34, or built without FTS5
+        print(f"Warning: Booking search index unavailable, search falls back to a scan: {e}")
+        return
+
+    new_values = f"new.rowid, new.customer, new.email, {phone_digits_sql('new.phone')}"
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS bookings_search_insert AFTER INSERT ON bookings BEGIN
+            DELETE FROM bookings_search WHERE rowid = new.rowid;
+            INSERT INTO bookings_search (rowid, customer, email, phone) VALUES ({new_values});
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS bookings_search_delete AFTER DELETE ON bookings BEGIN
+            DELETE FROM bookings_search WHERE rowid = old.rowid;
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS bookings_search_update AFTER UPDATE OF customer, email, phone ON bookings BEGIN
+            DELETE FROM bookings_search WHERE rowid = old.rowid;
+            INSERT INTO bookings_search (rowid, customer, email, phone) VALUES ({new_values});
+        END
+    ''')
+    cursor.execute(
+        'INSERT INTO bookings_search (rowid, customer, email, phone) '
+        f"SELECT rowid, customer, email, {phone_digits_sql('phone')} FROM bookings"
+    )
+
+def ensure_database():
+    """
+    Make sure the database is ready before it is used in this process
+
+    A missing database file is created and seeded; an existing one only gets
+    any missing tables. Runs once per process, so it is cheap to call on
+    every request and safe to defer until after a pre-fork.
+    """
+    path = current_database_path()
+    if path in _ready_paths:
+        return
+    
+    with _db_lock:
+        if path in _ready_paths:
+            return
+        if os.path.exists(path):
+            conn = get_db_connection()
+            create_schema(conn.cursor())
+            conn.commit()
+            conn.close()
+        else:
+            init_database()
+        _ready_paths.add(path)
+
+def init_database():
+    """Initialize database with tables and sample data"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    # Lets archive.py hand freed pages back to the OS without a full VACUUM
+    # (only takes effect before the first table is created)
+    cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+    create_schema(cursor)
     
     # Insert sample bookings
     sample_bookings = [
@@ -93,37 +460,234 @@ def init_database():
     conn.close()
     print("Database initialized successfully")
 
+# Booking cache
+#
+# Lookups are served from a per-process LRU. Every write to bookings appends a
+# byte to a stamp file next to the database; any change in the file's inode,
+# size or mtime drops the whole cache, so a write in one gunicorn worker is
+# seen by all the others on their next lookup for the cost of one stat().
+BOOKING_CACHE_SIZE = 1024
+_STAMP_RESET_SIZE = 1 << 20
+
+# Per database file: the cached bookings and the stamp they are valid for
+_booking_caches: Dict[str, 'OrderedDict[str, Dict]'] = {}
+_booking_cache_stamps: Dict[str, tuple] = {}
+_booking_cache_lock = threading.Lock()
+
+def _stamp_path() -> str:
+    return f"{current_database_path()}.version"
+
+def bookings_stamp():
+    """Identifies the bookings version: changes on every bump_bookings_version()"""
+    try:
+        st = os.stat(_stamp_path())
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+def bump_bookings_version():
+    """Invalidate cached bookings in every process (call after committing a write)"""
+    path = _stamp_path()
+    # O_APPEND writes are atomic, so concurrent bumps always grow the file
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, b'.')
+        size = os.fstat(fd).st_size
+    finally:
+        os.close(fd)
+    if size > _STAMP_RESET_SIZE:
+        # Start a fresh file; the new inode is itself a change
+        tmp = f"{path}.{os.getpid()}"
+        open(tmp, 'wb').close()
+        os.replace(tmp, path)
+
+def _clear_booking_cache():
+    with _booking_cache_lock:
+        _booking_caches.clear()
+        _booking_cache_stamps.clear()
+
 # Booking operations
 def get_booking(booking_id: str) -> Optional[Dict]:
-    """Get booking by ID"""
+    """Get booking by ID (read-through cache, see bump_bookings_version)"""
+    path = current_database_path()
+    stamp = bookings_stamp()
+    with _booking_cache_lock:
+        cache = _booking_caches.setdefault(path, OrderedDict())
+        if stamp != _booking_cache_stamps.get(path):
+            cache.clear()
+            _booking_cache_stamps[path] = stamp
+        booking = cache.get(booking_id)
+        if booking is not None:
+            cache.move_to_end(booking_id)
+            metrics.inc('booking_cache_total', labels=(('result', 'hit'),))
+            return dict(booking)
+    
+    metrics.inc('booking_cache_total', labels=(('result', 'miss'),))
     conn = get_db_connection()
     booking = conn.execute(
         'SELECT * FROM bookings WHERE id = ?', (booking_id,)
     ).fetchone()
     conn.close()
-    return dict(booking) if booking else None
-
-def create_booking(booking_data: Dict) -> Dict:
-    """Create new booking"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    if not booking:
+        booking = _get_archived_booking(booking_id)
+    if not booking:
+        return None
     
+    booking = dict(booking)
+    with _booking_cache_lock:
+        # Keyed by the stamp read before the query, so a write that raced
+        # with it is picked up on the next lookup
+        if path in _booking_caches and stamp == _booking_cache_stamps.get(path):
+            cache = _booking_caches[path]
+            cache[booking_id] = booking
+            if len(cache) > BOOKING_CACHE_SIZE:
+                cache.popitem(last=False)
+    return dict(booking)
+
+def _get_archived_booking(booking_id: str):
+    """Look a booking up in the archive database, if there is one"""
+    archive_path = current_archive_path()
+    if not os.path.exists(archive_path):
+        return None
+    conn = sqlite3.connect(archive_path, factory=TimedConnection)
+    conn.row_factory = sqlite3.Row
+    try:
+        return conn.execute('SELECT * FROM bookings WHERE id = ?', (booking_id,)).fetchone()
+    except sqlite3.OperationalError:
+        return None  # archive created but not yet populated
+    finally:
+        conn.close()
+
+def _new_booking_id(cursor, taken: Optional[set] = None) -> str:
+    """Generate a booking ID not yet in the database (or in `taken`)"""
     # Generate UNIQUE booking ID using timestamp and random number
-    import random
-    import time
     timestamp = int(time.time() * 1000) % 10000  # Last 4 digits of millisecond timestamp
     random_num = random.randint(100, 999)
     booking_id = f"BK{timestamp}{random_num}"
     
     # Ensure uniqueness by checking database
-    while cursor.execute('SELECT id FROM bookings WHERE id = ?', (booking_id,)).fetchone():
+    while (taken and booking_id in taken) or \
+            cursor.execute('SELECT id FROM bookings WHERE id = ?', (booking_id,)).fetchone():
         random_num = random.randint(100, 999)
         booking_id = f"BK{timestamp}{random_num}"
+    return booking_id
+
+# Reminder queue
+#
+# Every new booking gets a row in reminders keyed on when its email is due.
+# reminders.py sleeps until the earliest one and claims due rows in batches.
+REMINDER_LEAD_HOURS = float(os.getenv('REMINDER_LEAD_HOURS', '24'))
+# Bookings made closer to their time than this get no reminder
+REMINDER_MIN_NOTICE_HOURS = 2
+
+# Booking dates/times are local to the restaurant: database path -> IANA zone
+# (see set_timezones); paths not listed use RESTAURANT_TIMEZONE, and without
+# that the server's own time zone
+DEFAULT_TIMEZONE = os.getenv('RESTAURANT_TIMEZONE') or None
+if DEFAULT_TIMEZONE:
+    ZoneInfo(DEFAULT_TIMEZONE)  # fail at startup rather than on the first booking
+_timezones: Dict[str, str] = {}
+
+_reminder_listener: Optional[Callable[[float], None]] = None
+
+def set_timezones(timezones: Dict[str, Optional[str]]):
+    """Record each location's time zone by database path (used by the app factory)"""
+    _timezones.clear()
+    _timezones.update({path: name for path, name in timezones.items() if name})
+
+def current_timezone() -> Optional[ZoneInfo]:
+    """Time zone of the current location's bookings, or None for server-local"""
+    name = _timezones.get(current_database_path(), DEFAULT_TIMEZONE)
+    return ZoneInfo(name) if name else None
+
+def set_reminder_listener(listener: Optional[Callable[[float], None]]):
+    """Register a callback told the send time of each newly scheduled reminder"""
+    global _reminder_listener
+    _reminder_listener = listener
+
+def reminder_time(date: str, time_str: str, now: Optional[float] = None) -> Optional[float]:
+    """
+    When to send a booking's reminder, as a Unix timestamp
+    
+    Booking date/time are read in the current location's time zone. Returns
+    None when the booking is too soon (or unparseable) for a reminder to be
+    useful.
+    """
+    try:
+        starts = datetime.strptime(f"{date} {time_str}", '%Y-%m-%d %H:%M')
+        starts = starts.replace(tzinfo=current_timezone()).timestamp()
+    except (TypeError, ValueError):
+        return None
+    now = time.time() if now is None else now
+    if starts - now < REMINDER_MIN_NOTICE_HOURS * 3600:
+        return None
+    return max(now, starts - REMINDER_LEAD_HOURS * 3600)
+
+def schedule_reminders(cursor, bookings: Iterable[Tuple[str, str, str]]) -> List[float]:
+    """
+    Queue reminders for (booking_id, date, time) tuples in the caller's transaction
+    
+    Returns:
+        Send times that were scheduled (pass to notify_reminders after commit)
+    """
+    rows = []
+    for booking_id, date, time_str in bookings:
+        send_at = reminder_time(date, time_str)
+        if send_at is not None:
+            rows.append((booking_id, send_at))
+    if rows:
+        cursor.executemany(
+            'INSERT OR REPLACE INTO reminders (booking_id, send_at) VALUES (?, ?)', rows
+        )
+    return [send_at for _, send_at in rows]
+
+def notify_reminders(send_times: List[float]):
+    """Wake this process's reminder scheduler if a new reminder is due sooner"""
+    if _reminder_listener and send_times:
+        _reminder_listener(min(send_times))
+
+# Largest party one booking can seat
+MAX_GUESTS = 100
+
+def parse_guests(value) -> int:
+    """
+    Party size as an int (4 or "4")
+    
+    Raises:
+        ValueError: Unless it is a whole number from 1 to MAX_GUESTS
+    """
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        raise ValueError(f'invalid guests {value!r}')
+    try:
+        guests = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'invalid guests {value!r}')
+    if not 0 < guests <= MAX_GUESTS:
+        raise ValueError(f'guests must be between 1 and {MAX_GUESTS}')
+    return guests
+
+def create_booking(booking_data: Dict, send_email: bool = True) -> Dict:
+    """
+    Create new booking
+    
+    Args:
+        booking_data: customer, email, phone, date, time, guests, table_pref
+        send_email: Send the confirmation before returning; callers that
+                    deliver it off the request path pass False
+    
+    Raises:
+        ValueError: If guests is not a whole number from 1 to MAX_GUESTS
+    """
+    guests = parse_guests(booking_data.get('guests'))
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    booking_id = _new_booking_id(cursor)
     
     cursor.execute('''
         INSERT INTO bookings 
-        (id, customer, email, phone, date, time, guests, table_pref, status)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        (id, customer, email, phone, date, time, guests, table_pref, status, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
     ''', (
         booking_id,
         booking_data.get('customer'),
@@ -131,37 +695,171 @@ def create_booking(booking_data: Dict) -> Dict:
         booking_data.get('phone'),
         booking_data.get('date'),
         booking_data.get('time'),
-        booking_data.get('guests'),
+        guests,
         booking_data.get('table_pref', 'Any'),
         'confirmed'
     ))
+    reminders = schedule_reminders(cursor, [(booking_id, booking_data.get('date'), booking_data.get('time'))])
     
     conn.commit()
     conn.close()
+    bump_bookings_version()
+    notify_reminders(reminders)
     
     # Get the created booking
     booking = get_booking(booking_id)
     
     # Send confirmation email
-    try:
-        from email_service import email_service
-        email_service.send_booking_confirmation(booking)
-    except Exception as e:
-        print(f"Warning: Could not send confirmation email: {e}")
+    if send_email:
+        try:
+            get_email_service().send_booking_confirmation(booking)
+        except Exception as e:
+            print(f"Warning: Could not send confirmation email: {e}")
     
     return booking
 
+MAX_GROUP_BOOKINGS = 50
+
+def create_booking_group(group_data: Dict, send_email: bool = True) -> Dict:
+    """
+    Create several linked bookings (e.g. an event's tables and seatings) atomically
+
+    Args:
+        group_data: {'customer', 'email', 'phone', 'name' (optional event name),
+                     'bookings': [{'date', 'time', 'guests', 'table_pref', ...}]};
+                    each booking inherits customer/email/phone unless it sets its own
+        send_email: Send the group confirmation before returning (see create_booking)
+
+    Returns:
+        {'group_id', 'name', 'bookings': [...]}
+
+    Raises:
+        ValueError: If the group or any booking is invalid (nothing is written)
+    """
+    items = group_data.get('bookings')
+    if not isinstance(items, list) or not items:
+        raise ValueError('bookings must be a non-empty list')
+    if len(items) > MAX_GROUP_BOOKINGS:
+        raise ValueError(f'A group can have at most {MAX_GROUP_BOOKINGS} bookings')
+    
+    rows = []
+    for index, item in enumerate(items, start=1):
+        if not isinstance(item, dict):
+            raise ValueError(f'Booking {index}: expected an object')
+        booking = {field: group_data.get(field) for field in ('customer', 'email', 'phone')}
+        booking.update({k: v for k, v in item.items() if v is not None})
+        for field in ('customer', 'date', 'time', 'guests'):
+            if not booking.get(field):
+                raise ValueError(f'Booking {index}: missing required field: {field}')
+        try:
+            booking['guests'] = parse_guests(booking['guests'])
+        except ValueError as e:
+            raise ValueError(f'Booking {index}: {e}')
+        rows.append(booking)
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        # Take the write lock up front so generated IDs can't collide with a concurrent insert
+        cursor.execute('BEGIN IMMEDIATE')
+        group_id = f"GRP{uuid.uuid4().hex[:8].upper()}"
+        taken = set()
+        for booking in rows:
+            booking['id'] = _new_booking_id(cursor, taken)
+            taken.add(booking['id'])
+        
+        cursor.executemany('''
+            INSERT INTO bookings 
+            (id, customer, email, phone, date, time, guests, table_pref, status, updated_at, group_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'confirmed', CURRENT_TIMESTAMP, ?)
+        ''', [(
+            b['id'], b['customer'], b.get('email'), b.get('phone'),
+            b['date'], b['time'], b['guests'], b.get('table_pref', 'Any'), group_id
+        ) for b in rows])
+        reminders = schedule_reminders(cursor, [(b['id'], b['date'], b['time']) for b in rows])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    bump_bookings_version()
+    notify_reminders(reminders)
+    
+    group = get_booking_group(group_id)
+    group['name'] = group_data.get('name')
+    
+    # One confirmation for the whole group
+    if send_email:
+        try:
+            get_email_service().send_group_confirmation(group)
+        except Exception as e:
+            print(f"Warning: Could not send confirmation email: {e}")
+    
+    return group
+
+def get_booking_group(group_id: str) -> Optional[Dict]:
+    """Get all bookings in a group, in date/time order"""
+    conn = get_db_connection()
+    bookings = conn.execute(
+        'SELECT * FROM bookings WHERE group_id = ? ORDER BY date, time, id', (group_id,)
+    ).fetchall()
+    conn.close()
+    if not bookings:
+        return None
+    return {'group_id': group_id, 'bookings': [dict(b) for b in bookings]}
+
 def delete_booking(booking_id: str) -> bool:
-    """Cancel/delete booking"""
+    """Cancel/delete booking (a confirmed booking's table is offered to the waitlist)"""
     conn = get_db_connection()
     cursor = conn.cursor()
+    # Only the cancel that moves it off 'confirmed' frees the table, so two
+    # concurrent cancels can't both offer it
     cursor.execute(
-        "UPDATE bookings SET status = 'cancelled' WHERE id = ?", 
+        "UPDATE bookings SET status = 'cancelled', version = version + 1, "
+        "updated_at = CURRENT_TIMESTAMP WHERE id = ? AND status = 'confirmed'",
         (booking_id,)
     )
+    rows_affected = cursor.rowcount
+    freed = None
+    if rows_affected:
+        freed = cursor.execute('SELECT * FROM bookings WHERE id = ?', (booking_id,)).fetchone()
+    else:
+        cursor.execute(
+            "UPDATE bookings SET status = 'cancelled', version = version + 1, "
+            "updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+            (booking_id,)
+        )
+        rows_affected = cursor.rowcount
+    # Reminders already claimed by a sender are skipped when it re-reads the booking
+    cursor.execute("DELETE FROM reminders WHERE booking_id = ? AND status = 'pending'", (booking_id,))
     conn.commit()
+    conn.close()
+    if rows_affected:
+        bump_bookings_version()
+    
+    if freed:
+        # Imported here because waitlist builds on this module
+        from waitlist import offer_freed_slot
+        try:
+            offer_freed_slot(dict(freed))
+        except Exception as e:
+            print(f"Warning: Could not offer cancelled table to the waitlist: {e}")
+    return rows_affected > 0
+
+def mark_no_show(booking_id: str) -> bool:
+    """Record that a confirmed booking's party never arrived"""
+    conn = get_db_connection()
+    cursor = conn.execute(
+        "UPDATE bookings SET status = 'no-show', version = version + 1, "
+        "updated_at = CURRENT_TIMESTAMP WHERE id = ? AND status = 'confirmed'",
+        (booking_id,)
+    )
     rows_affected = cursor.rowcount
+    conn.commit()
     conn.close()
+    if rows_affected:
+        bump_bookings_version()
     return rows_affected > 0
 
 # Menu operations
@@ -2,11 +2,9 @@
 Email Service for Restaurant Booking Confirmations
 """
 
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from datetime import datetime
 import os
+import metrics
 
 class EmailService:
     def __init__(self):
@@ -20,6 +18,7 @@ class EmailService:
         # For development, we'll log emails to console instead of sending
         self.dev_mode = True  # Set to False in production
     
+    @metrics.timed('email_send_seconds', template='booking_confirmation')
     def send_booking_confirmation(self, booking_data):
         """
         Send booking confirmation email to customer
@@ -38,20 +37,102 @@ class EmailService:
         html_content = self._create_email_html(booking_data)
         text_content = self._create_email_text(booking_data)
         
+        return self._deliver(customer_email, subject, html_content, text_content, 'EMAIL CONFIRMATION')
+    
+    @metrics.timed('email_send_seconds', template='group_confirmation')
+    def send_group_confirmation(self, group):
+        """
+        Send one confirmation covering every booking in a group
+        
+        Args:
+            group: Dictionary with group_id, optional name and a bookings list
+        """
+        bookings = group['bookings']
+        customer_email = next((b['email'] for b in bookings if b.get('email')), None)
+        if not customer_email:
+            print("No email provided, skipping group confirmation email")
+            return False
+        
+        title = group.get('name') or f"Group booking {group['group_id']}"
+        subject = f"Booking Confirmation - Mediterranean Delight ({title}, {len(bookings)} reservations)"
+        
+        html_content = self._create_group_email_html(group, title)
+        text_content = self._create_group_email_text(group, title)
+        return self._deliver(customer_email, subject, html_content, text_content, 'GROUP CONFIRMATION')
+    
+    @metrics.timed('email_send_seconds', template='booking_reminder')
+    def send_booking_reminder(self, booking_data):
+        """
+        Remind a customer of their upcoming reservation
+        
+        Args:
+            booking_data: Dictionary containing booking information
+        """
+        customer_email = booking_data.get('email')
+        if not customer_email:
+            return False
+        
+        subject = f"Reminder: your table at Mediterranean Delight on {booking_data['date']} at {booking_data['time']}"
+        html_content = self._create_reminder_email_html(booking_data)
+        text_content = self._create_reminder_email_text(booking_data)
+        return self._deliver(customer_email, subject, html_content, text_content, 'BOOKING REMINDER')
+    
+    @metrics.timed('email_send_seconds', template='waitlist_offer')
+    def send_waitlist_offer(self, entry, hold_minutes):
+        """
+        Tell a waitlisted guest a table has opened up and is on hold for them
+        
+        Args:
+            entry: Waitlist entry with the offered_* slot details
+            hold_minutes: How long the table is held
+        """
+        customer_email = entry.get('email')
+        if not customer_email:
+            print(f"No email for waitlist entry {entry['id']}, offer must be made by phone ({entry.get('phone')})")
+            return False
+        
+        subject = f"A table is free on {entry['offered_date']} at {entry['offered_time']} - Mediterranean Delight"
+        text_content = f"""
+Mediterranean Delight - Good news from the waitlist!
+{'='*50}
+
+Dear {entry['customer']},
+
+A table for {entry['guests']} has just opened up:
+
+Date: {entry['offered_date']}
+Time: {entry['offered_time']}
+Waitlist ID: {entry['id']}
+
+We're holding it for you for the next {hold_minutes} minutes. To take it,
+reply to our AI chat assistant with "accept {entry['id']}" or confirm on our
+website. If it doesn't suit you, simply ignore this email and we'll offer it
+to the next guest.
+
+---
+Mediterranean Delight
+123 Restaurant Street, Food City
+Phone: +1 (555) 123-4567
+        """.strip()
+        html_content = "<html><body><pre style=\"font-family: Arial, sans-serif\">" + text_content + "</pre></body></html>"
+        return self._deliver(customer_email, subject, html_content, text_content, 'WAITLIST OFFER')
+    
+    def _deliver(self, to_email, subject, html_content, text_content, label):
+        """Print the email in development mode, otherwise send it via SMTP"""
         try:
             if self.dev_mode:
                 # Development mode: Print to console
                 print("\n" + "="*60)
-                print("📧 EMAIL CONFIRMATION (Development Mode)")
+                print(f"📧 {label} (Development Mode)")
                 print("="*60)
-                print(f"To: {customer_email}")
+                print(f"To: {to_email}")
                 print(f"Subject: {subject}")
                 print("\n" + text_content)
                 print("="*60 + "\n")
                 return True
             else:
                 # Production mode: Send actual email
-                return self._send_smtp_email(customer_email, subject, html_content, text_content)
+                return self._send_smtp_email(to_email, subject, html_content, text_content)
         except Exception as e:
             print(f"Error sending email: {e}")
             return False
@@ -169,8 +250,189 @@ If you need to cancel or modify your booking, please contact us or use our AI ch
         """
         return text.strip()
     
+    def _create_reminder_email_html(self, booking_data):
+        """Create HTML reminder email content"""
+        html = f"""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <style>
+                body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
+                .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
+                .header {{ background: linear-gradient(135deg, #e67e22 0%, #d35400 100%); 
+                           color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0; }}
+                .content {{ background: #f8f9fa; padding: 30px; }}
+                .booking-details {{ background: white; padding: 20px; border-radius: 8px; margin: 20px 0; }}
+                .detail-row {{ padding: 10px 0; border-bottom: 1px solid #eee; }}
+                .detail-label {{ font-weight: bold; color: #e67e22; }}
+                .footer {{ text-align: center; padding: 20px; color: #7f8c8d; font-size: 14px; }}
+            </style>
+        </head>
+        <body>
+            <div class="container">
+                <div class="header">
+                    <h1>🍽️ Mediterranean Delight</h1>
+                    <h2>See you soon!</h2>
+                </div>
+                
+                <div class="content">
+                    <p>Dear {booking_data['customer']},</p>
+                    
+                    <p>This is a friendly reminder of your upcoming reservation with us.</p>
+                    
+                    <div class="booking-details">
+                        <div class="detail-row">
+                            <span class="detail-label">Booking ID:</span> {booking_data['id']}
+                        </div>
+                        <div class="detail-row">
+                            <span class="detail-label">Date:</span> {booking_data['date']}
+                        </div>
+                        <div class="detail-row">
+                            <span class="detail-label">Time:</span> {booking_data['time']}
+                        </div>
+                        <div class="detail-row">
+                            <span class="detail-label">Number of Guests:</span> {booking_data['guests']}
+                        </div>
+                        <div class="detail-row">
+                            <span class="detail-label">Table Preference:</span> {booking_data.get('table_pref') or 'Any'}
+                        </div>
+                    </div>
+                    
+                    <p>If your plans have changed, please cancel through our AI chat assistant
+                    or call us so we can offer the table to another guest.</p>
+                </div>
+                
+                <div class="footer">
+                    <p>Mediterranean Delight<br>
+                    123 Restaurant Street, Food City<br>
+                    Phone: +1 (555) 123-4567</p>
+                </div>
+            </div>
+        </body>
+        </html>
+        """
+        return html
+    
+    def _create_reminder_email_text(self, booking_data):
+        """Create plain text reminder email content"""
+        text = f"""
+Mediterranean Delight - Reservation Reminder
+{'='*50}
+
+Dear {booking_data['customer']},
+
+This is a friendly reminder of your upcoming reservation with us.
+
+Booking ID: {booking_data['id']}
+Date: {booking_data['date']}
+Time: {booking_data['time']}
+Number of Guests: {booking_data['guests']}
+Table Preference: {booking_data.get('table_pref') or 'Any'}
+
+If your plans have changed, please cancel through our AI chat assistant
+or call us so we can offer the table to another guest.
+
+---
+Mediterranean Delight
+123 Restaurant Street, Food City
+Phone: +1 (555) 123-4567
+        """
+        return text.strip()
+    
+    def _create_group_email_html(self, group, title):
+        """Create HTML email content listing every booking in a group"""
+        rows = "".join(f"""
+                        <tr>
+                            <td>{b['id']}</td><td>{b['date']}</td><td>{b['time']}</td>
+                            <td>{b['guests']}</td><td>{b.get('table_pref') or 'Any'}</td>
+                        </tr>""" for b in group['bookings'])
+        html = f"""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <style>
+                body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
+                .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
+                .header {{ background: linear-gradient(135deg, #e67e22 0%, #d35400 100%); 
+                           color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0; }}
+                .content {{ background: #f8f9fa; padding: 30px; }}
+                table {{ width: 100%; border-collapse: collapse; background: white; }}
+                th, td {{ padding: 8px; border-bottom: 1px solid #eee; text-align: left; }}
+                th {{ color: #e67e22; }}
+                .footer {{ text-align: center; padding: 20px; color: #7f8c8d; font-size: 14px; }}
+            </style>
+        </head>
+        <body>
+            <div class="container">
+                <div class="header">
+                    <h1>🍽️ Mediterranean Delight</h1>
+                    <h2>{title}</h2>
+                </div>
+                
+                <div class="content">
+                    <p>Dear {group['bookings'][0]['customer']},</p>
+                    
+                    <p>All {len(group['bookings'])} reservations for your event are confirmed.
+                    Your group reference is <strong>{group['group_id']}</strong>.</p>
+                    
+                    <table>
+                        <tr><th>Booking ID</th><th>Date</th><th>Time</th><th>Guests</th><th>Table</th></tr>{rows}
+                    </table>
+                    
+                    <p>We look forward to hosting you!</p>
+                </div>
+                
+                <div class="footer">
+                    <p>Mediterranean Delight<br>
+                    123 Restaurant Street, Food City<br>
+                    📞 +1 (555) 123-4567<br>
+                    📧 info@mediterraneandelight.com</p>
+                </div>
+            </div>
+        </body>
+        </html>
+        """
+        return html
+    
+    def _create_group_email_text(self, group, title):
+        """Create plain text email content listing every booking in a group"""
+        lines = "\n".join(
+            f"{b['id']}: {b['date']} at {b['time']}, {b['guests']} guests, table {b.get('table_pref') or 'Any'}"
+            for b in group['bookings']
+        )
+        text = f"""
+Mediterranean Delight - {title}
+{'='*50}
+
+Dear {group['bookings'][0]['customer']},
+
+All {len(group['bookings'])} reservations for your event are confirmed.
+
+*** GROUP REFERENCE: {group['group_id']} ***
+
+Reservations:
+-------------
+{lines}
+
+Each Booking ID can be used to manage that reservation or to ask our AI assistant about it.
+
+We look forward to hosting you!
+
+---
+Mediterranean Delight
+123 Restaurant Street, Food City
+Phone: +1 (555) 123-4567
+Email: info@mediterraneandelight.com
+        """
+        return text.strip()
+    
     def _send_smtp_email(self, to_email, subject, html_content, text_content):
         """Send actual email via SMTP (for production)"""
+        # Deferred: only production sends need the SMTP and MIME modules
+        import smtplib
+        from email.mime.text import MIMEText
+        from email.mime.multipart import MIMEMultipart
+        
         try:
             # Create message
             message = MIMEMultipart('alternative')
@@ -196,5 +458,17 @@ If you need to cancel or modify your booking, please contact us or use our AI ch
             print(f"Failed to send email: {e}")
             return False
 
-# Create singleton instance
-email_service = EmailService()
+_email_service = None
+
+def get_email_service():
+    """Get the shared EmailService, creating it on first use"""
+    global _email_service
+    if _email_service is None:
+        _email_service = EmailService()
+    return _email_service
+
+def __getattr__(name):
+    """Keep `from email_service import email_service` working lazily"""
+    if name == 'email_service':
+        return get_email_service()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,61 @@
+"""
+Gunicorn configuration for the restaurant web app
+
+    gunicorn -c gunicorn.conf.py app:app
+
+The app is preloaded in the master and forked into workers, so imported
+code is shared copy-on-write. Each worker initializes its own agent and
+database schema lazily on its first request (see app.create_app).
+"""
+
+import gc
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '10000')}"
+
+# Threaded workers: SQLite and SMTP calls block, so a few threads per worker
+# keep one slow request from stalling the whole process. Worker count is
+# capped because small instances report many host CPUs but have little RAM.
+workers = int(os.getenv('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 4)))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+
+# Idle keep-alive connections are parked in the gthread poller, not on a
+# thread, so keep them open longer than the platform proxy's idle timeout.
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '75'))
+
+timeout = 30
+graceful_timeout = 30
+
+# Preloading makes recycling workers cheap, which bounds slow memory growth
+preload_app = True
+max_requests = 1000
+max_requests_jitter = 100
+
+accesslog = '-'
+
+
+def pre_fork(server, worker):
+    """
+    Move preloaded objects out of the GC's reach before forking
+
+    Without this the first collection in each worker touches (and so copies)
+    every page holding a preloaded object. The intent model is loaded first
+    so its NumPy weights are shared by every worker too.
+    """
+    from intent_classifier import get_classifier
+    get_classifier()
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    """
+    Start this worker's reminder scheduler (disable with REMINDERS_ENABLED=0)
+
+    Every worker runs one per location; due reminders are claimed row by
+    row in the database, so each is still sent exactly once.
+    """
+    from app import app
+    from reminders import start_scheduler
+    start_scheduler([tenant.database_path for tenant in app.extensions['tenants']])
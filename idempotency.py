@@ -0,0 +1,186 @@
+"""
+Idempotency keys for booking writes
+
+Clients that retry a booking request after a timeout send the same
+Idempotency-Key header each time. The first request runs normally and its
+response is stored; a retry with the same key gets that stored response
+back (with Idempotent-Replayed: true) without touching the bookings table
+or sending another email.
+
+Responses live in a small SQLite file shared by every gunicorn worker (as
+the rate-limit buckets do). Rows are keyed by a 16-byte hash of the key,
+scoped to the location, method and path, and expire after
+IDEMPOTENCY_TTL_SECONDS. While the first request is still running a retry
+gets 409 + Retry-After; reusing a key with a different body gets 422.
+Server errors and 429s are not stored, so those can simply be retried.
+"""
+
+import functools
+import gzip
+import hashlib
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import Optional, Tuple
+
+from flask import Flask, Response, current_app, request
+
+import database
+from serialization import json_response
+
+HEADER = 'Idempotency-Key'
+REPLAY_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+# How long a stored response is replayed
+DEFAULT_TTL_SECONDS = int(os.getenv('IDEMPOTENCY_TTL_SECONDS', '86400'))
+# A request still running after this long is assumed dead; its key can be reused
+IN_PROGRESS_TIMEOUT = 60
+
+# begin() outcomes
+NEW, REPLAY, IN_PROGRESS, MISMATCH = 'new', 'replay', 'in_progress', 'mismatch'
+
+
+def scoped_key(method: str, path: str, key: str) -> bytes:
+    """Storage key: the client's key scoped to this location and route"""
+    scope = f'{database.current_database_path()}\0{method}\0{path}\0{key}'
+    return hashlib.sha256(scope.encode('utf-8')).digest()[:16]
+
+
+def fingerprint(body: bytes) -> bytes:
+    return hashlib.sha256(body).digest()[:8]
+
+
+def cacheable(status: int) -> bool:
+    """Final answers are stored; overload and server errors are worth retrying"""
+    return status < 500 and status not in (409, 429)
+
+
+class IdempotencyStore:
+    """Stored responses shared across processes through a SQLite file"""
+
+    def __init__(self, path: str, ttl: int = DEFAULT_TTL_SECONDS):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread, reopened after a fork
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS responses (
+                    key BLOB PRIMARY KEY,
+                    fingerprint BLOB NOT NULL,
+                    status INTEGER,
+                    content_type TEXT,
+                    body BLOB,
+                    expires REAL NOT NULL
+                ) WITHOUT ROWID
+            ''')
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def begin(self, key: bytes, request_fingerprint: bytes) -> Tuple[str, Optional[Tuple[int, str, bytes]]]:
+        """
+        Claim a key for a new request, or find what it already maps to
+
+        Returns:
+            (NEW, None)                            run the request, then complete() or abandon()
+            (REPLAY, (status, content_type, body)) send the stored response
+            (IN_PROGRESS, None)                    the first request hasn't finished
+            (MISMATCH, None)                       the key was used for a different request
+        """
+        conn = self._connection()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT fingerprint, status, content_type, body, expires FROM responses WHERE key = ?', (key,)
+            ).fetchone()
+            if row is not None and row[4] > now:
+                conn.execute('COMMIT')
+                if row[0] != request_fingerprint:
+                    return MISMATCH, None
+                if row[1] is None:
+                    return IN_PROGRESS, None
+                return REPLAY, (row[1], row[2], row[3])
+            conn.execute(
+                'INSERT OR REPLACE INTO responses (key, fingerprint, expires) VALUES (?, ?, ?)',
+                (key, request_fingerprint, now + IN_PROGRESS_TIMEOUT)
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return NEW, None
+
+    def complete(self, key: bytes, status: int, content_type: str, body: bytes):
+        """Store the response for a key claimed by begin()"""
+        conn = self._connection()
+        now = time.time()
+        conn.execute(
+            'UPDATE responses SET status = ?, content_type = ?, body = ?, expires = ? WHERE key = ?',
+            (status, content_type, body, now + self.ttl, key)
+        )
+        if random.random() < 0.01:
+            conn.execute('DELETE FROM responses WHERE expires < ?', (now,))
+
+    def abandon(self, key: bytes):
+        """Release a claimed key without storing anything, so a retry runs again"""
+        self._connection().execute('DELETE FROM responses WHERE key = ? AND status IS NULL', (key,))
+
+
+def init_app(app: Flask):
+    app.extensions['idempotency'] = IdempotencyStore(
+        app.config['IDEMPOTENCY_DB'], app.config.get('IDEMPOTENCY_TTL_SECONDS', DEFAULT_TTL_SECONDS)
+    )
+
+
+def _error(status: int, message: str) -> Response:
+    response = json_response({'success': False, 'error': message}, status)
+    if status == 409:
+        response.headers['Retry-After'] = '1'
+    return response
+
+
+def idempotent(view):
+    """Replay the stored response for a repeated Idempotency-Key"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        client_key = request.headers.get(HEADER)
+        if client_key is None:
+            return view(*args, **kwargs)
+        if not client_key or len(client_key) > MAX_KEY_LENGTH:
+            return _error(400, f'{HEADER} must be 1-{MAX_KEY_LENGTH} characters')
+
+        store = current_app.extensions['idempotency']
+        key = scoped_key(request.method, request.path, client_key)
+        state, stored = store.begin(key, fingerprint(request.get_data()))
+        if state == REPLAY:
+            status, content_type, body = stored
+            return Response(body, status, mimetype=content_type, headers={REPLAY_HEADER: 'true'})
+        if state == IN_PROGRESS:
+            return _error(409, 'A request with this Idempotency-Key is still being processed')
+        if state == MISMATCH:
+            return _error(422, 'This Idempotency-Key was already used for a different request')
+
+        try:
+            response = current_app.make_response(view(*args, **kwargs))
+        except Exception:
+            store.abandon(key)
+            raise
+        if cacheable(response.status_code):
+            body = response.get_data()
+            if response.headers.get('Content-Encoding') == 'gzip':
+                body = gzip.decompress(body)  # replays may go to a client without gzip
+            store.complete(key, response.status_code, response.mimetype, body)
+        else:
+            store.abandon(key)
+        return response
+    return wrapper
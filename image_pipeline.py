@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Responsive image pipeline for menu photos
+
+Generates resized AVIF/WebP/JPEG variants of every source image in
+static/images, records their dimensions in an image manifest and builds the
+srcset strings the menu page uses. Items that share a source image share its
+variants, so each photo is only processed (and downloaded) once.
+
+Run at build time:  python image_pipeline.py
+Report only:        python image_pipeline.py --report
+"""
+
+import json
+import os
+from typing import Dict, List, Optional
+
+IMAGES_DIR = os.path.join('static', 'images')
+VARIANTS_DIR = 'variants'
+MANIFEST_PATH = os.path.join(IMAGES_DIR, 'manifest.json')
+
+VARIANT_WIDTHS = [160, 320, 480, 640, 960]
+SOURCE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+# Output formats in order of preference, with encoder settings
+FORMATS = [
+    ('avif', 'image/avif', {'quality': 50}),
+    ('webp', 'image/webp', {'quality': 75, 'method': 6}),
+    ('jpg', 'image/jpeg', {'quality': 78, 'optimize': True, 'progressive': True}),
+]
+
+# `sizes` attribute matching the .card-grid layout in styles.css
+MENU_IMAGE_SIZES = '(max-width: 768px) 100vw, 400px'
+
+_manifest_cache = {'mtime': None, 'manifest': None}
+
+
+def _supported_formats():
+    """Return the FORMATS entries the installed Pillow can encode"""
+    from PIL import features
+
+    supported = []
+    for ext, mime, options in FORMATS:
+        if ext == 'jpg' or features.check(ext):
+            supported.append((ext, mime, options))
+    return supported
+
+
+def _variant_is_fresh(source_path: str, variant_path: str) -> bool:
+    """Check if a variant exists and is newer than its source"""
+    return (os.path.exists(variant_path) and
+            os.path.getmtime(variant_path) >= os.path.getmtime(source_path))
+
+
+def process_image(filename: str, widths: List[int] = None, force: bool = False) -> Dict:
+    """
+    Generate all variants of one source image
+
+    Args:
+        filename: Image file name inside static/images
+        widths: Target widths in pixels (never upscaled past the source)
+        force: Regenerate variants even if they are up to date
+
+    Returns:
+        Manifest entry describing the source and its variants
+    """
+    from PIL import Image
+
+    widths = widths or VARIANT_WIDTHS
+    source_path = os.path.join(IMAGES_DIR, filename)
+    stem = os.path.splitext(filename)[0]
+    os.makedirs(os.path.join(IMAGES_DIR, VARIANTS_DIR), exist_ok=True)
+
+    with Image.open(source_path) as source:
+        source = source.convert('RGB')
+        src_width, src_height = source.size
+        entry = {
+            'width': src_width,
+            'height': src_height,
+            'bytes': os.path.getsize(source_path),
+            'variants': {}
+        }
+
+        targets = sorted({min(w, src_width) for w in widths})
+        for ext, mime, options in _supported_formats():
+            variants = []
+            for width in targets:
+                height = round(src_height * width / src_width)
+                rel_path = f"{VARIANTS_DIR}/{stem}-{width}.{ext}"
+                out_path = os.path.join(IMAGES_DIR, rel_path)
+
+                if force or not _variant_is_fresh(source_path, out_path):
+                    resized = source.resize((width, height), Image.LANCZOS)
+                    resized.save(out_path, **options)
+
+                variants.append({
+                    'width': width,
+                    'height': height,
+                    'path': rel_path,
+                    'bytes': os.path.getsize(out_path)
+                })
+            entry['variants'][mime] = variants
+
+    return entry
+
+
+def build_manifest(force: bool = False) -> Dict:
+    """Process every source image and write the manifest"""
+    images = {}
+    for filename in sorted(os.listdir(IMAGES_DIR)):
+        if filename.lower().endswith(SOURCE_EXTENSIONS):
+            images[filename] = process_image(filename, force=force)
+            print(f"Processed {filename}")
+
+    manifest = {'version': 1, 'widths': VARIANT_WIDTHS, 'images': images}
+    with open(MANIFEST_PATH, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_manifest() -> Optional[Dict]:
+    """Load the image manifest, reloading only when the file changes"""
+    try:
+        mtime = os.path.getmtime(MANIFEST_PATH)
+    except OSError:
+        return None
+
+    if _manifest_cache['mtime'] != mtime:
+        with open(MANIFEST_PATH) as f:
+            _manifest_cache['manifest'] = json.load(f)
+        _manifest_cache['mtime'] = mtime
+    return _manifest_cache['manifest']
+
+
+def get_responsive_images(filenames: List[str]) -> Dict[str, Dict]:
+    """
+    Build srcset data for the given image names
+
+    Each unique image appears once, however many menu items use it.
+    Images missing from the manifest are left out so the client falls back
+    to the original file.
+    """
+    manifest = load_manifest()
+    if not manifest:
+        return {}
+
+    result = {}
+    for filename in set(filenames):
+        entry = manifest['images'].get(filename)
+        if not entry:
+            continue
+
+        sources = {}
+        for mime, variants in entry['variants'].items():
+            sources[mime] = ', '.join(
+                f"/images/{v['path']} {v['width']}w" for v in variants
+            )
+
+        jpeg_variants = entry['variants'].get('image/jpeg', [])
+        fallback = jpeg_variants[len(jpeg_variants) // 2]['path'] if jpeg_variants else filename
+        result[filename] = {
+            'width': entry['width'],
+            'height': entry['height'],
+            'sources': sources,
+            'fallback': f"/images/{fallback}",
+            'sizes': MENU_IMAGE_SIZES
+        }
+    return result
+
+
+def _pick_variant(variants: List[Dict], needed_px: int) -> Dict:
+    """Mimic the browser: smallest candidate at least as wide as needed"""
+    for variant in variants:
+        if variant['width'] >= needed_px:
+            return variant
+    return variants[-1]
+
+
+def report_savings(filenames: List[str], profiles: Dict[str, int] = None) -> Dict:
+    """
+    Estimate bytes transferred for the menu page images
+
+    Args:
+        filenames: Image names referenced by menu items (duplicates allowed)
+        profiles: Name -> rendered image width in device pixels
+
+    Returns:
+        Dictionary of profile -> {'original', 'optimized', 'saved_pct'}
+    """
+    manifest = load_manifest()
+    if not manifest:
+        raise RuntimeError("No image manifest found, run: python image_pipeline.py")
+
+    profiles = profiles or {
+        'phone (360px @2x)': 720,
+        'phone (360px @3x)': 1080,
+        'desktop (400px @1x)': 400,
+    }
+    unique = [f for f in sorted(set(filenames)) if f in manifest['images']]
+
+    report = {}
+    for profile, needed_px in profiles.items():
+        original = optimized = 0
+        for filename in unique:
+            entry = manifest['images'][filename]
+            original += entry['bytes']
+            # Best format the browser accepts comes first in FORMATS
+            best_mime = next(mime for _, mime, _ in FORMATS if mime in entry['variants'])
+            optimized += _pick_variant(entry['variants'][best_mime], needed_px)['bytes']
+        report[profile] = {
+            'original': original,
+            'optimized': optimized,
+            'saved_pct': round(100 * (1 - optimized / original), 1) if original else 0.0
+        }
+    return report
+
+
+def _menu_image_names() -> List[str]:
+    """Image names used by the menu, falling back to every manifest entry"""
+    try:
+        from database import get_all_menu_items
+        return [item['image'] for item in get_all_menu_items() if item.get('image')]
+    except Exception:
+        manifest = load_manifest() or {'images': {}}
+        return list(manifest['images'])
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate responsive menu image variants")
+    parser.add_argument("--force", action="store_true", help="Regenerate all variants")
+    parser.add_argument("--report", action="store_true", help="Only print the byte savings report")
+    args = parser.parse_args()
+
+    if not args.report:
+        build_manifest(force=args.force)
+
+    names = _menu_image_names()
+    print(f"\nMenu page: {len(names)} items, {len(set(names))} unique images")
+    for profile, stats in report_savings(names).items():
+        print(f"  {profile}: {stats['original'] / 1024:.0f} KiB -> "
+              f"{stats['optimized'] / 1024:.0f} KiB ({stats['saved_pct']}% saved)")
@@ -1,6 +1,5 @@
 import os
 from typing import List, Dict, Any
-import openai  # or anthropic, cohere, etc.
 from agent import RestaurantAssistantAgent
 
 class LLMEnhancedAgent(RestaurantAssistantAgent):
@@ -9,7 +8,8 @@ class LLMEnhancedAgent(RestaurantAssistantAgent):
     def __init__(self, api_key: str = None, model: str = "gpt-3.5-turbo"):
         super().__init__(llm_provider="openai", model=model)
         
-        # Configure LLM
+        # Configure LLM (imported here so plain agent users never load the SDK)
+        import openai  # or anthropic, cohere, etc.
         if api_key:
             openai.api_key = api_key
         else:
@@ -19,6 +19,8 @@ class LLMEnhancedAgent(RestaurantAssistantAgent):
     
     def generate_llm_response(self, messages: List[Dict[str, str]]) -> str:
         """Generate response using actual LLM"""
+        import openai
+        
         try:
             response = openai.ChatCompletion.create(
                 model=self.model,
@@ -1,10 +1,40 @@
 #!/usr/bin/env python3
 """
 Main application for Restaurant Assistant AI Agent
+
+    python main.py                     # interactive chat
+    python main.py --examples          # canned example queries
+    python main.py --batch chats.ndjson --workers 4 > results.ndjson
+
+Batch mode replays a chat log offline. Input is one query per line, or
+NDJSON objects like {"session_id": "s1", "message": "hi"}. Results are
+written as NDJSON while the log is still being read.
 """
 
+import contextlib
 import json
+import multiprocessing
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, IO, Iterator, Optional
 from agent import RestaurantAssistantAgent, AgentResponse
+from database import ensure_database
+
+# Queries handed to a worker per queue message; most answers take well under
+# a millisecond, so per-query messages would be dominated by pickling
+BATCH_CHUNK_SIZE = 64
+# Pending chunks per worker; the reader blocks when a worker falls behind
+BATCH_QUEUE_SIZE = 16
+# Conversations each worker keeps state for before dropping the oldest
+SESSION_CACHE_SIZE = 1000
+# Latencies kept for the end-of-run percentiles
+LATENCY_SAMPLES = 10000
 
 def display_response(response: AgentResponse):
     """Display agent response in a formatted way"""
@@ -98,16 +128,204 @@ def run_examples():
         response = agent.process_query(query)
         display_response(response)
 
+def read_queries(stream: IO[str]) -> Iterator[Dict]:
+    """
+    Parse a chat log lazily, one line at a time
+    
+    Plain-text lines are independent one-message sessions; NDJSON lines may
+    carry session_id, message (or query) and an optional id.
+    
+    Yields:
+        {'seq', 'session_id', 'query', 'id'} or {'seq', 'error'} for bad lines
+    """
+    for seq, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        if not line.startswith('{'):
+            yield {'seq': seq, 'session_id': f'line-{seq}', 'query': line, 'id': None}
+            continue
+        try:
+            record = json.loads(line)
+            query = record.get('message', record.get('query'))
+            if not isinstance(query, str):
+                raise ValueError('missing "message"')
+        except (ValueError, AttributeError) as e:
+            yield {'seq': seq, 'error': f'invalid line: {e}'}
+            continue
+        session_id = record.get('session_id')
+        yield {
+            'seq': seq,
+            'session_id': str(session_id) if session_id is not None else f'line-{seq}',
+            'query': query,
+            'id': record.get('id'),
+        }
+
+def _answer(agents: OrderedDict, item: Dict, include_data: bool) -> Dict:
+    """Run one query through its session's agent and build the result record"""
+    agent = agents.get(item['session_id'])
+    if agent is None:
+        agent = agents[item['session_id']] = RestaurantAssistantAgent()
+        if len(agents) > SESSION_CACHE_SIZE:
+            agents.popitem(last=False)
+    else:
+        agents.move_to_end(item['session_id'])
+    
+    result = {'seq': item['seq'], 'session_id': item['session_id'], 'id': item['id'], 'query': item['query']}
+    started = time.perf_counter()
+    try:
+        response = agent.process_query(item['query'])
+        result.update(action=response.action, message=response.message,
+                      needs_confirmation=response.needs_confirmation)
+        if include_data:
+            result['data'] = response.data
+    except Exception as e:
+        result['error'] = str(e)
+    result['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 3)
+    return result
+
+def _batch_worker(inbox, outbox, include_data: bool):
+    """Process queries for the sessions assigned to this worker, in arrival order"""
+    agents = OrderedDict()
+    while True:
+        chunk = inbox.get()
+        if chunk is None:
+            outbox.put(None)
+            return
+        outbox.put([_answer(agents, item, include_data) for item in chunk])
+
+def _write_result(output: IO[str], result: Dict, stats: Dict):
+    output.write(json.dumps(result, default=str, ensure_ascii=False) + '\n')
+    stats['count'] += 1
+    if 'error' in result:
+        stats['errors'] += 1
+    if 'elapsed_ms' in result:
+        # Reservoir sample keeps percentiles in constant memory
+        samples = stats['samples']
+        if len(samples) < LATENCY_SAMPLES:
+            samples.append(result['elapsed_ms'])
+        else:
+            slot = random.randrange(stats['count'])
+            if slot < LATENCY_SAMPLES:
+                samples[slot] = result['elapsed_ms']
+
+def run_batch(source: IO[str], output: IO[str], workers: int = 0, include_data: bool = False) -> Dict:
+    """
+    Answer every query in a chat log, writing NDJSON results as they complete
+    
+    Each session is pinned to one worker process, so its queries run in
+    order against the same agent (and its conversation memory). Results of
+    different sessions may interleave; use seq to restore input order.
+    
+    Args:
+        source: Text stream of queries (see read_queries)
+        output: Text stream for NDJSON results
+        workers: Worker processes (0 answers everything in this process)
+        include_data: Include each response's data payload
+        
+    Returns:
+        Summary with count, errors, elapsed seconds and latency percentiles
+    """
+    # Setup and the agents print diagnostics; stdout may be the NDJSON stream
+    with contextlib.redirect_stdout(sys.stderr):
+        stats = {'count': 0, 'errors': 0, 'samples': []}
+        started = time.perf_counter()
+        ensure_database()
+        
+        if workers <= 0:
+            agents = OrderedDict()
+            for item in read_queries(source):
+                _write_result(output, item if 'error' in item else _answer(agents, item, include_data), stats)
+                output.flush()
+        else:
+            # Load the intent model once so forked workers share it
+            from intent_classifier import get_classifier
+            get_classifier()
+            
+            inboxes = [multiprocessing.Queue(BATCH_QUEUE_SIZE) for _ in range(workers)]
+            outbox = multiprocessing.Queue(BATCH_QUEUE_SIZE * workers)
+            processes = [
+                multiprocessing.Process(target=_batch_worker, args=(inbox, outbox, include_data), daemon=True)
+                for inbox in inboxes
+            ]
+            for process in processes:
+                process.start()
+            
+            def feed():
+                pending = [[] for _ in range(workers)]
+                for item in read_queries(source):
+                    if 'error' in item:
+                        outbox.put([item])
+                        continue
+                    worker = zlib.crc32(item['session_id'].encode()) % workers
+                    pending[worker].append(item)
+                    if len(pending[worker]) >= BATCH_CHUNK_SIZE:
+                        inboxes[worker].put(pending[worker])
+                        pending[worker] = []
+                for inbox, chunk in zip(inboxes, pending):
+                    if chunk:
+                        inbox.put(chunk)
+                    inbox.put(None)
+            
+            reader = threading.Thread(target=feed, daemon=True)
+            reader.start()
+            finished = 0
+            while finished < workers:
+                try:
+                    results = outbox.get(timeout=1)
+                except queue.Empty:
+                    if not any(process.is_alive() for process in processes):
+                        raise RuntimeError('all batch workers exited unexpectedly')
+                    continue
+                if results is None:
+                    finished += 1
+                    continue
+                for result in results:
+                    _write_result(output, result, stats)
+                output.flush()
+            reader.join()
+            for process in processes:
+                process.join()
+    
+    samples = sorted(stats.pop('samples'))
+    elapsed = time.perf_counter() - started
+    summary = dict(stats, seconds=round(elapsed, 3),
+                   queries_per_second=round(stats['count'] / elapsed, 1) if elapsed else 0)
+    for pct in (50, 95, 99):
+        summary[f'p{pct}_ms'] = samples[min(len(samples) - 1, len(samples) * pct // 100)] if samples else 0
+    return summary
+
 if __name__ == "__main__":
     import argparse
     
     parser = argparse.ArgumentParser(description="Restaurant Assistant AI Agent")
     parser.add_argument("--examples", action="store_true", 
                        help="Run example queries")
+    parser.add_argument("--batch", metavar="PATH",
+                       help="Answer queries from a file ('-' for stdin) and print NDJSON results")
+    parser.add_argument("--output", default="-",
+                       help="Where batch results go (default: stdout)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                       help="Batch worker processes (0 = run in this process)")
+    parser.add_argument("--include-data", action="store_true",
+                       help="Include response data payloads in batch results")
     
     args = parser.parse_args()
     
-    if args.examples:
+    if args.batch:
+        source = sys.stdin if args.batch == '-' else open(args.batch, encoding='utf-8')
+        output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+        try:
+            summary = run_batch(source, output, args.workers, args.include_data)
+        finally:
+            if source is not sys.stdin:
+                source.close()
+            if output is not sys.stdout:
+                output.close()
+        print(f"Answered {summary['count']} queries in {summary['seconds']}s "
+              f"({summary['queries_per_second']}/s, {summary['errors']} errors, "
+              f"p50 {summary['p50_ms']} ms, p95 {summary['p95_ms']} ms)", file=sys.stderr)
+    elif args.examples:
         run_examples()
     else:
         main()
\ No newline at end of file
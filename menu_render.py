@@ -0,0 +1,194 @@
+"""
+Server-rendered menu page
+
+static/menu.html used to arrive with an empty menu and build it after a
+second round trip to /api/menu. /menu.html is now served with the menu
+already in the page, rendered from the same cached payload as /api/menu
+(see Tenant.cached_menu); the client-side loader only runs when the file is
+served as-is.
+
+Each category's HTML fragment is cached under a hash of the items and image
+variants it shows, so a menu reload that changes nothing renders nothing and
+a changed dish only re-renders its own category. Finished pages (plain and
+gzipped) are cached by menu version, so in the steady state serving the page
+is a dictionary lookup.
+
+Card images are lazy-loaded except the first EAGER_IMAGES, which are above
+the fold on a phone; the first one is usually the largest contentful paint
+and is fetched at high priority.
+"""
+
+import gzip
+import hashlib
+import html
+import json
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from serialization import GZIP_LEVEL
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'menu.html')
+# static/menu.html's client-rendered placeholder, replaced by the rendered menu
+START_MARKER = '<!-- menu:start -->'
+END_MARKER = '<!-- menu:end -->'
+
+# (category, element id prefix, heading), in page order
+CATEGORIES = [
+    ('Appetizers', 'appetizers', '🥗 Appetizers'),
+    ('Main Course', 'main', '🍽️ Main Course'),
+    ('Desserts', 'desserts', '🍰 Desserts'),
+    ('Drinks', 'drinks', '🍹 Drinks'),
+]
+
+# Cached fragments and pages across menu versions and locations
+MAX_CACHED = 256
+# Cards at the top of the page whose images load without waiting for layout
+EAGER_IMAGES = 4
+
+IMAGE_FALLBACK = ("onerror=\"this.style.background='linear-gradient(135deg, var(--primary) 0%, "
+                  "var(--accent) 100%)'; this.src='';\"")
+
+
+@dataclass
+class MenuPage:
+    body: bytes
+    gzipped: bytes
+    etag: str
+    version: str
+
+
+_fragments: Dict[Tuple[str, str, int], str] = {}
+_pages: Dict[Tuple[str, float], MenuPage] = {}
+# Location slug -> (menu payload, template mtime, page) for the payload-identity fast path
+_latest: Dict[str, Tuple[Dict, float, MenuPage]] = {}
+_template: Tuple[float, str] = (0.0, '')
+
+
+def render_page(slug: str, payload: Dict) -> MenuPage:
+    """
+    The menu page for a location's menu payload
+
+    Args:
+        slug: Location the payload belongs to
+        payload: The cached /api/menu body ({'menu': [...], 'images': {...}})
+    """
+    mtime = os.stat(TEMPLATE_PATH).st_mtime
+    latest = _latest.get(slug)
+    if latest is not None and latest[0] is payload and latest[1] == mtime:
+        return latest[2]
+
+    by_category = {name: [] for name, _, _ in CATEGORIES}
+    for item in payload['menu']:
+        if item['category'] in by_category:
+            by_category[item['category']].append(item)
+    images = payload.get('images') or {}
+
+    fragments = []
+    versions = []
+    position = 0  # cards before this category
+    for index, (name, slug_prefix, heading) in enumerate(CATEGORIES):
+        items = by_category[name]
+        version = _digest([items, {item['image']: images.get(item['image']) for item in items}])
+        # Past EAGER_IMAGES every card is lazy, so the exact offset no longer matters
+        key = (name, version, min(position, EAGER_IMAGES))
+        fragment = _fragments.get(key)
+        if fragment is None:
+            fragment = _render_category(index, slug_prefix, heading, items, images, position)
+            _bounded_put(_fragments, key, fragment)
+        fragments.append(fragment)
+        versions.append(version)
+        position += len(items)
+
+    menu_version = hashlib.sha1(''.join(versions).encode()).hexdigest()[:16]
+    page = _pages.get((menu_version, mtime))
+    if page is None:
+        page = _build_page(menu_version, fragments, _load_template(mtime))
+        _bounded_put(_pages, (menu_version, mtime), page)
+    _latest[slug] = (payload, mtime, page)
+    return page
+
+
+def _bounded_put(cache: Dict, key, value):
+    if len(cache) >= MAX_CACHED:
+        cache.clear()
+    cache[key] = value
+
+
+def _digest(value) -> str:
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def _load_template(mtime: float) -> str:
+    global _template
+    if _template[0] != mtime:
+        with open(TEMPLATE_PATH, encoding='utf-8') as f:
+            _template = (mtime, f.read())
+    return _template[1]
+
+
+def _build_page(menu_version: str, fragments: List[str], template: str) -> MenuPage:
+    start = template.index(START_MARKER)
+    end = template.index(END_MARKER) + len(END_MARKER)
+    menu = f'<div id="menu-container" data-menu-version="{menu_version}">{"".join(fragments)}</div>'
+    body = (template[:start] + menu + template[end:]).encode('utf-8')
+    return MenuPage(
+        body=body,
+        gzipped=gzip.compress(body, compresslevel=GZIP_LEVEL),
+        etag=hashlib.sha1(body).hexdigest()[:16],
+        version=menu_version,
+    )
+
+
+def _render_category(index: int, slug_prefix: str, heading: str, items: List[Dict], images: Dict,
+                     position: int) -> str:
+    spacing = ' mt-3' if index else ''
+    cards = ''.join(_render_item(item, images, position + i) for i, item in enumerate(items))
+    return (f'<div class="menu-category{spacing}" id="category-{slug_prefix}">'
+            f'<h2 class="section-title">{heading}</h2>'
+            f'<div class="card-grid" id="{slug_prefix}-grid">{cards}</div></div>')
+
+
+def _render_item(item: Dict, images: Dict, position: int) -> str:
+    """One menu card (the `position`th on the page), the same markup as displayMenu() in static/menu.html"""
+    esc = html.escape
+    return (
+        '<div class="menu-item">'
+        f'{_render_image(item, images, position)}'
+        '<div class="menu-content">'
+        f'<div class="menu-category">{esc(item["category"])}</div>'
+        '<div class="menu-header">'
+        f'<h3 class="menu-name">{esc(item["name"])}</h3>'
+        f'<span class="menu-price">${item["price"]:.2f}</span>'
+        '</div>'
+        f'<p class="menu-description">{esc(item["description"] or "")}</p>'
+        f'<button class="add-to-cart-btn" data-id="{item["id"]}" data-name="{esc(item["name"])}" '
+        f'data-price="{item["price"]}" data-image="{esc(item["image"] or "")}" '
+        f'data-category="{esc(item["category"])}">🛒 Add to Cart</button>'
+        '</div></div>'
+    )
+
+
+def _loading(position: int) -> str:
+    if position >= EAGER_IMAGES:
+        return 'loading="lazy"'
+    return 'loading="eager" fetchpriority="high"' if position == 0 else 'loading="eager"'
+
+
+def _render_image(item: Dict, images: Dict, position: int) -> str:
+    esc = html.escape
+    alt = esc(item['name'])
+    loading = _loading(position)
+    responsive = images.get(item['image'])
+    if not responsive:
+        src = f"/images/{esc(item['image'])}" if item['image'] else ''
+        return (f'<img src="{src}" alt="{alt}" class="menu-image" {loading} decoding="async" '
+                f'{IMAGE_FALLBACK}>')
+
+    sources = ''.join(
+        f'<source type="{esc(mime)}" srcset="{esc(srcset)}" sizes="{esc(responsive["sizes"])}">'
+        for mime, srcset in responsive['sources'].items()
+    )
+    return (f'<picture>{sources}<img src="{esc(responsive["fallback"])}" alt="{alt}" class="menu-image" '
+            f'width="{responsive["width"]}" height="{responsive["height"]}" {loading} decoding="async" '
+            f'{IMAGE_FALLBACK}></picture>')
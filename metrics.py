@@ -0,0 +1,181 @@
+"""
+In-process metrics with a Prometheus text endpoint
+
+Counters, gauges and latency histograms are recorded into per-thread shards,
+so the hot path never takes a lock: each thread only ever writes its own
+dictionaries and the shards are summed when /metrics is scraped. Every
+gunicorn worker aggregates its own threads and labels its series with
+worker="<pid>".
+
+Usage:
+    with metrics.timer('db_query_seconds', (('query', 'SELECT bookings'),)):
+        ...
+
+    @metrics.timed('agent_handler_seconds', handler='menu_inquiry')
+    def handler(...): ...
+"""
+
+import bisect
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+# Latency buckets in seconds
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# name -> (type, help text)
+METRICS = {
+    'http_request_duration_seconds': ('histogram', 'HTTP request latency by route'),
+    'http_requests_in_flight': ('gauge', 'Requests currently being handled'),
+    'db_query_seconds': ('histogram', 'SQLite statement execution time'),
+    'agent_handler_seconds': ('histogram', 'GastroGuide intent handler time'),
+    'email_send_seconds': ('histogram', 'Email send (or dev-mode log) duration'),
+    'booking_cache_total': ('counter', 'Booking lookups by cache result'),
+    'reminders_total': ('counter', 'Reservation reminders handled, by result'),
+}
+
+_PROCESS_START = time.time()
+
+
+class _Shard:
+    """Metrics written by a single thread"""
+
+    def __init__(self):
+        self.histograms: Dict[Tuple[str, Labels], List[float]] = {}
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+
+
+_local = threading.local()
+_shards: List[_Shard] = []
+_shards_lock = threading.Lock()
+
+
+def _shard() -> _Shard:
+    """Get the calling thread's shard, registering it on first use"""
+    shard = getattr(_local, 'shard', None)
+    if shard is None:
+        shard = _local.shard = _Shard()
+        with _shards_lock:
+            _shards.append(shard)
+    return shard
+
+
+def observe(name: str, value: float, labels: Labels = ()):
+    """Record one histogram observation (e.g. a latency in seconds)"""
+    histograms = _shard().histograms
+    key = (name, labels)
+    data = histograms.get(key)
+    if data is None:
+        # One slot per bucket plus +Inf, then sum and count
+        data = histograms[key] = [0] * (len(DEFAULT_BUCKETS) + 3)
+    data[bisect.bisect_left(DEFAULT_BUCKETS, value)] += 1
+    data[-2] += value
+    data[-1] += 1
+
+
+def inc(name: str, amount: float = 1, labels: Labels = ()):
+    """Add to a counter or gauge (use a negative amount to decrease a gauge)"""
+    counters = _shard().counters
+    key = (name, labels)
+    counters[key] = counters.get(key, 0) + amount
+
+
+@contextmanager
+def timer(name: str, labels: Labels = ()):
+    """Time the enclosed block into a histogram"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started, labels)
+
+
+def timed(name: str, **labels):
+    """Decorator that times every call into a histogram"""
+    label_tuple = tuple(sorted(labels.items()))
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                observe(name, time.perf_counter() - started, label_tuple)
+        return wrapper
+    return decorator
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Labels, extra: Labels = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+
+def _format_value(value: float) -> str:
+    """Counts print as exact integers (:g would turn 1234567 into 1.23457e+06)"""
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def collect() -> Tuple[Dict, Dict]:
+    """Sum all thread shards into (histograms, counters)"""
+    histograms: Dict[Tuple[str, Labels], List[float]] = {}
+    counters: Dict[Tuple[str, Labels], float] = {}
+    with _shards_lock:
+        shards = list(_shards)
+
+    for shard in shards:
+        # list() snapshots each dict atomically under the GIL
+        for key, data in list(shard.histograms.items()):
+            total = histograms.setdefault(key, [0] * len(data))
+            for i, value in enumerate(list(data)):
+                total[i] += value
+        for key, value in list(shard.counters.items()):
+            counters[key] = counters.get(key, 0) + value
+    return histograms, counters
+
+
+def render() -> str:
+    """Render all metrics in the Prometheus text exposition format"""
+    histograms, counters = collect()
+    worker = (('worker', str(os.getpid())),)
+    lines = [
+        '# HELP process_start_time_seconds Start time of this worker process',
+        '# TYPE process_start_time_seconds gauge',
+        f'process_start_time_seconds{_format_labels((), worker)} {_PROCESS_START:.3f}',
+    ]
+
+    names = sorted({name for name, _ in histograms} | {name for name, _ in counters})
+    for name in names:
+        kind, help_text = METRICS.get(name, ('untyped', name))
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+
+        for (metric, labels), value in sorted(counters.items()):
+            if metric == name:
+                lines.append(f'{name}{_format_labels(labels, worker)} {_format_value(value)}')
+
+        for (metric, labels), data in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(DEFAULT_BUCKETS + (float('inf'),), data):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                lines.append(f'{name}_bucket{_format_labels(labels, worker + (("le", le),))} {_format_value(cumulative)}')
+            lines.append(f'{name}_sum{_format_labels(labels, worker)} {data[-2]:.6f}')
+            lines.append(f'{name}_count{_format_labels(labels, worker)} {_format_value(data[-1])}')
+
+    return '\n'.join(lines) + '\n'
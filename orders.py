@@ -0,0 +1,364 @@
+"""
+Food orders from the cart, and the kitchen's queue of them
+
+POST /api/orders takes the cart's menu item IDs and quantities. Prices come
+from the location's cached menu (the payload /api/menu serves), never from
+the client: an order quoting a price the menu no longer has is rejected
+with the current prices so the cart can refresh. Totals follow cart.js
+(10% off subtotals over $500), computed in cents.
+
+Inserts go through a write-behind queue. Request threads hand validated
+orders to one writer thread per process, which commits everything queued
+(up to MAX_BATCH orders) in a single transaction and then wakes each
+submitter. Submitters still wait for their commit, so an acknowledged order
+is on disk, but during a rush one commit (and fsync) covers dozens of orders
+instead of one each, and only the writer's connection contends for the
+database write lock. No delay is added to form batches: a lone order is
+committed at once, and batches are the orders that queued while the
+previous commit was on disk. The queue is bounded (MAX_PENDING); when it is
+full new orders are turned away with a 503 rather than waiting without
+limit.
+
+The kitchen works the queue oldest first: received -> preparing -> ready ->
+served, or cancelled before it is ready.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent import futures
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+import database
+import metrics
+
+MAX_ITEMS = 50
+MAX_QUANTITY = 50
+# Cart discount (cart.js): 10% off subtotals over $500
+DISCOUNT_THRESHOLD_CENTS = 50000
+DISCOUNT_PERCENT = 10
+
+# Orders committed per transaction, at most
+MAX_BATCH = int(os.getenv('ORDER_BATCH_SIZE', '256'))
+# Orders waiting for the writer before new ones are refused
+MAX_PENDING = int(os.getenv('ORDER_QUEUE_SIZE', '5000'))
+# How long a request waits for its order to be committed
+WRITE_TIMEOUT_SECONDS = float(os.getenv('ORDER_WRITE_TIMEOUT_SECONDS', '10'))
+
+STATUSES = ('received', 'preparing', 'ready', 'served', 'cancelled')
+OPEN_STATUSES = ('received', 'preparing', 'ready')
+# Status -> the statuses an order may be moved to from there
+TRANSITIONS = {
+    'received': ('preparing', 'cancelled'),
+    'preparing': ('ready', 'cancelled'),
+    'ready': ('served',),
+}
+MAX_QUEUE_ORDERS = 200
+
+
+class PriceChanged(ValueError):
+    """The client's prices are out of date; `prices` has the menu's current ones"""
+
+    def __init__(self, prices: Dict[int, float]):
+        super().__init__('Menu prices have changed, please review your order')
+        self.prices = prices
+
+
+class QueueFull(RuntimeError):
+    """The writer is too far behind to take more orders right now"""
+
+
+def _cents(amount: float) -> int:
+    return int(round(float(amount) * 100))
+
+
+def _dollars(cents: int) -> float:
+    return round(cents / 100, 2)
+
+
+def _whole_number(value, field: str) -> int:
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f'{field} must be a whole number')
+    try:
+        number = float(value)
+    except ValueError:
+        raise ValueError(f'{field} must be a whole number')
+    if not number.is_integer():
+        raise ValueError(f'{field} must be a whole number')
+    return int(number)
+
+
+def prepare_order(data: Dict, menu: List[Dict]) -> Dict:
+    """
+    Validate an order against the menu and price it
+
+    Args:
+        data: {'items': [{'id', 'quantity', 'price' (optional)}], 'customer',
+               'booking_id', 'notes' (all optional)}; repeated IDs are combined
+        menu: Available menu items (the cached menu payload's 'menu')
+
+    Returns:
+        The order as it will be stored, with a new ID and status 'received'
+
+    Raises:
+        PriceChanged: If a quoted price differs from the menu's
+        ValueError: If the order is empty, too large, or names items not on the menu
+    """
+    lines = data.get('items')
+    if not isinstance(lines, list) or not lines:
+        raise ValueError('An order needs at least one item')
+    if len(lines) > MAX_ITEMS:
+        raise ValueError(f'An order can have at most {MAX_ITEMS} items')
+
+    by_id = {item['id']: item for item in menu}
+    quantities: Dict[int, int] = {}
+    quoted: Dict[int, float] = {}
+    for line in lines:
+        if not isinstance(line, dict) or 'id' not in line:
+            raise ValueError('Each item needs a menu item id')
+        item_id = _whole_number(line['id'], 'id')
+        if item_id not in by_id:
+            raise ValueError(f'Menu item {item_id} is not available')
+        quantity = _whole_number(line.get('quantity', 1), 'quantity')
+        if quantity < 1:
+            raise ValueError('quantity must be at least 1')
+        quantities[item_id] = quantities.get(item_id, 0) + quantity
+        if quantities[item_id] > MAX_QUANTITY:
+            raise ValueError(f'At most {MAX_QUANTITY} of each item per order')
+        if line.get('price') is not None:
+            quoted[item_id] = line['price']
+
+    changed = {}
+    for item_id, price in quoted.items():
+        try:
+            if _cents(price) != _cents(by_id[item_id]['price']):
+                changed[item_id] = by_id[item_id]['price']
+        except (TypeError, ValueError):
+            raise ValueError('price must be a number')
+    if changed:
+        raise PriceChanged(changed)
+
+    items = []
+    subtotal = 0
+    for item_id, quantity in quantities.items():
+        unit = _cents(by_id[item_id]['price'])
+        subtotal += unit * quantity
+        items.append({
+            'menu_item_id': item_id,
+            'name': by_id[item_id]['name'],
+            'unit_price': _dollars(unit),
+            'quantity': quantity,
+        })
+    discount = subtotal * DISCOUNT_PERCENT // 100 if subtotal > DISCOUNT_THRESHOLD_CENTS else 0
+
+    return {
+        'id': f"ORD{uuid.uuid4().hex[:10].upper()}",
+        'booking_id': data.get('booking_id') or None,
+        'customer': data.get('customer') or None,
+        'notes': (data.get('notes') or '')[:500] or None,
+        'status': 'received',
+        'items': items,
+        'subtotal': _dollars(subtotal),
+        'discount': _dollars(discount),
+        'total': _dollars(subtotal - discount),
+        'created_at': time.time(),
+    }
+
+
+def write_orders(conn: sqlite3.Connection, orders: List[Dict]):
+    """Insert orders and their items in one transaction"""
+    with conn:
+        conn.executemany(
+            'INSERT INTO orders (id, booking_id, customer, notes, status, subtotal, discount, total, '
+            'created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            [(o['id'], o['booking_id'], o['customer'], o['notes'], o['status'], o['subtotal'],
+              o['discount'], o['total'], o['created_at'], o['created_at']) for o in orders]
+        )
+        conn.executemany(
+            'INSERT INTO order_items (order_id, menu_item_id, name, unit_price, quantity) '
+            'VALUES (?, ?, ?, ?, ?)',
+            [(o['id'], i['menu_item_id'], i['name'], i['unit_price'], i['quantity'])
+             for o in orders for i in o['items']]
+        )
+
+
+class OrderWriter:
+    """Background thread that commits queued orders in batches (see module docstring)"""
+
+    def __init__(self, max_batch: int = MAX_BATCH, max_pending: int = MAX_PENDING):
+        self.max_batch = max_batch
+        self._queue: 'queue.Queue' = queue.Queue(max_pending)
+        self._connections: Dict[str, sqlite3.Connection] = {}
+        self._thread = threading.Thread(target=self._run, name='order-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, order: Dict) -> Future:
+        """Queue an order for the current database; the future resolves once it is committed"""
+        future = Future()
+        try:
+            self._queue.put_nowait((database.current_database_path(), order, future))
+        except queue.Full:
+            raise QueueFull('We are taking a lot of orders right now, please try again in a moment')
+        return future
+
+    def _connection(self, path: str) -> sqlite3.Connection:
+        conn = self._connections.get(path)
+        if conn is None:
+            token = database.use_database(path)
+            try:
+                conn = self._connections[path] = database.get_db_connection(pooled=False)
+            finally:
+                database.reset_database(token)
+        return conn
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            by_path: Dict[str, list] = {}
+            for entry in batch:
+                by_path.setdefault(entry[0], []).append(entry)
+            for path, entries in by_path.items():
+                # Orders whose request has gone away (cancelled futures) are dropped
+                entries = [entry for entry in entries if entry[2].set_running_or_notify_cancel()]
+                if entries:
+                    self._commit(path, entries)
+
+    def _commit(self, path: str, entries: list):
+        try:
+            with metrics.timer('order_commit_seconds'):
+                write_orders(self._connection(path), [order for _, order, _ in entries])
+        except Exception as e:
+            for _, _, future in entries:
+                future.set_exception(e)
+            return
+        metrics.inc('orders_written_total', len(entries))
+        metrics.inc('order_batches_total')
+        for _, order, future in entries:
+            future.set_result(order)
+
+
+_writer: Optional[OrderWriter] = None
+_writer_pid = None
+_writer_lock = threading.Lock()
+
+
+def get_writer() -> OrderWriter:
+    """This process's order writer, started on first use (and again after a fork)"""
+    global _writer, _writer_pid
+    if _writer is None or _writer_pid != os.getpid():
+        with _writer_lock:
+            if _writer is None or _writer_pid != os.getpid():
+                _writer = OrderWriter()
+                _writer_pid = os.getpid()
+    return _writer
+
+
+def submit_order(order: Dict) -> Future:
+    """Queue a prepared order for the batched writer"""
+    return get_writer().submit(order)
+
+
+def place_order(data: Dict, menu: List[Dict], timeout: float = WRITE_TIMEOUT_SECONDS) -> Dict:
+    """Validate, price and store an order, returning once it is committed"""
+    future = submit_order(prepare_order(data, menu))
+    try:
+        return future.result(timeout)
+    except futures.TimeoutError:
+        abandon(future)
+        return future.result()
+
+
+def abandon(future: Future):
+    """
+    Stop waiting for a submitted order that is taking too long
+
+    An order still queued is withdrawn, so a retry can't store it twice,
+    and QueueFull is raised. Otherwise its batch is being committed and the
+    future is about to resolve.
+    """
+    if future.cancel():
+        raise QueueFull('Orders are taking longer than usual to save, please try again in a moment')
+
+
+def _with_items(conn: sqlite3.Connection, rows) -> List[Dict]:
+    orders = [dict(row) for row in rows]
+    if not orders:
+        return orders
+    by_id = {order['id']: order for order in orders}
+    for order in orders:
+        order['items'] = []
+    for row in conn.execute(
+        f"SELECT order_id, menu_item_id, name, unit_price, quantity FROM order_items "
+        f"WHERE order_id IN ({', '.join('?' * len(by_id))}) ORDER BY rowid", list(by_id)
+    ):
+        item = dict(row)
+        by_id[item.pop('order_id')]['items'].append(item)
+    return orders
+
+
+def get_order(order_id: str) -> Optional[Dict]:
+    """An order with its items, or None"""
+    conn = database.get_db_connection()
+    try:
+        row = conn.execute('SELECT * FROM orders WHERE id = ?', (order_id.strip().upper(),)).fetchone()
+        return _with_items(conn, [row])[0] if row else None
+    finally:
+        conn.close()
+
+
+def kitchen_queue(statuses: Optional[List[str]] = None, limit: int = MAX_QUEUE_ORDERS) -> List[Dict]:
+    """Open orders (or those in `statuses`), oldest first, with their items"""
+    statuses = statuses or list(OPEN_STATUSES)
+    unknown = [status for status in statuses if status not in STATUSES]
+    if unknown:
+        raise ValueError(f"Unknown status '{unknown[0]}', use one of: {', '.join(STATUSES)}")
+    conn = database.get_db_connection()
+    try:
+        rows = conn.execute(
+            f"SELECT * FROM orders WHERE status IN ({', '.join('?' * len(statuses))}) "
+            f"ORDER BY created_at LIMIT ?", statuses + [limit]
+        ).fetchall()
+        return _with_items(conn, rows)
+    finally:
+        conn.close()
+
+
+def update_status(order_id: str, status: str) -> Optional[Dict]:
+    """
+    Move an order along the kitchen queue
+
+    Returns:
+        The updated order, or None if there is no such order
+
+    Raises:
+        ValueError: If the order can't move to `status` from where it is
+    """
+    if status not in STATUSES:
+        raise ValueError(f"Unknown status '{status}', use one of: {', '.join(STATUSES)}")
+    order_id = order_id.strip().upper()
+    sources = [source for source, targets in TRANSITIONS.items() if status in targets]
+    conn = database.get_db_connection()
+    try:
+        with conn:
+            cursor = conn.execute(
+                f"UPDATE orders SET status = ?, updated_at = ? WHERE id = ? "
+                f"AND status IN ({', '.join('?' * len(sources))})",
+                [status, time.time(), order_id] + sources
+            )
+        if cursor.rowcount == 0:
+            current = conn.execute('SELECT status FROM orders WHERE id = ?', (order_id,)).fetchone()
+            if current is None:
+                return None
+            raise ValueError(f"Order {order_id} is {current['status']} and can't be marked {status}")
+    finally:
+        conn.close()
+    return get_order(order_id)
@@ -0,0 +1,225 @@
+"""
+On-demand request profiling
+
+Profiles a single request in place when an admin asks for it, or a random
+1-in-N sample of requests in the background. Each profiled request writes:
+
+    <PROFILE_DIR>/<id>.collapsed   folded stacks ("a;b;c weight"), ready for
+                                   flamegraph.pl or speedscope; weights are
+                                   microseconds (cprofile) or samples (sample)
+    <PROFILE_DIR>/<id>.prof        cProfile stats (cprofile mode only), for
+                                   pstats or snakeviz
+    <PROFILE_DIR>/<id>.json        request metadata
+
+and returns the id in the X-Profile-Id response header.
+
+Trigger with an admin token (PROFILE_ENABLED and ADMIN_TOKEN must be set):
+    curl -H 'X-Admin-Token: ...' -H 'X-Profile: cprofile' -X POST /api/chat ...
+    curl '/api/chat?_profile=sample&_admin_token=...'
+
+Nothing is registered on the app when profiling is disabled, so normal
+requests pay no overhead.
+"""
+
+import cProfile
+import hmac
+import json
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Optional
+
+from flask import Flask, g, request
+
+MODES = ('cprofile', 'sample')
+
+# cProfile (sys.monitoring on 3.12+) allows one active profiler per process
+_cprofile_lock = threading.Lock()
+
+
+def _frame_name(code) -> str:
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}:{code.co_firstlineno}"
+
+
+class StackSampler(threading.Thread):
+    """Samples one thread's stack at a fixed interval into folded stacks"""
+
+    def __init__(self, thread_id: int, interval: float = 0.001):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame.f_code))
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def collapse_pstats(profile: cProfile.Profile, max_depth: int = 64, min_fraction: float = 0.001,
+                    max_paths: int = 20000) -> Counter:
+    """
+    Fold cProfile's caller/callee graph into flamegraph stacks
+
+    cProfile keeps per-edge totals rather than full stacks, so time is split
+    across call paths in proportion to each edge's cumulative time. Weights
+    are microseconds.
+
+    The number of call paths grows exponentially with the graph (importing a
+    module alone has millions), so a callee whose share of a path is under
+    min_fraction of the total, or past max_depth or max_paths, is not
+    expanded: its time is counted in the caller's frame instead.
+    """
+    stats = pstats.Stats(profile).stats
+    callees = {}
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+
+    def name(func):
+        filename, line, funcname = func
+        return f"{os.path.basename(filename)}:{funcname}:{line}"
+
+    roots = [func for func, data in stats.items() if not data[4]]
+    threshold = sum(stats[root][3] for root in roots) * min_fraction
+    stacks = Counter()
+    visited = 0
+
+    def walk(func, path, on_path, path_time, depth):
+        nonlocal visited
+        visited += 1
+        _, _, self_time, cumulative, _ = stats[func]
+        scale = path_time / cumulative if cumulative else 0
+        weight = self_time * scale
+        for callee, edge_time in callees.get(func, ()):
+            callee_time = edge_time * scale
+            if callee not in stats or callee in on_path:
+                continue
+            if callee_time <= threshold or depth >= max_depth or visited >= max_paths:
+                weight += callee_time
+                continue
+            on_path.add(callee)
+            walk(callee, path + [name(callee)], on_path, callee_time, depth + 1)
+            on_path.discard(callee)
+        if weight > 0:
+            stacks[';'.join(path)] += int(weight * 1e6)
+
+    for root in roots:
+        walk(root, [name(root)], {root}, stats[root][3], 0)
+    return +stacks
+
+
+class RequestProfiler:
+    """Profiles the calling thread between start() and stop()"""
+
+    def __init__(self, mode: str, output_dir: str, interval: float = 0.001):
+        self.mode = mode
+        self.output_dir = output_dir
+        self.profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.sampler = StackSampler(threading.get_ident(), interval)
+        self.profile: Optional[cProfile.Profile] = None
+        self.started = 0.0
+
+    def start(self) -> bool:
+        """Start profiling; returns False if cProfile is busy in another thread"""
+        self.started = time.perf_counter()
+        if self.mode == 'cprofile':
+            if not _cprofile_lock.acquire(blocking=False):
+                return False
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        else:
+            self.sampler.start()
+        return True
+
+    def stop(self, metadata: dict) -> str:
+        """Stop profiling and write the output files; returns the profile id"""
+        duration = time.perf_counter() - self.started
+        if self.profile:
+            self.profile.disable()
+            _cprofile_lock.release()
+            stacks = collapse_pstats(self.profile)
+        else:
+            self.sampler.stop()
+            stacks = self.sampler.stacks
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, self.profile_id)
+        if self.profile:
+            self.profile.dump_stats(f"{base}.prof")
+        with open(f"{base}.collapsed", 'w') as f:
+            for stack, weight in stacks.most_common():
+                f.write(f"{stack} {weight}\n")
+        with open(f"{base}.json", 'w') as f:
+            json.dump(dict(metadata, id=self.profile_id, mode=self.mode,
+                           duration_ms=round(duration * 1000, 2)), f, indent=2)
+        return self.profile_id
+
+
+def _requested_mode(admin_token: str) -> Optional[str]:
+    """Profiling mode requested by an authenticated admin, if any"""
+    mode = request.headers.get('X-Profile') or request.args.get('_profile')
+    if not mode or not admin_token:
+        return None
+    token = request.headers.get('X-Admin-Token') or request.args.get('_admin_token', '')
+    if not hmac.compare_digest(token.encode(), admin_token.encode()):
+        return None
+    return mode if mode in MODES else 'cprofile'
+
+
+def init_app(app: Flask):
+    """Register profiling hooks on the app if PROFILE_ENABLED is set"""
+    if not app.config.get('PROFILE_ENABLED'):
+        return
+
+    output_dir = app.config['PROFILE_DIR']
+    admin_token = app.config.get('ADMIN_TOKEN') or ''
+    sample_rate = int(app.config.get('PROFILE_SAMPLE_RATE') or 0)
+
+    @app.before_request
+    def _start_profiler():
+        mode = _requested_mode(admin_token)
+        if mode is None and sample_rate and random.randrange(sample_rate) == 0:
+            mode = 'sample'
+        if mode is None:
+            return
+
+        profiler = RequestProfiler(mode, output_dir)
+        if profiler.start():
+            g.profiler = profiler
+
+    @app.after_request
+    def _stop_profiler(response):
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profile_id = profiler.stop({
+                'method': request.method,
+                'path': request.path,
+                'route': request.url_rule.rule if request.url_rule else None,
+                'status': response.status_code,
+            })
+            response.headers['X-Profile-Id'] = profile_id
+        return response
+
+    @app.teardown_request
+    def _discard_profiler(error=None):
+        # after_request is skipped on unhandled errors; release cProfile anyway
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.stop({'method': request.method, 'path': request.path, 'error': repr(error)})
@@ -0,0 +1,219 @@
+"""
+Admission control for expensive routes
+
+Token buckets keyed by client IP and session limit how fast any one client
+can call /api/chat or write bookings. Bucket state lives in a small SQLite
+file so every gunicorn worker enforces the same limits. Chat additionally
+has a host-wide concurrency cap built from flock()ed slot files, which the
+kernel releases automatically if a worker dies mid-request.
+
+Over-limit requests are rejected before any agent or database work:
+    429 + Retry-After   bucket empty
+    503 + Retry-After   all chat slots busy
+
+If the bucket file stays locked past its 1 s timeout, the request is
+admitted (fail open) rather than failed.
+"""
+
+import functools
+import math
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from flask import Flask, current_app, request
+
+from serialization import json_response
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to a per-process semaphore
+    fcntl = None
+
+# Bucket name -> (capacity, tokens refilled per second)
+DEFAULT_LIMITS: Dict[str, Tuple[float, float]] = {
+    'chat': (20, 0.5),           # bursts of 20, then 30 per minute
+    'booking_write': (5, 0.1),   # bursts of 5, then 6 per minute
+    'order_write': (10, 0.2),    # bursts of 10, then 12 per minute
+}
+
+# Buckets idle this long are full again and can be dropped
+_STALE_AFTER = 3600
+
+
+class TokenBucketStore:
+    """Token buckets shared across processes through a SQLite file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread, reopened after a fork
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            # Losing the last few refills on a crash is harmless
+            conn.execute('PRAGMA synchronous=OFF')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS buckets (
+                    key TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated REAL NOT NULL
+                ) WITHOUT ROWID
+            ''')
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def take(self, key: str, capacity: float, rate: float, cost: float = 1.0) -> float:
+        """
+        Try to take `cost` tokens from a bucket
+
+        Returns:
+            0 if the request is admitted, otherwise seconds until it would be
+        """
+        conn = self._connection()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT tokens, updated FROM buckets WHERE key = ?', (key,)).fetchone()
+            tokens = capacity if row is None else min(capacity, row[0] + (now - row[1]) * rate)
+
+            wait = 0.0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                wait = (cost - tokens) / rate
+            conn.execute(
+                'INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)',
+                (key, tokens, now)
+            )
+            if random.random() < 0.001:
+                conn.execute('DELETE FROM buckets WHERE updated < ?', (now - _STALE_AFTER,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return wait
+
+
+class ConcurrencySlots:
+    """Host-wide cap on concurrent requests using N lock files"""
+
+    def __init__(self, directory: str, limit: int):
+        self.directory = directory
+        self.limit = limit
+        self._semaphore = threading.BoundedSemaphore(limit) if fcntl is None else None
+        if fcntl is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def acquire(self) -> Optional[object]:
+        """Grab a free slot without waiting; returns a handle or None"""
+        if self._semaphore is not None:
+            return self._semaphore if self._semaphore.acquire(blocking=False) else None
+
+        # Start at a random slot so workers don't all contend on slot 0
+        start = random.randrange(self.limit)
+        for i in range(self.limit):
+            path = os.path.join(self.directory, f'slot-{(start + i) % self.limit}.lock')
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except OSError:
+                os.close(fd)
+        return None
+
+    def release(self, handle):
+        if self._semaphore is not None:
+            self._semaphore.release()
+        else:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+            os.close(handle)
+
+
+class RateLimiter:
+    """Per-app admission control state"""
+
+    def __init__(self, config: Dict):
+        db_path = config['RATE_LIMIT_DB']
+        self.enabled = config['RATE_LIMIT_ENABLED']
+        self.limits = dict(DEFAULT_LIMITS, **config.get('RATE_LIMITS', {}))
+        self.store = TokenBucketStore(db_path)
+        self.chat_slots = ConcurrencySlots(f'{db_path}.slots', config['CHAT_MAX_CONCURRENCY'])
+        # key -> time its bucket refills; other workers can only drain a bucket,
+        # never refill it, so rejecting until then needs no shared state
+        self._blocked_until: Dict[str, float] = {}
+
+    def _take(self, key: str, capacity: float, rate: float) -> float:
+        now = time.time()
+        until = self._blocked_until.get(key, 0)
+        if now < until:
+            return until - now
+
+        try:
+            wait = self.store.take(key, capacity, rate)
+        except sqlite3.OperationalError as e:
+            # Fail open: a locked bucket file must not turn into a 500
+            print(f"Warning: Rate limit check for {key} failed, admitting the request: {e}")
+            return 0.0
+        if wait:
+            if len(self._blocked_until) > 10000:
+                self._blocked_until.clear()
+            self._blocked_until[key] = now + wait
+        return wait
+
+    def check(self, bucket: str, remote_addr: str, session_id: Optional[str] = None) -> float:
+        """Take a token from the caller's IP (and session) buckets; returns retry-after"""
+        capacity, rate = self.limits[bucket]
+        keys = [f'{bucket}:ip:{remote_addr}']
+        if session_id:
+            keys.append(f'{bucket}:session:{session_id[:64]}')
+        return max(self._take(key, capacity, rate) for key in keys)
+
+
+def init_app(app: Flask):
+    app.extensions['rate_limiter'] = RateLimiter(app.config)
+
+
+def _reject(status: int, retry_after: float, message: str):
+    response = json_response({'success': False, 'error': message}, status)
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def rate_limited(bucket: str):
+    """Reject requests over the bucket's rate with 429 + Retry-After"""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            limiter = current_app.extensions['rate_limiter']
+            if limiter.enabled:
+                retry_after = limiter.check(bucket, request.remote_addr, request.headers.get('X-Session-Id'))
+                if retry_after:
+                    return _reject(429, retry_after, 'Too many requests, please slow down.')
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def chat_concurrency_limited(view):
+    """Reject chat requests with 503 + Retry-After while all chat slots are busy"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        limiter = current_app.extensions['rate_limiter']
+        if not limiter.enabled:
+            return view(*args, **kwargs)
+
+        handle = limiter.chat_slots.acquire()
+        if handle is None:
+            return _reject(503, 1, 'Our assistant is busy right now, please try again in a moment.')
+        try:
+            return view(*args, **kwargs)
+        finally:
+            limiter.chat_slots.release(handle)
+    return wrapper
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Reservation reminder emails
+
+create_booking() queues a row in the reminders table keyed on when its
+email is due (REMINDER_LEAD_HOURS before the booking). The scheduler keeps
+the send times due within the next hour in a heap and sleeps until the
+earliest one or the end of that window, whichever comes first, so an idle
+evening costs nothing. Booking writes in the same process push send times
+that fall in the window onto the heap without touching the database, and
+wake the scheduler only when one is due before its current head. When
+reminders come due it claims them in batches with one short write
+transaction per batch. Each row is claimed by exactly one process, so every
+gunicorn worker can run a scheduler (started in post_worker_init) without
+double-sending. Reminders queued by a process without a scheduler (e.g. a
+bulk import) are loaded at the next window edge. Only the due-queue index
+is read; the bookings table is touched by primary key for claimed rows.
+
+    python reminders.py run        # standalone scheduler
+    python reminders.py once       # send everything due now and exit
+    python reminders.py backfill   # queue reminders for existing bookings
+"""
+
+import argparse
+import heapq
+import os
+import socket
+import sqlite3
+import threading
+import time
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import database
+import metrics
+from email_service import get_email_service
+
+CLAIM_BATCH_SIZE = 200
+# Send times loaded into the heap at once; later ones are picked up on resync
+HEAP_WINDOW_SECONDS = 3600
+HEAP_LIMIT = 50000
+# Wait before retrying after a database error
+ERROR_RETRY_SECONDS = 60
+# A claim older than this belongs to a worker that died mid-batch
+CLAIM_TIMEOUT_SECONDS = 600
+MAX_ATTEMPTS = 3
+RETRY_DELAY_SECONDS = 300
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(database.current_database_path(), timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def claim_due(conn: sqlite3.Connection, worker: str, now: float,
+              batch_size: int = CLAIM_BATCH_SIZE) -> List[str]:
+    """Mark up to batch_size due reminders as claimed by this worker; returns booking IDs"""
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        ids = [row[0] for row in conn.execute(
+            "SELECT booking_id FROM reminders WHERE status = 'pending' AND send_at <= ? "
+            "ORDER BY send_at LIMIT ?", (now, batch_size)
+        )]
+        if ids:
+            conn.execute(
+                f"UPDATE reminders SET status = 'claimed', claimed_by = ?, claimed_at = ?, "
+                f"attempts = attempts + 1 WHERE booking_id IN ({', '.join('?' * len(ids))})",
+                (worker, now, *ids)
+            )
+        conn.execute('COMMIT')
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+    return ids
+
+
+def send_claimed(conn: sqlite3.Connection, ids: List[str], now: float) -> Dict[str, int]:
+    """Email each claimed reminder and settle its row; returns counts by result"""
+    placeholders = ', '.join('?' * len(ids))
+    bookings = {row['id']: dict(row) for row in conn.execute(
+        f'SELECT * FROM bookings WHERE id IN ({placeholders})', ids
+    )}
+    attempts = dict(conn.execute(
+        f'SELECT booking_id, attempts FROM reminders WHERE booking_id IN ({placeholders})', ids
+    ).fetchall())
+
+    email_service = get_email_service()
+    done, retry, counts = [], [], {'sent': 0, 'skipped': 0, 'retry': 0, 'failed': 0}
+    for booking_id in ids:
+        booking = bookings.get(booking_id)
+        # Cancelled (or archived) after the reminder was claimed, or nowhere to send it
+        if not booking or booking['status'] != 'confirmed' or not booking.get('email'):
+            result = 'skipped'
+        else:
+            try:
+                sent = email_service.send_booking_reminder(booking)
+            except Exception as e:
+                print(f"Warning: Could not send reminder for {booking_id}: {e}")
+                sent = False
+            if sent:
+                result = 'sent'
+            elif attempts.get(booking_id, MAX_ATTEMPTS) < MAX_ATTEMPTS:
+                result = 'retry'
+            else:
+                result = 'failed'
+                print(f"Warning: Giving up on reminder for {booking_id} after {MAX_ATTEMPTS} attempts")
+        counts[result] += 1
+        metrics.inc('reminders_total', labels=(('result', result),))
+        (retry if result == 'retry' else done).append(booking_id)
+
+    with conn:
+        conn.execute('BEGIN IMMEDIATE')
+        conn.executemany('DELETE FROM reminders WHERE booking_id = ?', [(i,) for i in done])
+        conn.executemany(
+            "UPDATE reminders SET status = 'pending', send_at = ?, claimed_by = NULL WHERE booking_id = ?",
+            [(now + RETRY_DELAY_SECONDS, i) for i in retry]
+        )
+    return counts
+
+
+def send_due(worker: Optional[str] = None, now: Optional[float] = None) -> Dict[str, int]:
+    """Claim and send every reminder due by now, a batch at a time"""
+    worker = worker or f'{socket.gethostname()}:{os.getpid()}'
+    totals = {'sent': 0, 'skipped': 0, 'retry': 0, 'failed': 0}
+    database.ensure_database()
+    conn = _connect()
+    try:
+        while True:
+            ids = claim_due(conn, worker, time.time() if now is None else now)
+            if not ids:
+                break
+            for result, count in send_claimed(conn, ids, time.time()).items():
+                totals[result] += count
+    finally:
+        conn.close()
+    return totals
+
+
+def requeue_stale_claims(conn: sqlite3.Connection, now: float) -> int:
+    """Put back reminders claimed by a process that never finished sending them"""
+    cursor = conn.execute(
+        "UPDATE reminders SET status = 'pending', claimed_by = NULL "
+        "WHERE status = 'claimed' AND claimed_at < ?", (now - CLAIM_TIMEOUT_SECONDS,)
+    )
+    return cursor.rowcount
+
+
+def backfill(today: Optional[date] = None) -> int:
+    """Queue reminders for upcoming confirmed bookings that have none (e.g. after bulk import)"""
+    database.ensure_database()
+    conn = _connect()
+    try:
+        rows = conn.execute(
+            "SELECT id, date, time FROM bookings WHERE date >= ? AND status = 'confirmed' "
+            "AND id NOT IN (SELECT booking_id FROM reminders)",
+            ((today or date.today()).isoformat(),)
+        ).fetchall()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            scheduled = database.schedule_reminders(conn.cursor(), [tuple(row) for row in rows])
+    finally:
+        conn.close()
+    database.notify_reminders(scheduled)
+    return len(scheduled)
+
+
+class ReminderScheduler:
+    """Background thread that sleeps until the next reminder is due, then sends due batches"""
+
+    def __init__(self, database_path: Optional[str] = None):
+        self.database_path = database_path or database.current_database_path()
+        self.worker = f'{socket.gethostname()}:{os.getpid()}'
+        self._heap: List[Tuple[float, str]] = []
+        self._heap_lock = threading.Lock()
+        # Send times notified while a resync is reading the table
+        self._notified: List[Tuple[float, str]] = []
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._next_resync = 0.0
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        _schedulers[self.database_path] = self
+        database.set_reminder_listener(_notify)
+        self._thread = threading.Thread(target=self._run, name='reminder-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        _schedulers.pop(self.database_path, None)
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def notify(self, send_at: float):
+        """A reminder was queued in this process; add it to the heap if it falls in the window"""
+        if send_at >= time.time() + HEAP_WINDOW_SECONDS:
+            return  # loaded by a resync at a later window edge
+        with self._heap_lock:
+            earliest = not self._heap or send_at < self._heap[0][0]
+            heapq.heappush(self._heap, (send_at, ''))
+            self._notified.append((send_at, ''))
+        if earliest:
+            self._wakeup.set()
+
+    def _resync(self, conn: sqlite3.Connection, now: float):
+        """Reload the heap with pending reminders due within the window"""
+        with self._heap_lock:
+            self._notified = []
+        self._next_resync = now + HEAP_WINDOW_SECONDS
+        # A read first: the write lock is only taken when a claim has gone stale
+        oldest_claim = conn.execute(
+            "SELECT MIN(claimed_at) FROM reminders WHERE status = 'claimed'"
+        ).fetchone()[0]
+        if oldest_claim is not None:
+            if oldest_claim < now - CLAIM_TIMEOUT_SECONDS:
+                with conn:
+                    conn.execute('BEGIN IMMEDIATE')
+                    requeue_stale_claims(conn, now)
+            else:
+                self._next_resync = min(self._next_resync, oldest_claim + CLAIM_TIMEOUT_SECONDS)
+        rows = conn.execute(
+            "SELECT send_at, booking_id FROM reminders WHERE status = 'pending' AND send_at <= ? "
+            "ORDER BY send_at LIMIT ?", (now + HEAP_WINDOW_SECONDS, HEAP_LIMIT)
+        ).fetchall()
+        # A full heap ends the window early, at the last send time it holds
+        window_end = rows[-1][0] if len(rows) == HEAP_LIMIT else now + HEAP_WINDOW_SECONDS
+        self._next_resync = min(self._next_resync, window_end)
+        with self._heap_lock:
+            # Rows come back sorted, which is already a valid heap; keep what
+            # was notified meanwhile, which the query may have missed
+            self._heap = [tuple(row) for row in rows]
+            if self._notified:
+                self._heap.extend(self._notified)
+                heapq.heapify(self._heap)
+
+    def _run(self):
+        database.use_database(self.database_path)
+        database.ensure_database()
+        conn = _connect()
+        try:
+            while not self._stop.is_set():
+                try:
+                    self._tick(conn)
+                except sqlite3.Error as e:
+                    print(f"Warning: Reminder scheduler error: {e}")
+                    self._stop.wait(ERROR_RETRY_SECONDS)
+        finally:
+            conn.close()
+
+    def _tick(self, conn: sqlite3.Connection):
+        now = time.time()
+        if now >= self._next_resync:
+            self._resync(conn, now)
+
+        with self._heap_lock:
+            due = bool(self._heap) and self._heap[0][0] <= now
+            while self._heap and self._heap[0][0] <= now:
+                heapq.heappop(self._heap)
+            head = self._heap[0][0] if self._heap else None
+        if due:
+            # Claim by time range, not heap contents: picks up anything other
+            # processes queued, and skips rows they already claimed
+            while not self._stop.is_set():
+                ids = claim_due(conn, self.worker, time.time())
+                if not ids:
+                    break
+                if send_claimed(conn, ids, time.time())['retry']:
+                    with self._heap_lock:
+                        heapq.heappush(self._heap, (time.time() + RETRY_DELAY_SECONDS, ''))
+            return
+
+        timeout = self._next_resync - now
+        if head is not None:
+            timeout = min(timeout, head - now)
+        self._wakeup.wait(max(timeout, 0))
+        self._wakeup.clear()
+
+
+# Running schedulers by database file (one per location)
+_schedulers: Dict[str, ReminderScheduler] = {}
+
+
+def _notify(send_at: float):
+    scheduler = _schedulers.get(database.current_database_path())
+    if scheduler:
+        scheduler.notify(send_at)
+
+
+def start_scheduler(database_paths: Optional[List[str]] = None) -> List[ReminderScheduler]:
+    """Start a scheduler per database file in this process unless REMINDERS_ENABLED is 0"""
+    if os.getenv('REMINDERS_ENABLED', '1') == '0':
+        return []
+    for path in database_paths or [database.current_database_path()]:
+        if path not in _schedulers:
+            ReminderScheduler(path).start()
+    return list(_schedulers.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Send reservation reminder emails")
+    parser.add_argument('command', choices=('run', 'once', 'backfill'))
+    args = parser.parse_args()
+
+    if args.command == 'once':
+        totals = send_due()
+        print(f"Reminders: {totals['sent']} sent, {totals['skipped']} skipped, "
+              f"{totals['retry']} to retry, {totals['failed']} failed")
+    elif args.command == 'backfill':
+        print(f"Queued {backfill()} reminders")
+    else:
+        scheduler = ReminderScheduler()
+        scheduler.start()
+        print(f"Reminder scheduler running (lead time {database.REMINDER_LEAD_HOURS:g}h), Ctrl+C to stop")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            scheduler.stop()
+
+
+if __name__ == '__main__':
+    main()
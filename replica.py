@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Read-only replica of the database for admin and reporting queries
+
+The admin listing, exports and analytics read every booking. Against
+restaurant.db such a read holds a shared lock for as long as the response
+streams, and a booking write that needs to commit meanwhile waits for it
+(or fails with "database is locked"). Those endpoints read a copy instead:
+restaurant-replica.db, next to the database (one per location).
+
+The copy is made with SQLite's online backup API, REPLICA_STEP_PAGES pages
+per step. Each step holds the source's read lock only while it copies
+those pages, so a writer waits for one step at most. A commit from another
+connection restarts the backup, though. If a busy database keeps
+restarting it, the copy is finished in a single step, which holds the read
+lock for as long as copying the file takes (tens of milliseconds for tens
+of MB), once per refresh. The backup goes to a scratch file that then
+replaces the replica, so readers always see a complete copy and keep the
+one they opened.
+
+One background thread per process refreshes its locations' replicas at
+most every REPLICA_REFRESH_SECONDS, and only when the database has changed.
+An flock() on <replica>.lock makes one gunicorn worker do the copy while
+the others keep reading. The replica file's mtime is when its copy
+started. A replica older than REPLICA_MAX_AGE_SECONDS is not used, so a
+stalled refresh can't serve data from long ago. Neither is one copied
+before this process started. Reads then fall back to the live database.
+
+Responses say how stale they may be in X-Data-Age (seconds; 0 when the
+database hasn't changed since the copy, or when it was read directly).
+
+    python replica.py           # refresh the replica now
+"""
+
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import database
+
+try:
+    import fcntl
+except ImportError:  # Windows: each process refreshes on its own
+    fcntl = None
+
+ENABLED = os.getenv('REPLICA_ENABLED', '1').lower() in ('1', 'true', 'yes')
+REFRESH_SECONDS = float(os.getenv('REPLICA_REFRESH_SECONDS', '30'))
+MAX_AGE_SECONDS = float(os.getenv('REPLICA_MAX_AGE_SECONDS', '300'))
+# Pages copied per backup step (4 KiB pages -> 1 MiB)
+STEP_PAGES = int(os.getenv('REPLICA_STEP_PAGES', '256'))
+# Wait before retrying a step that found a writer committing
+BUSY_PAUSE_SECONDS = 0.002
+# Restarts (the database was written to mid-copy) before copying in one step
+RESTARTS_BEFORE_WHOLE_COPY = 3
+
+HEADER = 'X-Data-Age'
+
+
+def configure(enabled: bool, refresh_seconds: Optional[float] = None):
+    """Turn the replica on or off for this process (used by the app factories)"""
+    global ENABLED, REFRESH_SECONDS
+    ENABLED = enabled
+    if refresh_seconds is not None:
+        REFRESH_SECONDS = refresh_seconds
+
+
+def replica_path(database_path: Optional[str] = None) -> str:
+    """Replica file kept next to the database, e.g. restaurant-replica.db"""
+    root, ext = os.path.splitext(database_path or database.current_database_path())
+    return f"{root}-replica{ext or '.db'}"
+
+
+def _modified(path: str) -> float:
+    """When the database (main file or WAL) was last written"""
+    latest = 0.0
+    for name in (path, f"{path}-wal"):
+        try:
+            latest = max(latest, os.stat(name).st_mtime)
+        except FileNotFoundError:
+            pass
+    return latest
+
+
+def _copied(path: str) -> Optional[float]:
+    try:
+        return os.stat(replica_path(path)).st_mtime
+    except FileNotFoundError:
+        return None
+
+
+class _Restarting(Exception):
+    pass
+
+
+def refresh(database_path: Optional[str] = None, pages: int = STEP_PAGES) -> Dict:
+    """
+    Copy the database into its replica now
+
+    Returns:
+        {'seconds', 'pages', 'restarts', 'whole'}; whole is True if the copy
+        had to be finished in a single step
+    """
+    source = database_path or database.current_database_path()
+    target = replica_path(source)
+    tmp = f"{target}.{os.getpid()}.tmp"
+    started = time.time()
+    restarts = 0
+    src = sqlite3.connect(source, timeout=30)
+    try:
+        while True:
+            seen = {'remaining': None, 'restarts': 0}
+
+            def progress(status, remaining, total):
+                if seen['remaining'] is not None and remaining > seen['remaining']:
+                    seen['restarts'] += 1
+                    if pages > 0 and seen['restarts'] >= RESTARTS_BEFORE_WHOLE_COPY:
+                        raise _Restarting()
+                seen['remaining'] = remaining
+
+            # A scratch file: no journal or fsyncs, and a fresh one per attempt
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            dst = sqlite3.connect(tmp)
+            dst.execute('PRAGMA journal_mode = OFF')
+            dst.execute('PRAGMA synchronous = OFF')
+            copy_started = time.time()
+            try:
+                src.backup(dst, pages=pages, progress=progress, sleep=BUSY_PAUSE_SECONDS)
+                total = dst.execute('PRAGMA page_count').fetchone()[0]
+                break
+            except _Restarting:
+                # Writes keep landing between steps: copy the rest of the
+                # way in one step, holding the read lock for the whole copy
+                pages = -1
+            finally:
+                restarts += seen['restarts']
+                dst.close()
+    finally:
+        src.close()
+    # Everything committed before the copy started is in it
+    os.utime(tmp, (copy_started, copy_started))
+    os.replace(tmp, target)
+    return {'seconds': round(time.time() - started, 3), 'pages': total, 'restarts': restarts, 'whole': pages < 0}
+
+
+class ReplicaRefresher:
+    """Background thread that keeps this process's locations' replicas fresh"""
+
+    def __init__(self):
+        # Database path -> when this process started using its replica
+        self.watched: Dict[str, float] = {}
+        self._wakeup = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='replica-refresher', daemon=True)
+        self._thread.start()
+
+    def watch(self, path: str):
+        if path not in self.watched:
+            self.watched[path] = time.time()
+            self._wakeup.set()
+
+    def due(self, path: str) -> bool:
+        copied = _copied(path)
+        if copied is None:
+            return True
+        if _modified(path) <= copied:
+            return False
+        # A copy from before this process started may predate its schema changes
+        return copied < self.watched[path] or time.time() - copied >= REFRESH_SECONDS
+
+    def _run(self):
+        while True:
+            for path in list(self.watched):
+                try:
+                    if self.due(path):
+                        self._refresh(path)
+                except (OSError, sqlite3.Error) as e:
+                    print(f"Warning: Could not refresh the replica of {path}: {e}")
+            self._wakeup.wait(min(REFRESH_SECONDS, 5))
+            self._wakeup.clear()
+
+    def _refresh(self, path: str):
+        if fcntl is None:
+            refresh(path)
+            return
+        with open(f"{replica_path(path)}.lock", 'a') as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return  # another worker is copying it
+            try:
+                if self.due(path):
+                    refresh(path)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+_refresher: Optional[ReplicaRefresher] = None
+_refresher_pid = None
+_refresher_lock = threading.Lock()
+
+
+def _get_refresher() -> ReplicaRefresher:
+    global _refresher, _refresher_pid
+    if _refresher is None or _refresher_pid != os.getpid():
+        with _refresher_lock:
+            if _refresher is None or _refresher_pid != os.getpid():
+                _refresher = ReplicaRefresher()
+                _refresher_pid = os.getpid()
+    return _refresher
+
+
+def age() -> Optional[float]:
+    """
+    How stale the current location's replica may be, in seconds
+
+    Returns None if it shouldn't be read (disabled, not built yet, copied
+    before this process started, or older than MAX_AGE_SECONDS). The first
+    call for a location starts keeping its replica fresh.
+    """
+    if not ENABLED:
+        return None
+    path = database.current_database_path()
+    refresher = _get_refresher()
+    refresher.watch(path)
+    copied = _copied(path)
+    if copied is None:
+        return None
+    if _modified(path) <= copied:
+        return 0.0
+    if copied < refresher.watched[path]:
+        return None
+    stale = time.time() - copied
+    return stale if stale <= MAX_AGE_SECONDS else None
+
+
+def connect() -> Tuple[sqlite3.Connection, float]:
+    """
+    A connection for reporting reads, and how stale its data may be
+
+    Read-only and on the replica when one is usable, otherwise the live
+    database (age 0). Close it when done, as with get_db_connection().
+    """
+    stale = age()
+    if stale is not None:
+        try:
+            uri = Path(replica_path()).resolve().as_uri() + '?mode=ro'
+            conn = sqlite3.connect(uri, uri=True, factory=database.TimedConnection, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            return conn, stale
+        except sqlite3.Error as e:
+            print(f"Warning: Could not open the replica, reading the database instead: {e}")
+    return database.get_db_connection(), 0.0
+
+
+def age_header(seconds: float) -> Dict[str, str]:
+    return {HEADER: str(int(round(seconds)))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh the read-only replica of the database")
+    parser.add_argument('--pages', type=int, default=STEP_PAGES, help="Pages copied per backup step")
+    args = parser.parse_args()
+
+    stats = refresh(pages=args.pages)
+    print(f"Copied {stats['pages']} pages to {replica_path()} in {stats['seconds']}s "
+          f"({stats['restarts']} restarts{', finished in one step' if stats['whole'] else ''})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+"""
+Fast JSON responses
+
+Uses orjson when it is installed and falls back to the stdlib encoder
+otherwise. Large bodies are gzip-compressed for clients that accept it, and
+big result sets can be streamed straight from SQLite: each row is rendered
+to JSON by SQLite's json_object() in C, so Python never builds a dict per
+row.
+"""
+
+import gzip
+import json
+import sqlite3
+import threading
+import zlib
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from flask import Response, request
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Bodies smaller than this are not worth compressing
+GZIP_MIN_SIZE = 1024
+GZIP_LEVEL = 5
+
+# Rows fetched from SQLite per streamed chunk
+STREAM_CHUNK_ROWS = 1000
+
+
+def dumps(obj) -> bytes:
+    """Serialize to compact UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def accepts_gzip() -> bool:
+    return 'gzip' in request.headers.get('Accept-Encoding', '').lower()
+
+
+def json_response(payload, status: int = 200, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Build a JSON response, gzip-compressed when large and accepted"""
+    body = dumps(payload)
+    response = Response(status=status, mimetype='application/json', headers=headers)
+    response.vary.add('Accept-Encoding')
+    if len(body) >= GZIP_MIN_SIZE and accepts_gzip():
+        body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+        response.headers['Content-Encoding'] = 'gzip'
+    response.set_data(body)
+    return response
+
+
+def json_object_sql(columns: Sequence[str]) -> str:
+    """SQL expression rendering the given columns as one JSON object per row"""
+    return 'json_object(' + ', '.join(f"'{column}', {column}" for column in columns) + ')'
+
+
+def _sqlite_has_json() -> bool:
+    try:
+        sqlite3.connect(':memory:').execute("SELECT json_object('a', 1)").close()
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+SQLITE_JSON = _sqlite_has_json()
+
+
+class ConnectionStream:
+    """
+    Response chunks read from a connection that this object owns
+
+    Open the query inside `with ConnectionStream(conn) as stream:` and set
+    stream.chunks; an error there closes the connection. After that it is
+    closed once: when the chunks run out or fail, or on close(). Responses
+    call close() when they finish, including when the body was never read
+    (client gone, HEAD), which a generator's own finally would not see.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.chunks: Iterator[bytes] = iter(())
+        # close() from the server waits for a chunk being read on another thread
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> 'ConnectionStream':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.close()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> bytes:
+        with self._lock:
+            if self.conn is None:
+                raise StopIteration
+            try:
+                return next(self.chunks)
+            except BaseException:
+                self._close()
+                raise
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        if self.conn is not None:
+            conn, self.conn = self.conn, None
+            conn.close()
+
+
+def json_rows(conn: sqlite3.Connection, columns: Sequence[str], from_sql: str,
+              params: Sequence = (), stats: Optional[Dict] = None,
+              separator: bytes = b',') -> Iterator[bytes]:
+    """
+    Stream a query as separator-joined JSON objects, chunk by chunk
+
+    The query runs immediately, so SQL errors surface before any bytes are
+    sent; rows are fetched lazily as the response is written. The connection
+    is left open: set the result as a ConnectionStream's chunks to tie it to
+    the response.
+
+    Args:
+        conn: Open connection
+        columns: Column names to include, in output order
+        from_sql: Everything after the SELECT list, e.g. "FROM bookings ORDER BY ..."
+        params: Query parameters
+        stats: Optional dict whose 'count' is set to the number of rows sent
+        separator: Between objects; b'\n' gives NDJSON (without the final newline)
+    """
+    if SQLITE_JSON:
+        cursor = conn.execute(f'SELECT {json_object_sql(columns)} {from_sql}', params)
+    else:
+        cursor = conn.execute(f"SELECT {', '.join(columns)} {from_sql}", params)
+    if stats is not None:
+        stats['count'] = 0
+
+    def generate():
+        first = True
+        while True:
+            rows = cursor.fetchmany(STREAM_CHUNK_ROWS)
+            if not rows:
+                break
+            if SQLITE_JSON:
+                chunk = separator.join(row[0].encode('utf-8') for row in rows)
+            else:
+                chunk = separator.join(dumps(dict(zip(columns, row))) for row in rows)
+            if stats is not None:
+                stats['count'] += len(rows)
+            yield chunk if first else separator + chunk
+            first = False
+
+    return generate()
+
+
+def gzip_stream(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # wbits=31: gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def stream_json_response(chunks: Iterable[bytes], status: int = 200,
+                         mimetype: str = 'application/json',
+                         headers: Optional[Dict[str, str]] = None,
+                         on_close: Optional[Callable[[], None]] = None) -> Response:
+    """
+    Stream pre-encoded chunks, gzip-compressed if the client accepts it
+
+    on_close (e.g. a ConnectionStream's close) runs when the response is
+    closed, whether or not the body was sent.
+    """
+    headers = dict(headers or {})
+    if accepts_gzip():
+        chunks = gzip_stream(chunks)
+        headers['Content-Encoding'] = 'gzip'
+    response = Response(chunks, status=status, mimetype=mimetype, headers=headers)
+    response.vary.add('Accept-Encoding')
+    if on_close is not None:
+        response.call_on_close(on_close)
+    return response
@@ -0,0 +1,302 @@
+// Admin Dashboard - bookings store and virtualized table
+//
+// Every poll is merged into BookingStore by booking ID, so only bookings
+// that were added, changed or removed do any work. The table only has <tr>
+// elements for the rows in view (plus OVERSCAN_ROWS either side) between
+// two spacer rows; rows are recycled as it scrolls and a row is only
+// rewritten when its booking changed.
+
+const OVERSCAN_ROWS = 10;
+
+// Past this share of the store a delta is applied with one full sort
+const RESORT_FRACTION = 0.125;
+
+const TABLE_COLUMNS = 9;
+
+// A booking is unchanged if its version and every field shown in the table match
+// (spelled out rather than looped over: this runs for every booking on every poll)
+function sameBooking(a, b) {
+    return a.version === b.version && a.status === b.status && a.date === b.date && a.time === b.time &&
+        a.guests === b.guests && a.customer === b.customer && a.email === b.email && a.phone === b.phone &&
+        a.table_pref === b.table_pref;
+}
+
+class BookingStore {
+    constructor() {
+        this.byId = new Map();
+        this.sorted = [];           // every booking, in sort order
+        this.view = [];             // sorted bookings that pass the filter
+        this.statusCounts = new Map();
+        this.confirmedByDate = new Map();
+        this.searchText = new WeakMap();
+        this.sortKey = 'created_at';
+        this.sortDesc = true;
+        this.query = '';
+        this.status = '';
+    }
+
+    /**
+     * Merge a full list of bookings from the server.
+     * Returns the added, changed (new versions) and removed bookings.
+     */
+    sync(bookings) {
+        const added = [];
+        const changed = [];
+        const replaced = [];
+        let kept = 0;
+
+        for (const booking of bookings) {
+            const old = this.byId.get(booking.id);
+            if (old === undefined) {
+                added.push(booking);
+            } else if (!sameBooking(old, booking)) {
+                changed.push(booking);
+                replaced.push(old);
+            } else {
+                kept++;
+            }
+        }
+
+        // Anything the server no longer returns (e.g. archived) is removed
+        const removed = [];
+        if (kept + changed.length < this.byId.size) {
+            const ids = new Set(bookings.map(b => b.id));
+            for (const [id, booking] of this.byId) {
+                if (!ids.has(id)) removed.push(booking);
+            }
+        }
+
+        const outgoing = replaced.concat(removed);
+        const incoming = added.concat(changed);
+        if (outgoing.length === 0 && incoming.length === 0) {
+            return { added, changed, removed };
+        }
+
+        for (const booking of outgoing) {
+            this.byId.delete(booking.id);
+            this._count(booking, -1);
+        }
+        for (const booking of incoming) {
+            this.byId.set(booking.id, booking);
+            this._count(booking, 1);
+        }
+
+        if (outgoing.length + incoming.length > this.sorted.length * RESORT_FRACTION) {
+            this._resort();
+        } else {
+            for (const booking of outgoing) this.sorted.splice(this._position(booking), 1);
+            for (const booking of incoming) this.sorted.splice(this._position(booking), 0, booking);
+            this._refilter();
+        }
+        return { added, changed, removed };
+    }
+
+    setSort(key) {
+        this.sortDesc = key === this.sortKey ? !this.sortDesc : false;
+        this.sortKey = key;
+        this._resort();
+    }
+
+    setFilter(query, status) {
+        this.query = query.trim().toLowerCase();
+        this.status = status;
+        this._refilter();
+    }
+
+    stats(today) {
+        return {
+            total: this.byId.size,
+            confirmed: this.statusCounts.get('confirmed') || 0,
+            cancelled: this.statusCounts.get('cancelled') || 0,
+            today: this.confirmedByDate.get(today) || 0
+        };
+    }
+
+    _compare(a, b) {
+        const x = a[this.sortKey] ?? '';
+        const y = b[this.sortKey] ?? '';
+        let order = x < y ? -1 : x > y ? 1 : 0;
+        if (order === 0) order = a.id < b.id ? -1 : a.id > b.id ? 1 : 0;
+        return this.sortDesc ? -order : order;
+    }
+
+    // Index of booking in this.sorted, or where it would be inserted
+    _position(booking) {
+        let lo = 0;
+        let hi = this.sorted.length;
+        while (lo < hi) {
+            const mid = (lo + hi) >>> 1;
+            if (this._compare(this.sorted[mid], booking) < 0) lo = mid + 1;
+            else hi = mid;
+        }
+        return lo;
+    }
+
+    _resort() {
+        this.sorted = Array.from(this.byId.values()).sort((a, b) => this._compare(a, b));
+        this._refilter();
+    }
+
+    _refilter() {
+        if (!this.query && !this.status) {
+            this.view = this.sorted;
+            return;
+        }
+        this.view = this.sorted.filter(booking => this._matches(booking));
+    }
+
+    _matches(booking) {
+        if (this.status && booking.status !== this.status) return false;
+        if (!this.query) return true;
+        let text = this.searchText.get(booking);
+        if (text === undefined) {
+            text = [booking.id, booking.customer, booking.email, booking.phone, booking.date, booking.table_pref]
+                .join('\n').toLowerCase();
+            this.searchText.set(booking, text);
+        }
+        return text.includes(this.query);
+    }
+
+    _count(booking, delta) {
+        this.statusCounts.set(booking.status, (this.statusCounts.get(booking.status) || 0) + delta);
+        if (booking.status === 'confirmed') {
+            this.confirmedByDate.set(booking.date, (this.confirmedByDate.get(booking.date) || 0) + delta);
+        }
+    }
+}
+
+class VirtualTable {
+    constructor(scroller, tbody, store) {
+        this.scroller = scroller;
+        this.tbody = tbody;
+        this.store = store;
+        this.rowHeight = 0;
+        this.rows = new Map();      // booking ID -> rendered <tr>
+        this.spare = [];            // recycled <tr> elements
+        this.pending = false;
+
+        this.topSpacer = this._spacer();
+        this.bottomSpacer = this._spacer();
+        this.message = document.createElement('tr');
+        this.message.innerHTML = `<td colspan="${TABLE_COLUMNS}" class="no-bookings"></td>`;
+        this.tbody.replaceChildren(this.topSpacer, this.bottomSpacer);
+
+        this.scroller.addEventListener('scroll', () => this.schedule(), { passive: true });
+        window.addEventListener('resize', () => this.schedule());
+    }
+
+    schedule() {
+        if (this.pending) return;
+        this.pending = true;
+        requestAnimationFrame(() => {
+            this.pending = false;
+            this.render();
+        });
+    }
+
+    showMessage(text) {
+        this.message.firstChild.textContent = text;
+        this._release(new Map());
+        this.topSpacer.style.height = this.bottomSpacer.style.height = '0px';
+        this.tbody.insertBefore(this.message, this.bottomSpacer);
+    }
+
+    render() {
+        const view = this.store.view;
+        if (view.length === 0) {
+            this.showMessage(this.store.byId.size ? 'No bookings match the filter' : 'No bookings yet');
+            return;
+        }
+        this.message.remove();
+
+        if (!this.rowHeight) {
+            const probe = this._row(view[0]);
+            this.tbody.insertBefore(probe, this.bottomSpacer);
+            this.rowHeight = probe.getBoundingClientRect().height || 1;
+            probe.remove();
+            this.spare.push(probe);
+        }
+
+        // The spacers keep the scrollbar sized for the whole view
+        const head = this.tbody.parentNode.tHead;
+        const scrollTop = Math.max(0, this.scroller.scrollTop - (head ? head.offsetHeight : 0));
+        const first = Math.max(0, Math.floor(scrollTop / this.rowHeight) - OVERSCAN_ROWS);
+        // Before the first render the scroller is still collapsed, so size by the window too
+        const height = Math.max(this.scroller.clientHeight, window.innerHeight);
+        const last = Math.min(view.length, Math.ceil((scrollTop + height) / this.rowHeight) + OVERSCAN_ROWS);
+        this.topSpacer.style.height = `${first * this.rowHeight}px`;
+        this.bottomSpacer.style.height = `${(view.length - last) * this.rowHeight}px`;
+
+        const rows = new Map();
+        const ordered = [];
+        for (let i = first; i < last; i++) {
+            const booking = view[i];
+            let tr = this.rows.get(booking.id);
+            if (tr !== undefined) {
+                this.rows.delete(booking.id);
+                if (tr.booking !== booking) this._fill(tr, booking);
+            } else {
+                tr = null;
+            }
+            rows.set(booking.id, tr);
+            ordered.push(booking);
+        }
+        this._release(rows);
+        for (const booking of ordered) {
+            if (rows.get(booking.id) === null) rows.set(booking.id, this._row(booking));
+        }
+        this.rows = rows;
+
+        // Move rows into place, leaving those already in order untouched
+        let anchor = this.topSpacer.nextSibling;
+        for (const tr of rows.values()) {
+            if (tr === anchor) anchor = anchor.nextSibling;
+            else this.tbody.insertBefore(tr, anchor);
+        }
+    }
+
+    // Detach rendered rows that are no longer needed and keep them for reuse
+    _release(keep) {
+        for (const [id, tr] of this.rows) {
+            if (!keep.has(id)) {
+                tr.remove();
+                this.spare.push(tr);
+            }
+        }
+        this.rows = keep;
+    }
+
+    _row(booking) {
+        let tr = this.spare.pop();
+        if (tr === undefined) {
+            tr = document.createElement('tr');
+            tr.innerHTML = '<td><strong></strong></td>' + '<td></td>'.repeat(TABLE_COLUMNS - 2) +
+                '<td><span class="status-badge"></span></td>';
+        }
+        this._fill(tr, booking);
+        return tr;
+    }
+
+    _fill(tr, booking) {
+        const cells = tr.cells;
+        cells[0].firstChild.textContent = booking.id;
+        cells[1].textContent = booking.customer;
+        cells[2].textContent = booking.email || 'N/A';
+        cells[3].textContent = booking.phone || 'N/A';
+        cells[4].textContent = booking.date;
+        cells[5].textContent = booking.time;
+        cells[6].textContent = booking.guests;
+        cells[7].textContent = booking.table_pref || 'Any';
+        const badge = cells[8].firstChild;
+        badge.className = `status-badge status-${booking.status}`;
+        badge.textContent = booking.status;
+        tr.booking = booking;
+    }
+
+    _spacer() {
+        const tr = document.createElement('tr');
+        tr.className = 'spacer';
+        tr.setAttribute('aria-hidden', 'true');
+        return tr;
+    }
+}
@@ -4,9 +4,20 @@ class Chatbot {
     constructor() {
         this.isOpen = false;
         this.context = [];
+        this.sessionId = this.getSessionId();
         this.init();
     }
 
+    // Stable per-tab ID so the server can rate limit per chat session
+    getSessionId() {
+        let id = sessionStorage.getItem('chatSessionId');
+        if (!id) {
+            id = Date.now().toString(36) + Math.random().toString(36).slice(2);
+            sessionStorage.setItem('chatSessionId', id);
+        }
+        return id;
+    }
+
     init() {
         this.createChatbotHTML();
         this.attachEventListeners();
@@ -132,7 +143,8 @@ class Chatbot {
             const response = await fetch('/api/chat', {
                 method: 'POST',
                 headers: {
-                    'Content-Type': 'application/json'
+                    'Content-Type': 'application/json',
+                    'X-Session-Id': this.sessionId
                 },
                 body: JSON.stringify({
                     message: message,
@@ -173,6 +185,8 @@ class Chatbot {
                     bot: responseText,
                     action: botResponse.action
                 });
+            } else if (response.status === 429 || response.status === 503) {
+                this.addMessage(data.error, 'bot');
             } else {
                 this.addMessage('Sorry, I encountered an error. Please try again.', 'bot');
             }
@@ -0,0 +1,198 @@
+"""
+Multi-location tenancy
+
+One deployment can serve several restaurant locations. Each location
+(tenant) has its own SQLite file, so a busy location never holds the write
+lock for the others, plus its own name, hours and address. Locations are
+listed in tenants.json (see tenants.example.json); without that file the
+app serves a single location backed by DATABASE_PATH, exactly as before.
+A location's info may name its IANA time zone ("timezone":
+"America/New_York"), which booking dates and times are read in.
+
+A request is routed to a location by path prefix (/harbor/api/menu) or by
+Host header (harbor.example.com), falling back to the default location.
+Each location also gets its own cached /api/info body and menu.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+TENANTS_FILE = os.getenv('TENANTS_FILE', 'tenants.json')
+# Seconds a location's menu is served from memory before it is re-read
+MENU_CACHE_SECONDS = int(os.getenv('MENU_CACHE_SECONDS', '60'))
+
+DEFAULT_INFO = {
+    'name': 'Mediterranean Delight',
+    'description': 'Authentic Mediterranean cuisine with a modern twist',
+    'hours': {
+        'monday_thursday': '11:00 AM - 10:00 PM',
+        'friday_saturday': '11:00 AM - 11:00 PM',
+        'sunday': '12:00 PM - 9:00 PM'
+    },
+    'location': '123 Restaurant Street, Food City',
+    'phone': '+1 (555) 123-4567',
+    'email': 'info@mediterraneandelight.com'
+}
+
+_SLUG = re.compile(r'^[a-z0-9][a-z0-9-]{0,39}$')
+# First path segments the app itself uses, so they can't name a location
+RESERVED_SLUGS = {'api', 'metrics', 'images', 'static', 'admin', 'debug'}
+
+# WSGI environ key the middleware stores the routed location under
+ENVIRON_KEY = 'restaurant.tenant'
+
+
+@dataclass
+class Tenant:
+    """One restaurant location"""
+    slug: str
+    database_path: str
+    info: Dict = field(default_factory=lambda: dict(DEFAULT_INFO))
+    hosts: List[str] = field(default_factory=list)
+
+    def __post_init__(self):
+        # Imported here so the agent can use DEFAULT_INFO without loading Flask
+        from serialization import dumps
+        # /api/info never changes while the process runs, so it is encoded once
+        self.info_body = dumps({'success': True, 'info': self.info})
+        self.info_etag = hashlib.sha1(self.info_body).hexdigest()[:16]
+        self._menu = None
+        self._menu_expires = 0.0
+        self._menu_lock = threading.Lock()
+
+    @property
+    def timezone(self) -> Optional[str]:
+        """IANA time zone bookings here are in, or None for the server's own"""
+        return self.info.get('timezone')
+
+    def cached_menu(self, load: Callable[[], Dict]):
+        """This location's menu payload, reloaded at most every MENU_CACHE_SECONDS"""
+        now = time.monotonic()
+        if self._menu is None or now >= self._menu_expires:
+            with self._menu_lock:
+                if self._menu is None or now >= self._menu_expires:
+                    self._menu = load()
+                    self._menu_expires = now + MENU_CACHE_SECONDS
+        return self._menu
+
+    def clear_menu_cache(self):
+        with self._menu_lock:
+            self._menu = None
+
+
+class TenantRegistry:
+    """Locations by slug and by host name"""
+
+    def __init__(self, tenants: List[Tenant], default: str):
+        self.tenants = {tenant.slug: tenant for tenant in tenants}
+        self.default = self.tenants[default]
+        self.by_host = {host.lower(): tenant for tenant in tenants for host in tenant.hosts}
+
+    def __iter__(self):
+        return iter(self.tenants.values())
+
+    def __len__(self):
+        return len(self.tenants)
+
+    def route(self, environ: Dict) -> Tenant:
+        """
+        Pick the location for a WSGI request
+
+        A leading /<slug> path segment wins (and is moved from PATH_INFO to
+        SCRIPT_NAME so routes and url_for work unchanged), then the Host.
+        """
+        path = environ.get('PATH_INFO', '')
+        segment, _, rest = path.lstrip('/').partition('/')
+        tenant = self.tenants.get(segment) if len(self.tenants) > 1 else None
+        if tenant is not None:
+            environ['SCRIPT_NAME'] = environ.get('SCRIPT_NAME', '') + '/' + segment
+            environ['PATH_INFO'] = '/' + rest
+            return tenant
+
+        host = (environ.get('HTTP_X_FORWARDED_HOST') or environ.get('HTTP_HOST') or '').split(',')[0]
+        return self.by_host.get(host.strip().split(':')[0].lower(), self.default)
+
+
+def load_tenants(path: str = TENANTS_FILE, default_database: str = 'restaurant.db') -> TenantRegistry:
+    """
+    Read the location list
+
+    Args:
+        path: JSON file {"default": slug, "tenants": {slug: {"database", "hosts", "info"}}};
+            info may include "timezone"
+        default_database: Database of the single location used when the file is missing
+
+    Raises:
+        ValueError: If the file is malformed
+    """
+    if not os.path.exists(path):
+        return TenantRegistry([Tenant('default', default_database)], 'default')
+
+    with open(path, encoding='utf-8') as f:
+        config = json.load(f)
+    base = os.path.dirname(os.path.abspath(path))
+    tenants = []
+    for slug, spec in config.get('tenants', {}).items():
+        if not _SLUG.match(slug) or slug in RESERVED_SLUGS:
+            raise ValueError(f"Invalid location slug {slug!r} in {path}")
+        database_path = spec.get('database') or f'{slug}.db'
+        tenants.append(Tenant(
+            slug=slug,
+            database_path=database_path if os.path.isabs(database_path) else os.path.join(base, database_path),
+            info=dict(DEFAULT_INFO, **spec.get('info', {})),
+            hosts=[host.lower() for host in spec.get('hosts', [])],
+        ))
+        if tenants[-1].timezone:
+            try:
+                ZoneInfo(tenants[-1].timezone)
+            except (ZoneInfoNotFoundError, TypeError, ValueError):
+                raise ValueError(f"Unknown time zone {tenants[-1].timezone!r} for location {slug!r} in {path}")
+    if not tenants:
+        raise ValueError(f"No locations defined in {path}")
+    default = config.get('default', tenants[0].slug)
+    if default not in {tenant.slug for tenant in tenants}:
+        raise ValueError(f"Default location {default!r} is not defined in {path}")
+    return TenantRegistry(tenants, default)
+
+
+class TenantMiddleware:
+    """WSGI middleware that routes each request to a location before Flask sees it"""
+
+    def __init__(self, wsgi_app, registry: TenantRegistry):
+        self.wsgi_app = wsgi_app
+        self.registry = registry
+
+    def __call__(self, environ, start_response):
+        environ[ENVIRON_KEY] = self.registry.route(environ)
+        return self.wsgi_app(environ, start_response)
+
+
+class TenantASGIMiddleware:
+    """The same routing for the ASGI app; the location is stored in the scope"""
+
+    def __init__(self, asgi_app, registry: TenantRegistry):
+        self.asgi_app = asgi_app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http':
+            headers = dict(scope['headers'])
+            root_path = scope.get('root_path', '')
+            environ = {
+                'PATH_INFO': scope['path'][len(root_path):] if scope['path'].startswith(root_path) else scope['path'],
+                'SCRIPT_NAME': root_path,
+                'HTTP_HOST': headers.get(b'host', b'').decode('latin-1'),
+                'HTTP_X_FORWARDED_HOST': headers.get(b'x-forwarded-host', b'').decode('latin-1'),
+            }
+            tenant = self.registry.route(environ)
+            # ASGI paths include root_path, so a /<slug> prefix only moves into root_path
+            scope = dict(scope, root_path=environ['SCRIPT_NAME'])
+            scope[ENVIRON_KEY] = tenant
+        await self.asgi_app(scope, receive, send)
@@ -0,0 +1,358 @@
+"""
+Waitlist with automatic offers when a booking is cancelled
+
+Guests join for a date, a time window and a party size. Each worker keeps
+an in-memory index of waiting parties: per half-hour slot, one heap per
+party size ordered by join time. When delete_booking() frees a table,
+offer_freed_slot() picks the largest waiting party that fits the freed
+seats (ties go to whoever joined first). That costs a heap peek per
+distinct party size, so it does not grow with the length of the list. The
+party is offered the slot and the table is held for them for
+WAITLIST_HOLD_MINUTES. If they decline or let the hold lapse, the next
+party gets the offer.
+
+SQLite is the source of truth. The index is rebuilt from it on first use,
+and rows joined through other workers are picked up by rowid. Offers are
+made with a conditional UPDATE, so two workers can never offer the same
+party a table.
+
+Guests address their entry by a random code (WL + 16 hex digits) rather
+than the sequential rowid, since whoever holds the code can see the entry,
+leave the list and accept or decline a held table.
+"""
+
+import heapq
+import os
+import re
+import secrets
+import sqlite3
+import threading
+import time
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import database
+from email_service import get_email_service
+
+HOLD_MINUTES = int(os.getenv('WAITLIST_HOLD_MINUTES', '15'))
+SLOT_MINUTES = 30
+MAX_PARTY_SIZE = 20
+# Statuses: waiting -> offered -> booked, or cancelled/declined/expired
+STATUSES = ('waiting', 'offered', 'booked', 'cancelled', 'declined', 'expired')
+
+_TIME = re.compile(r'^(\d{1,2}):(\d{2})$')
+_DATE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+_ENTRY_ID = re.compile(r'^WL[0-9A-F]{16}$')
+
+
+def new_code() -> str:
+    return 'WL' + secrets.token_hex(8).upper()
+
+
+def parse_id(value: str) -> Optional[str]:
+    """' wl1f...' -> 'WL1F...', or None if it can't be an entry code"""
+    code = str(value).strip().upper()
+    return code if _ENTRY_ID.match(code) else None
+
+
+def _minutes(value: str) -> int:
+    match = _TIME.match(value or '')
+    if not match or int(match.group(1)) > 23 or int(match.group(2)) > 59:
+        raise ValueError(f'invalid time {value!r}, expected HH:MM')
+    return int(match.group(1)) * 60 + int(match.group(2))
+
+
+def _slot(minutes: int) -> int:
+    return minutes - minutes % SLOT_MINUTES
+
+
+def _public(row, contact: bool = False) -> Dict:
+    """An entry under its code; email and phone only for our own messages to the guest"""
+    entry = dict(row)
+    entry['id'] = entry.pop('code')
+    if not contact:
+        del entry['email'], entry['phone']
+    return entry
+
+
+class WaitlistIndex:
+    """Waiting parties by (date, slot) -> party size -> heap of (joined_at, id)"""
+
+    def __init__(self):
+        self._slots: Dict[Tuple[str, int], Dict[int, List[Tuple[float, int]]]] = {}
+        # id -> (date, first slot, last slot) for parties still waiting
+        self._waiting: Dict[int, Tuple[str, int, int]] = {}
+        self._last_id = 0
+        self._today = date.today().isoformat()
+
+    def add(self, entry_id: int, day: str, time_from: str, time_to: str, guests: int, joined_at: float):
+        first, last = _slot(_minutes(time_from)), _slot(_minutes(time_to))
+        self._waiting[entry_id] = (day, first, last)
+        for slot in range(first, last + 1, SLOT_MINUTES):
+            heapq.heappush(self._slots.setdefault((day, slot), {}).setdefault(guests, []), (joined_at, entry_id))
+        self._last_id = max(self._last_id, entry_id)
+
+    def discard(self, entry_id: int):
+        """Forget a party; its heap entries are dropped lazily when they reach the top"""
+        self._waiting.pop(entry_id, None)
+
+    def sync(self, conn: sqlite3.Connection):
+        """Load parties that joined (in any worker) since the last sync"""
+        today = date.today().isoformat()
+        if today != self._today:
+            # Drop slots for days that are over
+            self._today = today
+            self._slots = {key: sizes for key, sizes in self._slots.items() if key[0] >= today}
+            self._waiting = {i: w for i, w in self._waiting.items() if w[0] >= today}
+        rows = conn.execute(
+            "SELECT id, date, time_from, time_to, guests, joined_at FROM waitlist "
+            "WHERE id > ? AND status = 'waiting' AND date >= ?", (self._last_id, today)
+        ).fetchall()
+        for row in rows:
+            self.add(*row)
+
+    def best(self, day: str, time_str: str, seats: int) -> Optional[int]:
+        """Largest waiting party of at most `seats` guests for this slot, earliest joiner first"""
+        sizes = self._slots.get((day, _slot(_minutes(time_str))))
+        if not sizes:
+            return None
+        for guests in sorted((g for g in sizes if g <= seats), reverse=True):
+            heap = sizes[guests]
+            while heap and heap[0][1] not in self._waiting:
+                heapq.heappop(heap)
+            if heap:
+                return heap[0][1]
+            del sizes[guests]
+        return None
+
+    def __len__(self):
+        return len(self._waiting)
+
+
+# One index per database file (one per location)
+_indexes: Dict[str, WaitlistIndex] = {}
+_index_lock = threading.Lock()
+
+
+def get_index(conn: sqlite3.Connection) -> WaitlistIndex:
+    """This process's index, built from SQLite on first use and topped up on every call"""
+    with _index_lock:
+        index = _indexes.get(database.current_database_path())
+        if index is None:
+            index = _indexes[database.current_database_path()] = WaitlistIndex()
+        index.sync(conn)
+        return index
+
+
+def _connect() -> sqlite3.Connection:
+    database.ensure_database()
+    conn = sqlite3.connect(database.current_database_path(), timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def join_waitlist(data: Dict) -> Dict:
+    """
+    Add a party to the waitlist
+
+    Args:
+        data: {'customer', 'email', 'phone' (optional), 'date', 'time_from',
+               'time_to' (defaults to time_from), 'guests'}
+
+    Returns:
+        The waitlist entry
+
+    Raises:
+        ValueError: If a field is missing or malformed
+    """
+    customer = (data.get('customer') or '').strip()
+    if not customer:
+        raise ValueError('Missing required field: customer')
+    if not data.get('email') and not data.get('phone'):
+        raise ValueError('An email or phone number is needed so we can offer you a table')
+    day = data.get('date') or ''
+    if not _DATE.match(day):
+        raise ValueError(f'invalid date {day!r}, expected YYYY-MM-DD')
+    if day < date.today().isoformat():
+        raise ValueError('date is in the past')
+    time_from = data.get('time_from') or data.get('time')
+    time_to = data.get('time_to') or time_from
+    if _minutes(time_from) > _minutes(time_to):
+        raise ValueError('time_from must not be after time_to')
+    try:
+        guests = int(data.get('guests'))
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid guests {data.get('guests')!r}")
+    if not 0 < guests <= MAX_PARTY_SIZE:
+        raise ValueError(f'guests must be between 1 and {MAX_PARTY_SIZE}')
+
+    conn = _connect()
+    try:
+        cursor = conn.execute(
+            "INSERT INTO waitlist (customer, email, phone, date, time_from, time_to, guests, joined_at, code) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (customer, data.get('email'), data.get('phone'), day, time_from, time_to, guests, time.time(),
+             new_code())
+        )
+        get_index(conn)
+        return _public(conn.execute('SELECT * FROM waitlist WHERE id = ?', (cursor.lastrowid,)).fetchone())
+    finally:
+        conn.close()
+
+
+def get_entry(code: str) -> Optional[Dict]:
+    conn = _connect()
+    try:
+        expire_offers(conn)
+        row = conn.execute('SELECT * FROM waitlist WHERE code = ?', (code,)).fetchone()
+        return _public(row) if row else None
+    finally:
+        conn.close()
+
+
+def leave_waitlist(code: str) -> bool:
+    """Take a party off the list; an outstanding offer is passed to the next party"""
+    conn = _connect()
+    try:
+        row = conn.execute('SELECT * FROM waitlist WHERE code = ?', (code,)).fetchone()
+        if not row or row['status'] not in ('waiting', 'offered'):
+            return False
+        return _close(conn, row, 'cancelled')
+    finally:
+        conn.close()
+
+
+def _close(conn: sqlite3.Connection, row, status: str) -> bool:
+    """Move a waiting/offered party to a final status, re-offering any held slot"""
+    cursor = conn.execute(
+        'UPDATE waitlist SET status = ? WHERE id = ? AND status = ?', (status, row['id'], row['status'])
+    )
+    if not cursor.rowcount:
+        return False
+    index = get_index(conn)
+    with _index_lock:
+        index.discard(row['id'])
+    if row['status'] == 'offered':
+        _offer(conn, index, row['offered_date'], row['offered_time'], row['offered_seats'],
+               row['offered_table'], row['offered_from'])
+    return True
+
+
+def _offer(conn: sqlite3.Connection, index: WaitlistIndex, day: str, time_str: str, seats: int,
+           table_pref: Optional[str], freed_by: Optional[str]) -> Optional[Dict]:
+    """Offer a freed slot to the best waiting party; returns the entry offered, if any"""
+    while True:
+        with _index_lock:
+            entry_id = index.best(day, time_str, seats)
+            if entry_id is None:
+                return None
+            index.discard(entry_id)
+        cursor = conn.execute(
+            "UPDATE waitlist SET status = 'offered', offered_date = ?, offered_time = ?, offered_seats = ?, "
+            "offered_table = ?, offered_from = ?, offer_expires = ? WHERE id = ? AND status = 'waiting'",
+            (day, time_str, seats, table_pref, freed_by, time.time() + HOLD_MINUTES * 60, entry_id)
+        )
+        if cursor.rowcount:
+            break
+        # Left the list, or was offered a table by another worker
+
+    entry = _public(conn.execute('SELECT * FROM waitlist WHERE id = ?', (entry_id,)).fetchone(), contact=True)
+    try:
+        get_email_service().send_waitlist_offer(entry, HOLD_MINUTES)
+    except Exception as e:
+        print(f"Warning: Could not send waitlist offer: {e}")
+    return entry
+
+
+def offer_freed_slot(booking: Dict) -> Optional[Dict]:
+    """
+    Offer a just-cancelled booking's table to the waitlist
+
+    Args:
+        booking: The cancelled booking (date, time, guests, table_pref, id)
+
+    Returns:
+        The waitlist entry that was offered the table, or None
+    """
+    if booking.get('date', '') < date.today().isoformat():
+        return None
+    conn = _connect()
+    try:
+        expire_offers(conn)
+        return _offer(conn, get_index(conn), booking['date'], booking['time'], int(booking['guests']),
+                      booking.get('table_pref'), booking.get('id'))
+    except ValueError:
+        return None  # booking time isn't HH:MM, so it can't match a slot
+    finally:
+        conn.close()
+
+
+def expire_offers(conn: Optional[sqlite3.Connection] = None) -> int:
+    """Pass lapsed offers on to the next party; returns how many expired"""
+    own = conn is None
+    conn = conn or _connect()
+    try:
+        rows = conn.execute(
+            "SELECT * FROM waitlist WHERE status = 'offered' AND offer_expires < ?", (time.time(),)
+        ).fetchall()
+        return sum(_close(conn, row, 'expired') for row in rows)
+    finally:
+        if own:
+            conn.close()
+
+
+def accept_offer(code: str) -> Dict:
+    """
+    Turn a held offer into a booking
+
+    Returns:
+        The new booking
+
+    Raises:
+        LookupError: If there is no such entry
+        ValueError: If the entry has no live offer (never offered, or the hold lapsed)
+    """
+    conn = _connect()
+    try:
+        expire_offers(conn)
+        row = conn.execute('SELECT * FROM waitlist WHERE code = ?', (code,)).fetchone()
+        if not row:
+            raise LookupError('Waitlist entry not found')
+        # Claim the offer first so a concurrent accept or expiry can't also act on it
+        cursor = conn.execute(
+            "UPDATE waitlist SET status = 'booked' WHERE id = ? AND status = 'offered' AND offer_expires >= ?",
+            (row['id'], time.time())
+        )
+        if not cursor.rowcount:
+            raise ValueError(f"There is no table on hold for this entry (status: {row['status']})")
+
+        try:
+            booking = database.create_booking({
+                'customer': row['customer'],
+                'email': row['email'],
+                'phone': row['phone'],
+                'date': row['offered_date'],
+                'time': row['offered_time'],
+                'guests': row['guests'],
+                'table_pref': row['offered_table'] or 'Any',
+            })
+        except Exception:
+            # Put the hold back so the guest can retry before it lapses
+            conn.execute("UPDATE waitlist SET status = 'offered' WHERE id = ?", (row['id'],))
+            raise
+        conn.execute('UPDATE waitlist SET booking_id = ? WHERE id = ?', (booking['id'], row['id']))
+        return booking
+    finally:
+        conn.close()
+
+
+def decline_offer(code: str) -> bool:
+    """Turn down a held table; it is offered to the next party"""
+    conn = _connect()
+    try:
+        row = conn.execute('SELECT * FROM waitlist WHERE code = ?', (code,)).fetchone()
+        if not row or row['status'] != 'offered':
+            return False
+        return _close(conn, row, 'declined')
+    finally:
+        conn.close()